@@ -2,10 +2,23 @@ from flask import Flask, request, redirect, render_template_string, jsonify
 import requests
 import json
 import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing, contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit
 from apscheduler.schedulers.background import BackgroundScheduler
 import atexit
-from supabase import create_client, Client
+import base64
+import hashlib
+import zlib
+from collections import Counter, OrderedDict, deque
+from bisect import bisect_right
 
 app = Flask(__name__)
 
@@ -35,125 +48,496 @@ def flatten(d, parent_key="", sep="."):
             items[new_key] = v
     return items
 
-# Supabase configuration
-print("=" * 60)
-print("Initializing Supabase Connection")
-print("=" * 60)
-
-# Check which environment variables are available
+# Supabase configuration (the client is created on first use, see get_supabase)
 SUPABASE_URL = os.environ.get('SUPABASE_URL', '')
 SUPABASE_SERVICE_KEY_ENV = os.environ.get('SUPABASE_SERVICE_KEY', '')
 SUPABASE_KEY_ENV = os.environ.get('SUPABASE_KEY', '')
+SUPABASE_KEY = SUPABASE_SERVICE_KEY_ENV or SUPABASE_KEY_ENV
+
+_supabase_client = None
+_supabase_initialized = False
+_supabase_lock = threading.Lock()
+
+def get_supabase():
+    """The shared Supabase client, created on first call (None if not configured or init failed)."""
+    global _supabase_client, _supabase_initialized
+    if not _supabase_initialized:
+        with _supabase_lock:
+            if not _supabase_initialized:
+                _supabase_client = init_supabase()
+                _supabase_initialized = True
+    return _supabase_client
+
+def init_supabase():
+    """Validate the configured key and create the Supabase client. Returns the client or None."""
+    from supabase import create_client
+
+    print("=" * 60)
+    print("Initializing Supabase Connection")
+    print("=" * 60)
+
+    # Determine which key to use and log the source
+    if SUPABASE_SERVICE_KEY_ENV:
+        key_source = "SUPABASE_SERVICE_KEY (preferred)"
+        print(f"✅ Found SUPABASE_SERVICE_KEY environment variable")
+    elif SUPABASE_KEY_ENV:
+        key_source = "SUPABASE_KEY (fallback)"
+        print(f"⚠️ Found SUPABASE_KEY (fallback) - Consider using SUPABASE_SERVICE_KEY for clarity")
+    else:
+        key_source = "none"
+        print(f"❌ No Supabase key found in environment variables")
+
+    # Log URL status
+    if SUPABASE_URL:
+        print(f"✅ Found SUPABASE_URL: {SUPABASE_URL[:50]}...")
+    else:
+        print(f"❌ SUPABASE_URL not found in environment variables")
+
+    client = None
+    is_service_role_key = True  # Track if we should proceed with initialization
 
-# Determine which key to use and log the source
-if SUPABASE_SERVICE_KEY_ENV:
-    SUPABASE_KEY = SUPABASE_SERVICE_KEY_ENV
-    key_source = "SUPABASE_SERVICE_KEY (preferred)"
-    print(f"✅ Found SUPABASE_SERVICE_KEY environment variable")
-elif SUPABASE_KEY_ENV:
-    SUPABASE_KEY = SUPABASE_KEY_ENV
-    key_source = "SUPABASE_KEY (fallback)"
-    print(f"⚠️ Found SUPABASE_KEY (fallback) - Consider using SUPABASE_SERVICE_KEY for clarity")
-else:
-    SUPABASE_KEY = ''
-    key_source = "none"
-    print(f"❌ No Supabase key found in environment variables")
-
-# Log URL status
-if SUPABASE_URL:
-    print(f"✅ Found SUPABASE_URL: {SUPABASE_URL[:50]}...")
-else:
-    print(f"❌ SUPABASE_URL not found in environment variables")
-
-supabase: Client = None
-is_service_role_key = True  # Track if we should proceed with initialization
-
-if SUPABASE_URL and SUPABASE_KEY:
-    print(f"\n📋 Using key from: {key_source}")
-    print(f"🔍 Validating key type...")
+    if SUPABASE_URL and SUPABASE_KEY:
+        print(f"\n📋 Using key from: {key_source}")
+        print(f"🔍 Validating key type...")
     
-    # Validate that we're using service_role key, not anon key
-    try:
-        import base64
-        import json as json_lib
-        # Decode JWT to check the role (simple decode without verification)
-        parts = SUPABASE_KEY.split('.')
-        if len(parts) >= 2:
-            # Decode the payload (second part)
-            payload = parts[1]
-            # Add padding if needed
-            payload += '=' * (4 - len(payload) % 4)
-            decoded = base64.urlsafe_b64decode(payload)
-            jwt_data = json_lib.loads(decoded)
-            role = jwt_data.get('role', 'unknown')
-            if role == 'anon':
-                print("❌ ERROR: You are using the 'anon' (public) API key!")
-                print("   For server-side operations, you MUST use the 'service_role' key.")
-                print("   Get it from: Supabase Dashboard → Project Settings → API → service_role key")
-                print("   Set it as SUPABASE_SERVICE_KEY environment variable in Render")
-                print("   Current key source: " + key_source)
-                is_service_role_key = False
-            elif role == 'service_role':
-                print(f"✅ Detected service_role key (correct for server-side operations)")
+        # Validate that we're using service_role key, not anon key
+        try:
+            import base64
+            import json as json_lib
+            # Decode JWT to check the role (simple decode without verification)
+            parts = SUPABASE_KEY.split('.')
+            if len(parts) >= 2:
+                # Decode the payload (second part)
+                payload = parts[1]
+                # Add padding if needed
+                payload += '=' * (4 - len(payload) % 4)
+                decoded = base64.urlsafe_b64decode(payload)
+                jwt_data = json_lib.loads(decoded)
+                role = jwt_data.get('role', 'unknown')
+                if role == 'anon':
+                    print("❌ ERROR: You are using the 'anon' (public) API key!")
+                    print("   For server-side operations, you MUST use the 'service_role' key.")
+                    print("   Get it from: Supabase Dashboard → Project Settings → API → service_role key")
+                    print("   Set it as SUPABASE_SERVICE_KEY environment variable in Render")
+                    print("   Current key source: " + key_source)
+                    is_service_role_key = False
+                elif role == 'service_role':
+                    print(f"✅ Detected service_role key (correct for server-side operations)")
+                else:
+                    print(f"⚠️ Unknown key role: {role}. Expected 'service_role'")
             else:
-                print(f"⚠️ Unknown key role: {role}. Expected 'service_role'")
-        else:
-            print(f"⚠️ Key format unexpected (not a valid JWT). Proceeding with initialization...")
-    except Exception as jwt_check_error:
-        # If JWT decode fails, continue anyway - might be a different format
-        print(f"⚠️ Could not validate key role (continuing anyway): {jwt_check_error}")
+                print(f"⚠️ Key format unexpected (not a valid JWT). Proceeding with initialization...")
+        except Exception as jwt_check_error:
+            # If JWT decode fails, continue anyway - might be a different format
+            print(f"⚠️ Could not validate key role (continuing anyway): {jwt_check_error}")
     
-    if is_service_role_key:
-        try:
-            print(f"\n🔗 Initializing Supabase client...")
-            # Ensure URL doesn't have trailing slash (supabase-py expects clean URL)
-            clean_url = SUPABASE_URL.rstrip('/')
-            print(f"   URL: {clean_url}")
-            # Simple initialization - supabase-py uses REST API URL directly
-            # Don't test connection here - let it fail on first use if there's an issue
-            supabase = create_client(clean_url, SUPABASE_KEY)
-            print("✅ Supabase client initialized successfully")
-            print("=" * 60)
-        except Exception as e:
-            error_msg = str(e)
-            error_type = type(e).__name__
-            print(f"\n❌ Failed to initialize Supabase client")
-            print(f"   Error type: {error_type}")
-            print(f"   Error message: {error_msg}")
-            import traceback
-            tb = traceback.format_exc()
-            print(f"\n   Full traceback:\n{tb}")
-            # If it's the headers error, it's likely a version compatibility issue
-            if "'dict' object has no attribute 'headers'" in error_msg or "headers" in error_msg.lower():
-                print("\n💡 This appears to be a supabase-py/postgrest version compatibility issue.")
-                print("   Updated requirements.txt to use supabase>=2.8.0 and postgrest>=0.15.0")
-                print("   After redeploy, pip should install compatible versions automatically")
+        if is_service_role_key:
+            try:
+                print(f"\n🔗 Initializing Supabase client...")
+                # Ensure URL doesn't have trailing slash (supabase-py expects clean URL)
+                clean_url = SUPABASE_URL.rstrip('/')
+                print(f"   URL: {clean_url}")
+                # Simple initialization - supabase-py uses REST API URL directly
+                # Don't test connection here - let it fail on first use if there's an issue
+                client = create_client(clean_url, SUPABASE_KEY)
+                print("✅ Supabase client initialized successfully")
+                print("=" * 60)
+            except Exception as e:
+                error_msg = str(e)
+                error_type = type(e).__name__
+                print(f"\n❌ Failed to initialize Supabase client")
+                print(f"   Error type: {error_type}")
+                print(f"   Error message: {error_msg}")
+                import traceback
+                tb = traceback.format_exc()
+                print(f"\n   Full traceback:\n{tb}")
+                # If it's the headers error, it's likely a version compatibility issue
+                if "'dict' object has no attribute 'headers'" in error_msg or "headers" in error_msg.lower():
+                    print("\n💡 This appears to be a supabase-py/postgrest version compatibility issue.")
+                    print("   Updated requirements.txt to use supabase>=2.8.0 and postgrest>=0.15.0")
+                    print("   After redeploy, pip should install compatible versions automatically")
+                print("=" * 60)
+                client = None
+        else:
+            print("\n❌ Skipping Supabase initialization due to invalid key type")
             print("=" * 60)
-            supabase = None
     else:
-        print("\n❌ Skipping Supabase initialization due to invalid key type")
+        print("\n❌ Supabase not configured. Missing environment variables:")
+        missing = []
+        if not SUPABASE_URL:
+            missing.append('SUPABASE_URL')
+            print("   - SUPABASE_URL (required)")
+        if not SUPABASE_KEY:
+            missing.append('SUPABASE_SERVICE_KEY or SUPABASE_KEY')
+            print("   - SUPABASE_SERVICE_KEY (preferred) or SUPABASE_KEY (fallback)")
+        print("\n📝 To fix this:")
+        print("   1. Go to Render Dashboard → Your Service → Environment")
+        print("   2. Add SUPABASE_URL: https://your-project-id.supabase.co")
+        print("   3. Add SUPABASE_SERVICE_KEY: your-service-role-key")
+        print("   4. Get keys from: Supabase Dashboard → Project Settings → API")
         print("=" * 60)
-else:
-    print("\n❌ Supabase not configured. Missing environment variables:")
-    missing = []
-    if not SUPABASE_URL:
-        missing.append('SUPABASE_URL')
-        print("   - SUPABASE_URL (required)")
-    if not SUPABASE_KEY:
-        missing.append('SUPABASE_SERVICE_KEY or SUPABASE_KEY')
-        print("   - SUPABASE_SERVICE_KEY (preferred) or SUPABASE_KEY (fallback)")
-    print("\n📝 To fix this:")
-    print("   1. Go to Render Dashboard → Your Service → Environment")
-    print("   2. Add SUPABASE_URL: https://your-project-id.supabase.co")
-    print("   3. Add SUPABASE_SERVICE_KEY: your-service-role-key")
-    print("   4. Get keys from: Supabase Dashboard → Project Settings → API")
-    print("=" * 60)
+    return client
+
+# Direct Postgres bulk load: with SUPABASE_DB_URL set (the project's connection string, direct or the
+# session/transaction pooler) and psycopg installed, large upserts skip PostgREST. Rows are COPYed
+# into a temporary staging table and merged with a single INSERT ... ON CONFLICT, one transaction per
+# batch. Without a DB URL, or while the database is unreachable, supabase_upsert() uses PostgREST.
+SUPABASE_DB_URL = os.environ.get('SUPABASE_DB_URL', '')
+BULK_LOAD_RETRY_SECONDS = 300  # After a connection failure, use PostgREST for this long before retrying
+
+_bulk_conn = None
+_bulk_lock = threading.Lock()
+_bulk_disabled_until = 0
+
+def bulk_load_enabled():
+    return bool(SUPABASE_DB_URL) and time.time() >= _bulk_disabled_until
+
+def bulk_connection():
+    """The shared psycopg connection (reconnects if it was closed). Call with _bulk_lock held."""
+    global _bulk_conn
+    if _bulk_conn is None or _bulk_conn.closed:
+        import psycopg
+        # prepare_threshold=None: the transaction pooler does not support prepared statements
+        _bulk_conn = psycopg.connect(SUPABASE_DB_URL, connect_timeout=10, prepare_threshold=None)
+    return _bulk_conn
+
+def bulk_upsert(table, rows, on_conflict, ignore_duplicates=False):
+    """
+    Upsert rows with COPY into a staging table plus one INSERT ... ON CONFLICT merge.
+
+    Args:
+        table: Target table (public schema)
+        rows: Dicts of column -> value; dict/list values are written as jsonb
+        on_conflict: Unique key column the merge matches on
+        ignore_duplicates: Keep existing rows (ON CONFLICT DO NOTHING) instead of updating them
+
+    Returns:
+        Number of rows in the batch (rows must have distinct keys; supabase_upsert ensures it)
+    """
+    from psycopg import sql
+    from psycopg.types.json import Jsonb
+
+    if not rows:
+        return 0
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    column_list = sql.SQL(', ').join(map(sql.Identifier, columns))
+    if ignore_duplicates:
+        action = sql.SQL('DO NOTHING')
+    else:
+        action = sql.SQL('DO UPDATE SET ') + sql.SQL(', ').join(
+            sql.SQL('{0} = EXCLUDED.{0}').format(sql.Identifier(column)) for column in columns if column != on_conflict)
+    stage = sql.Identifier(f'_stage_{table}')
+
+    with _bulk_lock:
+        conn = bulk_connection()
+        with conn.transaction(), conn.cursor() as cur:
+            cur.execute(sql.SQL('CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP').format(
+                stage, sql.Identifier(table)))
+            with cur.copy(sql.SQL('COPY {} ({}) FROM STDIN').format(stage, column_list)) as copy:
+                for row in rows:
+                    copy.write_row([Jsonb(v) if isinstance(v, (dict, list)) else v for v in map(row.get, columns)])
+            cur.execute(sql.SQL('INSERT INTO {table} ({columns}) SELECT {columns} FROM {stage} ON CONFLICT ({key}) {action}').format(
+                table=sql.Identifier(table), columns=column_list, stage=stage, key=sql.Identifier(on_conflict), action=action))
+    return len(rows)
+
+def reset_bulk_connection():
+    """Drop the shared psycopg connection after an error; the next bulk load opens a fresh one."""
+    global _bulk_conn
+    with _bulk_lock:
+        conn, _bulk_conn = _bulk_conn, None
+    if conn is not None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+def supabase_upsert(table, rows, on_conflict, ignore_duplicates=False):
+    """
+    Upsert a batch through the Postgres bulk loader when configured, else through PostgREST.
+
+    Rows repeating a key are collapsed first, the last one winning (with ignore_duplicates, the
+    first), so both paths write the same rows: Postgres rejects a merge that touches a key twice.
+    A database error resets the bulk connection and the batch goes through PostgREST; a
+    connection failure also keeps the bulk loader off for BULK_LOAD_RETRY_SECONDS.
+    """
+    global _bulk_disabled_until
+    by_key = {}
+    for row in rows:
+        if not (ignore_duplicates and row[on_conflict] in by_key):
+            by_key[row[on_conflict]] = row
+    rows = list(by_key.values())
+    if rows and bulk_load_enabled():
+        try:
+            return bulk_upsert(table, rows, on_conflict, ignore_duplicates)
+        except ImportError:
+            print("⚠️ SUPABASE_DB_URL is set but psycopg is not installed; using PostgREST")
+            _bulk_disabled_until = float('inf')
+        except Exception as e:
+            import psycopg
+            if not isinstance(e, psycopg.Error):
+                raise
+            reset_bulk_connection()
+            if isinstance(e, psycopg.OperationalError):
+                print(f"⚠️ Postgres bulk load unavailable, using PostgREST for {BULK_LOAD_RETRY_SECONDS}s: {e}")
+                _bulk_disabled_until = time.time() + BULK_LOAD_RETRY_SECONDS
+            else:
+                print(f"⚠️ Postgres bulk load of {table} failed, retrying the batch through PostgREST: {e}")
+    get_supabase().table(table).upsert(rows, on_conflict=on_conflict, ignore_duplicates=ignore_duplicates).execute()
+    return len(rows)
+
+# ==================== UPSTREAM RATE LIMITS ====================
+
+# Every Bullhorn and AHSA call goes through upstream_get/upstream_post, which take a token from a
+# process-wide bucket per host first. Callers run in one of three priority classes: 'interactive'
+# (dashboard requests, the default), 'maintenance' (token upkeep) and 'bulk' (syncs, pushes, cache
+# warming). A waiting higher class is always served first, and lower classes leave headroom in the
+# bucket, so a background sync can slow down but never starve the dashboard. Limits per host come
+# from UPSTREAM_RATE_LIMITS ("host=rate/burst,host=rate/burst"), others use the default rate.
+UPSTREAM_PRIORITIES = ('interactive', 'maintenance', 'bulk')
+UPSTREAM_HEADROOM = {'interactive': 0.0, 'maintenance': 0.25, 'bulk': 0.5}  # Share of the burst a class leaves unused
+UPSTREAM_RATE_PER_SECOND = float(os.environ.get('UPSTREAM_RATE_PER_SECOND', '10'))
+UPSTREAM_BURST = int(os.environ.get('UPSTREAM_BURST', '20'))
+UPSTREAM_RATE_LIMITS = {
+    host.strip(): tuple(float(x) for x in limit.split('/'))
+    for host, limit in (item.split('=') for item in os.environ.get('UPSTREAM_RATE_LIMITS', '').split(',') if '=' in item)
+}
+UPSTREAM_RETRY_AFTER_SECONDS = 1.0  # Pause for background classes after a 429 without Retry-After
+
+_upstream_context = threading.local()
+_upstream_cond = threading.Condition()
+_upstream_buckets = {}
+
+@contextmanager
+def upstream_priority(priority):
+    """Run the enclosed upstream calls (or, as a decorator, a function's) in a priority class."""
+    previous = getattr(_upstream_context, 'priority', None)
+    _upstream_context.priority = priority
+    try:
+        yield
+    finally:
+        _upstream_context.priority = previous
+
+def current_upstream_priority():
+    return getattr(_upstream_context, 'priority', None) or 'interactive'
+
+def upstream_bucket(host):
+    """Token bucket state for a host (created on first use). Call with _upstream_cond held."""
+    bucket = _upstream_buckets.get(host)
+    if bucket is None:
+        rate, burst = UPSTREAM_RATE_LIMITS.get(host, (UPSTREAM_RATE_PER_SECOND, UPSTREAM_BURST))
+        bucket = _upstream_buckets[host] = {
+            'rate': rate, 'burst': burst, 'tokens': float(burst), 'refilledAt': time.monotonic(),
+            'pausedUntil': 0.0, 'throttled': 0,
+            'classes': {p: {'requests': 0, 'delayed': 0, 'waitSeconds': 0.0, 'maxWaitSeconds': 0.0, 'queued': 0}
+                        for p in UPSTREAM_PRIORITIES},
+        }
+    return bucket
+
+def upstream_enqueue(url, priority=None):
+    """Join the wait queue of url's host in a priority class; returns the ticket for
+    upstream_try_take/upstream_dequeue. acquire_upstream wraps all three for blocking callers."""
+    priority = priority or current_upstream_priority()
+    with _upstream_cond:
+        bucket = upstream_bucket(urlsplit(url).hostname or '')
+        bucket['classes'][priority]['queued'] += 1
+    return {'bucket': bucket, 'priority': priority, 'rank': UPSTREAM_PRIORITIES.index(priority),
+            'started': time.monotonic()}
+
+def upstream_try_take(ticket):
+    """Take a token if the ticket's class may have one now: returns 0, or the seconds to wait before
+    trying again (without blocking, so async callers can sleep on their event loop instead)."""
+    with _upstream_cond:
+        return take_upstream_token(ticket)
+
+def take_upstream_token(ticket):
+    bucket, priority, rank = ticket['bucket'], ticket['priority'], ticket['rank']
+    now = time.monotonic()
+    bucket['tokens'] = min(bucket['burst'], bucket['tokens'] + (now - bucket['refilledAt']) * bucket['rate'])
+    bucket['refilledAt'] = now
+    floor = 1 + UPSTREAM_HEADROOM[priority] * bucket['burst']
+    paused = rank > 0 and now < bucket['pausedUntil']
+    ahead = any(bucket['classes'][p]['queued'] for p in UPSTREAM_PRIORITIES[:rank])
+    if not paused and not ahead and bucket['tokens'] >= floor:
+        bucket['tokens'] -= 1
+        return 0
+    if ahead:
+        return 0.05  # Re-check once the higher class has been served
+    wait = (floor - bucket['tokens']) / bucket['rate']
+    if paused:
+        wait = max(wait, bucket['pausedUntil'] - now)
+    return max(0.005, wait)
+
+def upstream_dequeue(ticket):
+    """Leave the wait queue (token taken or given up) and record the wait; returns seconds waited."""
+    waited = time.monotonic() - ticket['started']
+    with _upstream_cond:
+        stats = ticket['bucket']['classes'][ticket['priority']]
+        stats['queued'] -= 1
+        stats['requests'] += 1
+        stats['waitSeconds'] += waited
+        stats['maxWaitSeconds'] = max(stats['maxWaitSeconds'], waited)
+        if waited >= 0.001:
+            stats['delayed'] += 1
+        _upstream_cond.notify_all()
+    return waited
+
+def acquire_upstream(url, priority=None):
+    """Block until the url's host has a token for this priority class; returns seconds waited."""
+    ticket = upstream_enqueue(url, priority)
+    try:
+        with _upstream_cond:
+            while True:
+                wait = take_upstream_token(ticket)
+                if not wait:
+                    break
+                _upstream_cond.wait(wait)
+    finally:
+        waited = upstream_dequeue(ticket)
+    return waited
+
+def upstream_throttled(url, response):
+    """A 429 empties the host's bucket and pauses the background classes for Retry-After."""
+    try:
+        retry_after = float(response.headers.get('Retry-After', UPSTREAM_RETRY_AFTER_SECONDS))
+    except (TypeError, ValueError):
+        retry_after = UPSTREAM_RETRY_AFTER_SECONDS
+    with _upstream_cond:
+        bucket = upstream_bucket(urlsplit(url).hostname or '')
+        bucket['tokens'] = 0.0
+        bucket['pausedUntil'] = max(bucket['pausedUntil'], time.monotonic() + retry_after)
+        bucket['throttled'] += 1
+    print(f"⚠️ {urlsplit(url).hostname} returned 429: pausing background calls for {retry_after:.0f}s")
+
+def upstream_request(method, url, **kwargs):
+    """requests.get/post behind the host's circuit breaker and rate limiter (same arguments and
+    return value; raises UpstreamUnavailable without calling out while the circuit is open)."""
+    breaker_check(url)
+    acquire_upstream(url)
+    started = time.monotonic()
+    try:
+        response = getattr(requests, method)(url, **kwargs)
+    except Exception as e:
+        breaker_record(url, False, time.monotonic() - started, error=e)
+        raise
+    if response.status_code == 429:
+        # Throttling says nothing about the host's health: it only feeds the limiter, never the breaker
+        upstream_throttled(url, response)
+    else:
+        breaker_record(url, response.status_code < 500, time.monotonic() - started, error=f"HTTP {response.status_code}")
+    return response
+
+def upstream_get(url, **kwargs):
+    return upstream_request('get', url, **kwargs)
+
+def upstream_post(url, **kwargs):
+    return upstream_request('post', url, **kwargs)
+
+def upstream_limit_stats():
+    """Per host: rate, burst, tokens left, 429s seen, and per class request/queueing counters."""
+    with _upstream_cond:
+        return {host: {
+            'rate': bucket['rate'],
+            'burst': bucket['burst'],
+            'tokens': round(min(bucket['burst'], bucket['tokens'] + (time.monotonic() - bucket['refilledAt']) * bucket['rate']), 1),
+            'throttled': bucket['throttled'],
+            'classes': {priority: {
+                **stats,
+                'waitSeconds': round(stats['waitSeconds'], 3),
+                'maxWaitSeconds': round(stats['maxWaitSeconds'], 3),
+                'avgWaitMs': round(stats['waitSeconds'] / stats['requests'] * 1000, 1) if stats['requests'] else 0,
+            } for priority, stats in bucket['classes'].items()},
+        } for host, bucket in _upstream_buckets.items()}
+
+# ==================== CIRCUIT BREAKERS ====================
+
+# One breaker per upstream host. BREAKER_FAILURE_THRESHOLD consecutive failures (connection errors,
+# timeouts, 5xx) open it: calls then fail at once with UpstreamUnavailable instead of waiting out their
+# timeouts, and GET endpoints fall back to their last good response (see STALE FALLBACK). A call that
+# answers within its own timeout counts as healthy however long it took (paged reads legitimately
+# take tens of seconds), and a 429 counts as neither: it only feeds the limiter. After
+# BREAKER_OPEN_SECONDS a single call goes through as a half-open probe; its success closes the
+# breaker, a failure keeps it open for another period.
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_OPEN_SECONDS = float(os.environ.get('BREAKER_OPEN_SECONDS', '30'))
+
+_breaker_lock = threading.Lock()
+_breakers = {}
+
+class UpstreamUnavailable(requests.exceptions.ConnectionError):
+    """Raised instead of calling an upstream host whose circuit is open."""
+
+def upstream_breaker(host):
+    """Breaker state for a host (created closed on first use). Call with _breaker_lock held."""
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = {'state': 'closed', 'failures': 0, 'openedAt': 0.0, 'probeAt': None,
+                                     'opens': 0, 'rejected': 0, 'lastError': None}
+    return breaker
+
+def breaker_state(host):
+    """'closed', 'open' (failing fast) or 'half-open' (cooling-off over, a probe may go through)."""
+    with _breaker_lock:
+        breaker = upstream_breaker(host)
+        if breaker['state'] == 'closed':
+            return 'closed'
+        now = time.monotonic()
+        if now < breaker['openedAt'] + BREAKER_OPEN_SECONDS:
+            return 'open'
+        return 'half-open'
+
+def breaker_check(url):
+    """Let a call to url's host through, or raise UpstreamUnavailable while its circuit is open.
+    Once the cooling-off period is over, exactly one caller gets through as the probe."""
+    host = urlsplit(url).hostname or ''
+    with _breaker_lock:
+        breaker = upstream_breaker(host)
+        if breaker['state'] == 'closed':
+            return
+        now = time.monotonic()
+        cooling = now < breaker['openedAt'] + BREAKER_OPEN_SECONDS
+        probing = breaker['probeAt'] is not None and now < breaker['probeAt'] + BREAKER_OPEN_SECONDS
+        if cooling or probing:
+            breaker['rejected'] += 1
+            raise UpstreamUnavailable(f"{host} is unavailable (circuit open: {breaker['lastError']})")
+        breaker['probeAt'] = now
+
+def breaker_record(url, ok, elapsed, error=None):
+    """Feed one call's outcome (not a 429) to its host's breaker; elapsed is reported with the error."""
+    host = urlsplit(url).hostname or ''
+    with _breaker_lock:
+        breaker = upstream_breaker(host)
+        if ok:
+            if breaker['state'] != 'closed':
+                print(f"✅ {host} recovered: circuit closed")
+            breaker.update(state='closed', failures=0, probeAt=None)
+            return
+        breaker['failures'] += 1
+        breaker['lastError'] = f"{error} after {elapsed:.1f}s"
+        if breaker['state'] == 'open' or breaker['failures'] >= BREAKER_FAILURE_THRESHOLD:
+            if breaker['state'] == 'closed':
+                breaker['opens'] += 1
+                print(f"🔌 {host} circuit opened after {breaker['failures']} failures ({breaker['lastError']})")
+            breaker.update(state='open', openedAt=time.monotonic(), probeAt=None)
+
+def breaker_stats():
+    """Per host: breaker state, consecutive failures, times opened, calls rejected and the last error."""
+    states = {host: breaker_state(host) for host in list(_breakers)}
+    with _breaker_lock:
+        return {host: {
+            'state': states[host],
+            'failures': breaker['failures'],
+            'opens': breaker['opens'],
+            'rejected': breaker['rejected'],
+            'lastError': breaker['lastError'],
+        } for host, breaker in _breakers.items()}
 
 # Auto-refresh configuration
 REFRESH_INTERVAL_MINUTES = 5  # Refresh every 5 minutes
+# Scheduled jobs run on this scheduler once start_scheduler() is called. SCHEDULER_MODE 'web' (default)
+# starts it on the first request a process serves; 'worker' leaves the jobs to worker.py, with tokens and
+# warm caches shared through the snapshot store; 'off' leaves it to an explicit start_scheduler() call.
+SCHEDULER_MODE = os.environ.get('SCHEDULER_MODE', 'web')
 scheduler = BackgroundScheduler()
-scheduler.start()
-atexit.register(lambda: scheduler.shutdown())
 
 # HTML Template (same as before)
 HTML_TEMPLATE = '''
@@ -247,12 +631,24 @@ HTML_TEMPLATE = '''
                     <div class="bg-white p-2 rounded">GET /api/placements?year=YYYY&month=M - Fetch placements (minimal fields)</div>
                     <div class="bg-white p-2 rounded">GET /api/placements/detailed?year=YYYY&month=M - Fetch placements with full details (candidate, job, client, owner)</div>
                     <div class="bg-white p-2 rounded">GET /api/jobs/detailed?start=YYYY-MM-DD&end=YYYY-MM-DD - Fetch JobOrder records (title, status, client, owner)</div>
+                    <div class="bg-white p-2 rounded">Detailed endpoints accept owner, status, client (jobs: open=open|closed), sort=-dateAdded|ownerName|..., page and limit; responses include total and facets</div>
                     <div class="bg-white p-2 rounded">GET /api/analytics/weekly?year=YYYY&month=M - Weekly analytics with recruiter breakdown</div>
                     <div class="bg-white p-2 rounded">GET /api/analytics/monthly?year=YYYY&month=M - Monthly analytics with recruiter breakdown</div>
                     <div class="bg-white p-2 rounded">GET /api/analytics/recruiters?year=YYYY&month=M - Recruiter leaderboard</div>
+                    <div class="bg-white p-2 rounded">GET /api/analytics/summary?start=YYYY-MM-DD&end=YYYY-MM-DD&owner=ID - Dashboard stats and weekly series (computed server-side)</div>
+                    <div class="bg-white p-2 rounded">GET /api/analytics/kpis?start=YYYY-MM-DD&end=YYYY-MM-DD&owner=ID,ID - Top-line counts from Bullhorn totals (no row download)</div>
+                    <div class="bg-white p-2 rounded">GET /api/analytics/timeseries?start=YYYY-MM-DD&end=YYYY-MM-DD&granularity=day|week|month|quarter&metrics=submissions,placements,booked - Counts per calendar bucket</div>
+                    <div class="bg-white p-2 rounded">GET /api/analytics/cohorts?start=YYYY-MM-DD&end=YYYY-MM-DD&granularity=month&owner=ID - Submission cohorts: conversion, booked rate, time-to-placement</div>
+                    <div class="bg-white p-2 rounded">POST /api/batch {"queries": [{"id", "type": "summary|recruiters|weekly|...", ...args}]} - Several queries in one round-trip (shared upstream fetches)</div>
                     <div class="bg-white p-2 rounded">GET /api/meta/JobSubmission - All queryable JobSubmission fields</div>
                     <div class="bg-white p-2 rounded">GET /api/meta/Placement - All queryable Placement fields</div>
                     <div class="bg-white p-2 rounded">POST /api/refresh - Manually refresh tokens</div>
+                    <div class="bg-white p-2 rounded">POST /api/cache/warm - Warm analytics caches for the configured and most-requested ranges</div>
+                    <div class="bg-white p-2 rounded">POST /api/cache/snapshot - Save the warm-restart snapshot of tokens and hot caches</div>
+                    <div class="bg-white p-2 rounded">GET /api/tasks/&lt;id&gt; - Progress of a queued sync or push (phase, rows, throughput, errors)</div>
+                    <div class="bg-white p-2 rounded">GET /api/sync/runs - Sync journal: checkpointed runs and where an interrupted one will resume</div>
+                    <div class="bg-white p-2 rounded">GET /api/upstream - Upstream rate limiters and circuit breakers per host</div>
+                    <div class="bg-white p-2 rounded">POST /api/supabase/compact - Close vanished jobs and archive old closed rows (runs as a task)</div>
                     <div class="bg-white p-2 rounded">GET /api/status - Check session status</div>
                 </div>
             </div>
@@ -361,9 +757,13 @@ ANALYTICS_TEMPLATE = '''
             );
         }
 
+        const EMPTY_STATS = { totalSubmissions: 0, totalPlacements: 0, totalBooked: 0, totalCancelled: 0, totalEverBooked: 0, conversionRate: 0, cancelledShare: null };
+        const EMPTY_FACETS = { owner: [], status: [], client: [], open: [] };
+        const DETAILED_PAGE_SIZE = 100;
+
         function AnalyticsDashboard() {
-            const [submissions, setSubmissions] = useState([]);
-            const [placements, setPlacements] = useState([]);
+            // At a glance: stats, weekly series and owner list computed by /api/analytics/summary
+            const [summary, setSummary] = useState({ stats: EMPTY_STATS, chartData: [], owners: [] });
             const [loading, setLoading] = useState(true);
             const [error, setError] = useState(null);
             
@@ -376,7 +776,7 @@ ANALYTICS_TEMPLATE = '''
             // Detailed submissions data
             const [detailedSubmissions, setDetailedSubmissions] = useState([]);
             
-            // Quick filters for Detailed view (client-side)
+            // Quick filters for Detailed view (resolved server-side)
             const [filterOwner, setFilterOwner] = useState('');
             const [filterStatus, setFilterStatus] = useState('');
             
@@ -391,6 +791,12 @@ ANALYTICS_TEMPLATE = '''
             const [filterJobStatus, setFilterJobStatus] = useState('');
             const [filterJobOpenClosed, setFilterJobOpenClosed] = useState('');
             
+            // Detailed views share paging and the server-provided total/facets
+            const [detailedPage, setDetailedPage] = useState(1);
+            const [detailedTotal, setDetailedTotal] = useState(0);
+            const [detailedAvailable, setDetailedAvailable] = useState(0);
+            const [detailedFacets, setDetailedFacets] = useState(EMPTY_FACETS);
+            
             // Basic view: filter by submission owner (submitter)
             const [filterBasicOwner, setFilterBasicOwner] = useState('');
             
@@ -437,49 +843,23 @@ ANALYTICS_TEMPLATE = '''
                 return { start: startDate || '2020-01-01', end: endDate || '2030-12-31' };
             }, [periodType, year, month, weekDate, startDate, endDate]);
             
-            // Fetch basic data (existing). When owner selected, submissions use start − EXTENDED_SUBMISSIONS_MONTHS for owner–placement linkage.
+            // Fetch basic data: the server applies the status classification, owner linkage and week bucketing.
             const fetchBasicData = async () => {
                 setLoading(true);
                 setError(null);
                 try {
                     var r = dateRange;
-                    var subsStart = r.start, subsEnd = r.end;
-                    if (filterBasicOwner) {
-                        var d = new Date(r.start + 'T12:00:00');
-                        d.setMonth(d.getMonth() - EXTENDED_SUBMISSIONS_MONTHS);
-                        subsStart = d.getFullYear() + '-' + String(d.getMonth() + 1).padStart(2, '0') + '-' + String(d.getDate()).padStart(2, '0');
-                    }
-                    console.log('Fetching data for', r.start, 'to', r.end);
-                    var subsUrl = '/api/submissions?start=' + encodeURIComponent(subsStart) + '&end=' + encodeURIComponent(subsEnd);
-                    if (filterBasicOwner) subsUrl += '&count=2000';
-                    const [subsRes, placeRes] = await Promise.all([
-                        fetch(subsUrl),
-                        fetch('/api/placements?start=' + encodeURIComponent(r.start) + '&end=' + encodeURIComponent(r.end))
-                    ]);
-                    
-                    console.log('Submissions response:', subsRes.status, subsRes.ok);
-                    console.log('Placements response:', placeRes.status, placeRes.ok);
-                    
-                    if (!subsRes.ok) {
-                        const errorText = await subsRes.text();
-                        console.error('Submissions error:', errorText);
-                        throw new Error(`Submissions API error: ${subsRes.status} - ${errorText.substring(0, 100)}`);
+                    var url = '/api/analytics/summary?start=' + encodeURIComponent(r.start) + '&end=' + encodeURIComponent(r.end);
+                    if (filterBasicOwner) url += '&owner=' + encodeURIComponent(filterBasicOwner);
+                    console.log('Fetching summary for', r.start, 'to', r.end);
+                    const res = await fetch(url);
+                    if (!res.ok) {
+                        const errorText = await res.text();
+                        console.error('Summary error:', errorText);
+                        throw new Error(`Summary API error: ${res.status} - ${errorText.substring(0, 100)}`);
                     }
-                    
-                    if (!placeRes.ok) {
-                        const errorText = await placeRes.text();
-                        console.error('Placements error:', errorText);
-                        throw new Error(`Placements API error: ${placeRes.status} - ${errorText.substring(0, 100)}`);
-                    }
-                    
-                    const subsData = await subsRes.json();
-                    const placeData = await placeRes.json();
-                    
-                    console.log('Submissions data:', subsData.count || 0, 'items');
-                    console.log('Placements data:', placeData.count || 0, 'items');
-                    
-                    setSubmissions(subsData.data || []);
-                    setPlacements(placeData.data || []);
+                    const data = await res.json();
+                    setSummary({ stats: data.stats || EMPTY_STATS, chartData: data.chartData || [], owners: data.owners || [] });
                 } catch (err) {
                     console.error('Fetch error:', err);
                     setError(err.message || 'Failed to fetch data');
@@ -488,6 +868,16 @@ ANALYTICS_TEMPLATE = '''
                 }
             };
             
+            // Filter params (owner/status/open) for the active detailed view
+            const detailedFilterParams = function() {
+                var p = '';
+                function add(k, v) { if (v) p += '&' + k + '=' + encodeURIComponent(v); }
+                if (viewMode === 'detailed') { add('owner', filterOwner); add('status', filterStatus); }
+                else if (viewMode === 'detailed_placements') { add('owner', filterPlacementOwner); add('status', filterPlacementStatus); }
+                else if (viewMode === 'jobs') { add('owner', filterJobOwner); add('status', filterJobStatus); add('open', filterJobOpenClosed); }
+                return p;
+            };
+            
             // Fetch analytics data
             const fetchAnalyticsData = async () => {
                 setLoading(true);
@@ -504,28 +894,37 @@ ANALYTICS_TEMPLATE = '''
                             throw new Error('Failed to fetch recruiter data');
                         }
                     } else if (viewMode === 'detailed') {
-                        const res = await fetch('/api/submissions/detailed?' + q);
+                        const res = await fetch('/api/submissions/detailed?' + q + detailedFilterParams() + '&page=' + detailedPage + '&limit=' + DETAILED_PAGE_SIZE);
                         if (res.ok) {
                             const data = await res.json();
                             setDetailedSubmissions(data.data || []);
+                            setDetailedTotal(data.total || 0);
+                            setDetailedAvailable(data.available || 0);
+                            setDetailedFacets(data.facets || EMPTY_FACETS);
                         } else {
                             const errorText = await res.text();
                             throw new Error('Failed to fetch detailed submissions: ' + errorText.substring(0, 100));
                         }
                     } else if (viewMode === 'detailed_placements') {
-                        const res = await fetch('/api/placements/detailed?' + q);
+                        const res = await fetch('/api/placements/detailed?' + q + detailedFilterParams() + '&page=' + detailedPage + '&limit=' + DETAILED_PAGE_SIZE);
                         if (res.ok) {
                             const data = await res.json();
                             setDetailedPlacements(data.data || []);
+                            setDetailedTotal(data.total || 0);
+                            setDetailedAvailable(data.available || 0);
+                            setDetailedFacets(data.facets || EMPTY_FACETS);
                         } else {
                             const errorText = await res.text();
                             throw new Error('Failed to fetch detailed placements: ' + errorText.substring(0, 100));
                         }
                     } else if (viewMode === 'jobs') {
-                        const res = await fetch('/api/jobs/detailed?' + q);
+                        const res = await fetch('/api/jobs/detailed?' + q + detailedFilterParams() + '&page=' + detailedPage + '&limit=' + DETAILED_PAGE_SIZE);
                         if (res.ok) {
                             const data = await res.json();
                             setDetailedJobs(data.data || []);
+                            setDetailedTotal(data.total || 0);
+                            setDetailedAvailable(data.available || 0);
+                            setDetailedFacets(data.facets || EMPTY_FACETS);
                         } else {
                             const errorText = await res.text();
                             throw new Error('Failed to fetch detailed jobs: ' + errorText.substring(0, 100));
@@ -549,117 +948,16 @@ ANALYTICS_TEMPLATE = '''
             useEffect(function(){
                 if (viewMode === 'basic') fetchBasicData();
                 else fetchAnalyticsData();
-            }, [dateRange.start, dateRange.end, viewMode, filterBasicOwner]);
-            
-            // Stats (id, dateAdded; placements have status). Booked = Requested Credentialing, Credentialed, On assignment, Assignment completed.
-            const EXTENDED_SUBMISSIONS_MONTHS = 12;
-            const BOOKED_STATUSES = ['requested credentialing', 'credentialed', 'on assignment', 'assignment completed'];
-            const isBooked = (p) => {
-                const s = String(p.status || '').toLowerCase().replace(/\\s+/g, ' ').trim();
-                return BOOKED_STATUSES.indexOf(s) >= 0;
-            };
-            const CANCELLED_STATUSES = ['provider cancelled', 'concord cancelled', 'client cancelled', 'credentialing cancelled'];
-            const isCancelled = (p) => {
-                const s = String(p.status || '').toLowerCase().replace(/\\s+/g, ' ').trim();
-                return CANCELLED_STATUSES.indexOf(s) >= 0;
-            };
-            // Submissions whose dateAdded falls in the user-selected range (needed when submissions response is extended for owner linkage).
-            const submissionsInRange = useMemo(() => {
-                var startMs = new Date(dateRange.start + 'T00:00:00').getTime();
-                var endMs = new Date(dateRange.end + 'T23:59:59.999').getTime();
-                return submissions.filter(function(sub){ var t = sub.dateAdded; return t != null && t >= startMs && t <= endMs; });
-            }, [submissions, dateRange.start, dateRange.end]);
-            // Basic: unique owners from submissions (submitter = sendingUser)
-            const basicOwnerList = useMemo(() => {
-                const m = new Map();
-                submissionsInRange.forEach(function(sub){
-                    var u = sub.sendingUser;
-                    if (!u || u.id == null) return;
-                    var name = (String(u.firstName || '') + ' ' + String(u.lastName || '')).trim() || 'Unknown';
-                    m.set(String(u.id), name);
-                });
-                return Array.from(m.entries()).map(function(kv){ return { id: kv[0], name: kv[1] }; }).sort(function(a,b){ return a.name.localeCompare(b.name); });
-            }, [submissionsInRange]);
-            // (candidateId,jobId) pairs for selected owner: one candidate to multiple jobs = separate entries, each counts as one book.
-            // Only placements whose (candidate, job) was submitted by this owner are included when filtered.
-            const ownerCandidateJobSet = useMemo(() => {
-                if (!filterBasicOwner) return null;
-                var s = new Set();
-                submissions.forEach(function(sub){
-                    if (!sub.sendingUser || String(sub.sendingUser.id) !== String(filterBasicOwner)) return;
-                    var cid = sub.candidate && sub.candidate.id;
-                    var jid = sub.jobOrder && sub.jobOrder.id;
-                    if (cid != null && jid != null) s.add(String(cid) + ',' + String(jid));
-                });
-                return s;
-            }, [submissions, filterBasicOwner]);
-            const filteredSubmissions = useMemo(() => {
-                if (!filterBasicOwner) return submissionsInRange;
-                return submissionsInRange.filter(function(sub){ return sub.sendingUser && String(sub.sendingUser.id) === String(filterBasicOwner); });
-            }, [submissionsInRange, filterBasicOwner]);
-            // Placements: include only (candidate, job) pairs that this owner submitted. Candidate+job = one placement/book.
-            const filteredPlacements = useMemo(() => {
-                if (!filterBasicOwner || !ownerCandidateJobSet) return placements;
-                return placements.filter(function(pl){
-                    var cid = pl.candidate && pl.candidate.id;
-                    var jid = pl.jobOrder && pl.jobOrder.id;
-                    if (cid == null || jid == null) return false;
-                    return ownerCandidateJobSet.has(String(cid) + ',' + String(jid));
-                });
-            }, [placements, filterBasicOwner, ownerCandidateJobSet]);
-            const stats = useMemo(() => {
-                const totalSubmissions = filteredSubmissions.length;
-                const totalPlacements = filteredPlacements.length;
-                const totalBooked = filteredPlacements.filter(isBooked).length;
-                const totalCancelled = filteredPlacements.filter(isCancelled).length;
-                const totalEverBooked = totalBooked + totalCancelled;
-                const conversionRate = totalSubmissions > 0 ? (totalBooked / totalSubmissions * 100).toFixed(1) : 0;
-                const cancelledShare = totalEverBooked > 0 ? (totalCancelled / totalEverBooked * 100) : null;
-                return {
-                    totalSubmissions,
-                    totalPlacements,
-                    totalBooked,
-                    totalCancelled,
-                    totalEverBooked,
-                    conversionRate: parseFloat(conversionRate),
-                    cancelledShare
-                };
-            }, [filteredSubmissions, filteredPlacements]);
+            }, [dateRange.start, dateRange.end, viewMode, filterBasicOwner, detailedPage,
+                filterOwner, filterStatus, filterPlacementOwner, filterPlacementStatus, filterJobOwner, filterJobStatus, filterJobOpenClosed]);
             
-            // Chart data: By Week only (we have dateAdded)
-            const getWeekNumber = (dateMs) => {
-                const date = new Date(dateMs);
-                const d = new Date(Date.UTC(date.getFullYear(), date.getMonth(), date.getDate()));
-                const dayNum = d.getUTCDay() || 7;
-                d.setUTCDate(d.getUTCDate() + 4 - dayNum);
-                const yearStart = new Date(Date.UTC(d.getUTCFullYear(), 0, 1));
-                return Math.ceil((((d - yearStart) / 86400000) + 1) / 7);
-            };
+            // New range or view starts from the first page
+            useEffect(function(){ setDetailedPage(1); }, [dateRange.start, dateRange.end, viewMode]);
             
-            const chartData = useMemo(() => {
-                const weekMap = new Map();
-                filteredSubmissions.forEach(sub => {
-                    if (!sub.dateAdded) return;
-                    const week = getWeekNumber(sub.dateAdded);
-                    const key = `Week ${week}`;
-                    if (!weekMap.has(key)) weekMap.set(key, { name: key, submissions: 0, placements: 0, booked: 0, cancelled: 0 });
-                    weekMap.get(key).submissions++;
-                });
-                filteredPlacements.forEach(place => {
-                    if (!place.dateAdded) return;
-                    const week = getWeekNumber(place.dateAdded);
-                    const key = `Week ${week}`;
-                    if (!weekMap.has(key)) weekMap.set(key, { name: key, submissions: 0, placements: 0, booked: 0, cancelled: 0 });
-                    weekMap.get(key).placements++;
-                    if (isBooked(place)) weekMap.get(key).booked++;
-                    if (isCancelled(place)) weekMap.get(key).cancelled++;
-                });
-                return Array.from(weekMap.values()).sort((a, b) => {
-                    const weekA = parseInt(a.name.replace('Week ', ''), 10);
-                    const weekB = parseInt(b.name.replace('Week ', ''), 10);
-                    return weekA - weekB;
-                });
-            }, [filteredSubmissions, filteredPlacements]);
+            // Stats and chart data come ready-made from the server (see STATUS_CLASSIFICATION in app.py).
+            const stats = summary.stats;
+            const chartData = summary.chartData;
+            const basicOwnerList = summary.owners;
             
             // Export CSV (by-week data)
             const exportCSV = () => {
@@ -687,69 +985,41 @@ ANALYTICS_TEMPLATE = '''
                 return 'text-green-600 font-semibold';
             };
             
-            // Detailed: unique owners/statuses and filtered list
-            const detailedMeta = useMemo(function(){
-                var owners = [], statuses = [];
-                detailedSubmissions.forEach(function(s){
-                    // #region agent log
-                    var oRaw = s.ownerName, tRaw = s.status;
-                    if (typeof oRaw !== 'string' || typeof tRaw !== 'string') {
-                        fetch('http://127.0.0.1:7242/ingest/17a4d052-773d-4fbd-aff1-ea318feaa11e',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({location:'detailedMeta:nonString',message:'owner or status not string',data:{ownerType:typeof oRaw,ownerVal:oRaw,statusType:typeof tRaw,statusVal:tRaw},timestamp:Date.now(),sessionId:'debug-session',hypothesisId:'A'})}).catch(function(){});
-                    }
-                    // #endregion
-                    var o = String(oRaw != null ? oRaw : '').trim();
-                    var t = String(tRaw != null ? tRaw : '').trim();
-                    if (o && owners.indexOf(o) < 0) owners.push(o);
-                    if (t && statuses.indexOf(t) < 0) statuses.push(t);
-                });
-                owners.sort(); statuses.sort();
-                return { owners: owners, statuses: statuses };
-            }, [detailedSubmissions]);
-            const filteredDetailed = useMemo(function(){
-                var l = detailedSubmissions;
-                if (filterOwner) l = l.filter(function(s){ return String(s.ownerName != null ? s.ownerName : '').toLowerCase().indexOf(filterOwner.toLowerCase()) >= 0; });
-                if (filterStatus) l = l.filter(function(s){ return String(s.status != null ? s.status : '') === filterStatus; });
-                return l;
-            }, [detailedSubmissions, filterOwner, filterStatus]);
+            // Detailed: owner/status dropdowns come from server facets; rows are already filtered and paged
+            const facetValues = function(name) { return (detailedFacets[name] || []).map(function(f){ return f.value; }); };
+            const facetCount = function(name, value) { var f = (detailedFacets[name] || []).find(function(x){ return x.value === value; }); return f ? f.count : 0; };
+            const detailedPageCount = Math.max(1, Math.ceil(detailedTotal / DETAILED_PAGE_SIZE));
             
-            // Detailed placements: unique owners/statuses and filtered list
-            const detailedPlacementsMeta = useMemo(function(){
-                var owners = [], statuses = [];
-                detailedPlacements.forEach(function(p){
-                    var o = String(p.ownerName != null ? p.ownerName : '').trim();
-                    var t = String(p.status != null ? p.status : '').trim();
-                    if (o && owners.indexOf(o) < 0) owners.push(o);
-                    if (t && statuses.indexOf(t) < 0) statuses.push(t);
-                });
-                owners.sort(); statuses.sort();
-                return { owners: owners, statuses: statuses };
-            }, [detailedPlacements]);
-            const filteredDetailedPlacements = useMemo(function(){
-                var l = detailedPlacements;
-                if (filterPlacementOwner) l = l.filter(function(p){ return String(p.ownerName != null ? p.ownerName : '').toLowerCase().indexOf(filterPlacementOwner.toLowerCase()) >= 0; });
-                if (filterPlacementStatus) l = l.filter(function(p){ return String(p.status != null ? p.status : '') === filterPlacementStatus; });
-                return l;
-            }, [detailedPlacements, filterPlacementOwner, filterPlacementStatus]);
+            // Export the full filtered set (all pages) for a detailed view
+            const exportDetailedCSV = async function(path, filename, header, toRow) {
+                try {
+                    const res = await fetch(path + '?start=' + encodeURIComponent(dateRange.start) + '&end=' + encodeURIComponent(dateRange.end) + detailedFilterParams());
+                    const data = await res.json();
+                    if (!res.ok) throw new Error(data.error || 'Export failed');
+                    var rows = [header];
+                    (data.data || []).forEach(function(x){ rows.push(toRow(x)); });
+                    var csv = rows.map(function(row){ return row.map(function(c){ return '"' + (c || '').replace(/"/g, '""') + '"'; }).join(','); }).join('\\n');
+                    var blob = new Blob([csv], { type: 'text/csv' });
+                    var url = window.URL.createObjectURL(blob);
+                    var a = document.createElement('a');
+                    a.href = url;
+                    a.download = filename + '_' + dateRange.start + '_' + dateRange.end + '.csv';
+                    a.click();
+                    window.URL.revokeObjectURL(url);
+                } catch (err) {
+                    setError(err.message || 'Export failed');
+                }
+            };
             
-            const detailedJobsMeta = useMemo(function(){
-                var owners = [], statuses = [];
-                detailedJobs.forEach(function(j){
-                    var o = String(j.ownerName != null ? j.ownerName : '').trim();
-                    var s = String(j.status != null ? j.status : '').trim();
-                    if (o && owners.indexOf(o) < 0) owners.push(o);
-                    if (s && statuses.indexOf(s) < 0) statuses.push(s);
-                });
-                owners.sort(); statuses.sort();
-                return { owners: owners, statuses: statuses };
-            }, [detailedJobs]);
-            const filteredDetailedJobs = useMemo(function(){
-                var l = detailedJobs;
-                if (filterJobOwner) l = l.filter(function(j){ return String(j.ownerName != null ? j.ownerName : '').toLowerCase().indexOf(filterJobOwner.toLowerCase()) >= 0; });
-                if (filterJobStatus) l = l.filter(function(j){ return String(j.status != null ? j.status : '') === filterJobStatus; });
-                if (filterJobOpenClosed === 'open') l = l.filter(function(j){ return j.isOpen === true || j.isOpen === 1; });
-                if (filterJobOpenClosed === 'closed') l = l.filter(function(j){ return j.isOpen === false || j.isOpen === 0; });
-                return l;
-            }, [detailedJobs, filterJobOwner, filterJobStatus, filterJobOpenClosed]);
+            const pager = (
+                <div className="flex items-center justify-end gap-3 mt-3 text-sm text-slate-600">
+                    <button type="button" disabled={detailedPage <= 1} onClick={() => setDetailedPage(detailedPage - 1)}
+                        className="px-3 py-1.5 border border-slate-300 rounded-md disabled:opacity-40 hover:bg-slate-50">Prev</button>
+                    <span>Page {detailedPage} of {detailedPageCount}</span>
+                    <button type="button" disabled={detailedPage >= detailedPageCount} onClick={() => setDetailedPage(detailedPage + 1)}
+                        className="px-3 py-1.5 border border-slate-300 rounded-md disabled:opacity-40 hover:bg-slate-50">Next</button>
+                </div>
+            );
             
             return (
                 <div className="max-w-7xl mx-auto">
@@ -784,38 +1054,14 @@ ANALYTICS_TEMPLATE = '''
                                                 a.click();
                                                 window.URL.revokeObjectURL(url);
                                             } else if (viewMode === 'detailed') {
-                                                var rows = [['ID', 'Date', 'Candidate', 'Job Title', 'Client', 'Status', 'Owner']];
-                                                filteredDetailed.forEach(function(s){ rows.push([String(s.id || ''), s.dateFormatted || '', s.candidateName || '', s.jobTitle || '', s.clientName || '', s.status || '', s.ownerName || '']); });
-                                                var csv = rows.map(function(row){ return row.map(function(c){ return '"' + (c || '').replace(/"/g, '""') + '"'; }).join(','); }).join('\\n');
-                                                var blob = new Blob([csv], { type: 'text/csv' });
-                                                var url = window.URL.createObjectURL(blob);
-                                                var a = document.createElement('a');
-                                                a.href = url;
-                                                a.download = 'detailed_submissions_' + dateRange.start + '_' + dateRange.end + '.csv';
-                                                a.click();
-                                                window.URL.revokeObjectURL(url);
+                                                exportDetailedCSV('/api/submissions/detailed', 'detailed_submissions', ['ID', 'Date', 'Candidate', 'Job Title', 'Client', 'Status', 'Owner'],
+                                                    function(s){ return [String(s.id || ''), s.dateFormatted || '', s.candidateName || '', s.jobTitle || '', s.clientName || '', s.status || '', s.ownerName || '']; });
                                             } else if (viewMode === 'detailed_placements') {
-                                                var rows = [['ID', 'Date', 'Candidate', 'Job Title', 'Client', 'Status', 'Owner']];
-                                                filteredDetailedPlacements.forEach(function(p){ rows.push([String(p.id || ''), p.dateFormatted || '', p.candidateName || '', p.jobTitle || '', p.clientName || '', p.status || '', p.ownerName || '']); });
-                                                var csv = rows.map(function(row){ return row.map(function(c){ return '"' + (c || '').replace(/"/g, '""') + '"'; }).join(','); }).join('\\n');
-                                                var blob = new Blob([csv], { type: 'text/csv' });
-                                                var url = window.URL.createObjectURL(blob);
-                                                var a = document.createElement('a');
-                                                a.href = url;
-                                                a.download = 'detailed_placements_' + dateRange.start + '_' + dateRange.end + '.csv';
-                                                a.click();
-                                                window.URL.revokeObjectURL(url);
+                                                exportDetailedCSV('/api/placements/detailed', 'detailed_placements', ['ID', 'Date', 'Candidate', 'Job Title', 'Client', 'Status', 'Owner'],
+                                                    function(p){ return [String(p.id || ''), p.dateFormatted || '', p.candidateName || '', p.jobTitle || '', p.clientName || '', p.status || '', p.ownerName || '']; });
                                             } else if (viewMode === 'jobs') {
-                                                var rows = [['ID', 'Date', 'Job Title', 'Client', 'Status', 'Open/Closed', 'Owner']];
-                                                filteredDetailedJobs.forEach(function(j){ rows.push([String(j.id || ''), j.dateFormatted || '', j.title || '', j.clientName || '', j.status || '', (j.isOpen === true || j.isOpen === 1) ? 'Open' : 'Closed', j.ownerName || '']); });
-                                                var csv = rows.map(function(row){ return row.map(function(c){ return '"' + (c || '').replace(/"/g, '""') + '"'; }).join(','); }).join('\\n');
-                                                var blob = new Blob([csv], { type: 'text/csv' });
-                                                var url = window.URL.createObjectURL(blob);
-                                                var a = document.createElement('a');
-                                                a.href = url;
-                                                a.download = 'jobs_' + dateRange.start + '_' + dateRange.end + '.csv';
-                                                a.click();
-                                                window.URL.revokeObjectURL(url);
+                                                exportDetailedCSV('/api/jobs/detailed', 'jobs', ['ID', 'Date', 'Job Title', 'Client', 'Status', 'Open/Closed', 'Owner'],
+                                                    function(j){ return [String(j.id || ''), j.dateFormatted || '', j.title || '', j.clientName || '', j.status || '', (j.isOpen === true || j.isOpen === 1) ? 'Open' : 'Closed', j.ownerName || '']; });
                                             } else if (viewMode === 'notes_by_user') {
                                                 var rows = [['User', 'Notes added']];
                                                 notesByUserData.forEach(function(row){ rows.push([(row.name || '').replace(/"/g, '""'), String(row.noteCount || 0)]); });
@@ -1154,22 +1400,22 @@ ANALYTICS_TEMPLATE = '''
                                                     <h3 className="text-base font-semibold text-slate-800">Detailed Submissions</h3>
                                                     <p className="text-sm text-slate-600">Candidate, job, status, and owner</p>
                                                 </div>
-                                                <div className="text-lg font-semibold text-slate-700">{filteredDetailed.length} records</div>
+                                                <div className="text-lg font-semibold text-slate-700">{detailedTotal} records</div>
                                             </div>
                                             <div className="mt-3 flex flex-wrap gap-3 items-center">
                                                 <span className="text-sm font-medium text-slate-600">Filters</span>
-                                                <select value={filterOwner} onChange={(e) => setFilterOwner(e.target.value)}
+                                                <select value={filterOwner} onChange={(e) => { setFilterOwner(e.target.value); setDetailedPage(1); }}
                                                     className="px-3 py-1.5 border border-slate-300 rounded-md text-sm focus:ring-2 focus:ring-slate-400 focus:border-slate-400">
                                                     <option value="">All owners</option>
-                                                    {detailedMeta.owners.map(function(o){ return <option key={o} value={o}>{o}</option>; })}
+                                                    {facetValues('owner').map(function(o){ return <option key={o} value={o}>{o}</option>; })}
                                                 </select>
-                                                <select value={filterStatus} onChange={(e) => setFilterStatus(e.target.value)}
+                                                <select value={filterStatus} onChange={(e) => { setFilterStatus(e.target.value); setDetailedPage(1); }}
                                                     className="px-3 py-1.5 border border-slate-300 rounded-md text-sm focus:ring-2 focus:ring-slate-400 focus:border-slate-400">
                                                     <option value="">All statuses</option>
-                                                    {detailedMeta.statuses.map(function(s){ return <option key={s} value={s}>{s}</option>; })}
+                                                    {facetValues('status').map(function(s){ return <option key={s} value={s}>{s}</option>; })}
                                                 </select>
                                                 {(filterOwner || filterStatus) && (
-                                                    <button type="button" onClick={() => { setFilterOwner(''); setFilterStatus(''); }}
+                                                    <button type="button" onClick={() => { setFilterOwner(''); setFilterStatus(''); setDetailedPage(1); }}
                                                         className="text-sm text-slate-600 hover:text-slate-800">Clear</button>
                                                 )}
                                             </div>
@@ -1190,14 +1436,14 @@ ANALYTICS_TEMPLATE = '''
                                                         </tr>
                                                     </thead>
                                                     <tbody>
-                                                        {filteredDetailed.length === 0 ? (
+                                                        {detailedSubmissions.length === 0 ? (
                                                             <tr>
                                                                 <td colSpan="7" className="text-center py-12 text-slate-500 text-sm">
-                                                                    {detailedSubmissions.length === 0 ? 'No submissions for this period' : 'No rows match the filters'}
+                                                                    {detailedAvailable === 0 ? 'No submissions for this period' : 'No rows match the filters'}
                                                                 </td>
                                                             </tr>
                                                         ) : (
-                                                            filteredDetailed.map((sub, idx) => {
+                                                            detailedSubmissions.map((sub, idx) => {
                                                                 const statusColor = {
                                                                     'Submitted': 'bg-slate-100 text-slate-700',
                                                                     'Presented': 'bg-amber-50 text-amber-800',
@@ -1229,6 +1475,7 @@ ANALYTICS_TEMPLATE = '''
                                                     </tbody>
                                                 </table>
                                             </div>
+                                            {pager}
                                         </div>
                                     </>
                                 )}
@@ -1242,22 +1489,22 @@ ANALYTICS_TEMPLATE = '''
                                                     <h3 className="text-base font-semibold text-slate-800">Detailed Placements</h3>
                                                     <p className="text-sm text-slate-600">Candidate, job, status, and owner</p>
                                                 </div>
-                                                <div className="text-lg font-semibold text-slate-700">{filteredDetailedPlacements.length} records</div>
+                                                <div className="text-lg font-semibold text-slate-700">{detailedTotal} records</div>
                                             </div>
                                             <div className="mt-3 flex flex-wrap gap-3 items-center">
                                                 <span className="text-sm font-medium text-slate-600">Filters</span>
-                                                <select value={filterPlacementOwner} onChange={(e) => setFilterPlacementOwner(e.target.value)}
+                                                <select value={filterPlacementOwner} onChange={(e) => { setFilterPlacementOwner(e.target.value); setDetailedPage(1); }}
                                                     className="px-3 py-1.5 border border-slate-300 rounded-md text-sm focus:ring-2 focus:ring-slate-400 focus:border-slate-400">
                                                     <option value="">All owners</option>
-                                                    {detailedPlacementsMeta.owners.map(function(o){ return <option key={o} value={o}>{o}</option>; })}
+                                                    {facetValues('owner').map(function(o){ return <option key={o} value={o}>{o}</option>; })}
                                                 </select>
-                                                <select value={filterPlacementStatus} onChange={(e) => setFilterPlacementStatus(e.target.value)}
+                                                <select value={filterPlacementStatus} onChange={(e) => { setFilterPlacementStatus(e.target.value); setDetailedPage(1); }}
                                                     className="px-3 py-1.5 border border-slate-300 rounded-md text-sm focus:ring-2 focus:ring-slate-400 focus:border-slate-400">
                                                     <option value="">All statuses</option>
-                                                    {detailedPlacementsMeta.statuses.map(function(s){ return <option key={s} value={s}>{s}</option>; })}
+                                                    {facetValues('status').map(function(s){ return <option key={s} value={s}>{s}</option>; })}
                                                 </select>
                                                 {(filterPlacementOwner || filterPlacementStatus) && (
-                                                    <button type="button" onClick={() => { setFilterPlacementOwner(''); setFilterPlacementStatus(''); }}
+                                                    <button type="button" onClick={() => { setFilterPlacementOwner(''); setFilterPlacementStatus(''); setDetailedPage(1); }}
                                                         className="text-sm text-slate-600 hover:text-slate-800">Clear</button>
                                                 )}
                                             </div>
@@ -1278,14 +1525,14 @@ ANALYTICS_TEMPLATE = '''
                                                         </tr>
                                                     </thead>
                                                     <tbody>
-                                                        {filteredDetailedPlacements.length === 0 ? (
+                                                        {detailedPlacements.length === 0 ? (
                                                             <tr>
                                                                 <td colSpan="7" className="text-center py-12 text-slate-500 text-sm">
-                                                                    {detailedPlacements.length === 0 ? 'No placements for this period' : 'No rows match the filters'}
+                                                                    {detailedAvailable === 0 ? 'No placements for this period' : 'No rows match the filters'}
                                                                 </td>
                                                             </tr>
                                                         ) : (
-                                                            filteredDetailedPlacements.map((plc, idx) => {
+                                                            detailedPlacements.map((plc, idx) => {
                                                                 const statusColor = {
                                                                     'Approved': 'bg-emerald-50 text-emerald-800',
                                                                     'Active': 'bg-slate-100 text-slate-700',
@@ -1314,6 +1561,7 @@ ANALYTICS_TEMPLATE = '''
                                                     </tbody>
                                                 </table>
                                             </div>
+                                            {pager}
                                         </div>
                                     </>
                                 )}
@@ -1327,38 +1575,36 @@ ANALYTICS_TEMPLATE = '''
                                                     <h3 className="text-base font-semibold text-slate-800">Detailed Jobs</h3>
                                                     <p className="text-sm text-slate-600">Job order, client, status, owner</p>
                                                 </div>
-                                                <div className="text-lg font-semibold text-slate-700">{filteredDetailedJobs.length} records</div>
+                                                <div className="text-lg font-semibold text-slate-700">{detailedTotal} records</div>
                                             </div>
                                             <div className="mt-3 text-sm text-slate-600">
-                                                Total Jobs: {detailedJobs.length} &nbsp;|&nbsp; Open: {detailedJobs.filter(function(j){ return j.isOpen === true || j.isOpen === 1; }).length} &nbsp;|&nbsp; Closed: {detailedJobs.filter(function(j){ return j.isOpen === false || j.isOpen === 0; }).length}
+                                                Total Jobs: {detailedAvailable} &nbsp;|&nbsp; Open: {facetCount('open', 'open')} &nbsp;|&nbsp; Closed: {facetCount('open', 'closed')}
                                                 {(() => {
-                                                    var statusCounts = {};
-                                                    detailedJobs.forEach(function(j){ var s = String(j.status || '').trim() || 'Unknown'; statusCounts[s] = (statusCounts[s]||0)+1; });
-                                                    var top5 = Object.entries(statusCounts).sort(function(a,b){ return b[1]-a[1]; }).slice(0,5);
-                                                    if (top5.length) return <span> &nbsp;|&nbsp; Top: {top5.map(function(x){ return x[0] + ' (' + x[1] + ')'; }).join(', ')}</span>;
+                                                    var top5 = (detailedFacets.status || []).slice().sort(function(a,b){ return b.count - a.count; }).slice(0,5);
+                                                    if (top5.length) return <span> &nbsp;|&nbsp; Top: {top5.map(function(x){ return x.value + ' (' + x.count + ')'; }).join(', ')}</span>;
                                                     return null;
                                                 })()}
                                             </div>
                                             <div className="mt-3 flex flex-wrap gap-3 items-center">
                                                 <span className="text-sm font-medium text-slate-600">Filters</span>
-                                                <select value={filterJobOwner} onChange={(e) => setFilterJobOwner(e.target.value)}
+                                                <select value={filterJobOwner} onChange={(e) => { setFilterJobOwner(e.target.value); setDetailedPage(1); }}
                                                     className="px-3 py-1.5 border border-slate-300 rounded-md text-sm focus:ring-2 focus:ring-slate-400 focus:border-slate-400">
                                                     <option value="">All owners</option>
-                                                    {detailedJobsMeta.owners.map(function(o){ return <option key={o} value={o}>{o}</option>; })}
+                                                    {facetValues('owner').map(function(o){ return <option key={o} value={o}>{o}</option>; })}
                                                 </select>
-                                                <select value={filterJobStatus} onChange={(e) => setFilterJobStatus(e.target.value)}
+                                                <select value={filterJobStatus} onChange={(e) => { setFilterJobStatus(e.target.value); setDetailedPage(1); }}
                                                     className="px-3 py-1.5 border border-slate-300 rounded-md text-sm focus:ring-2 focus:ring-slate-400 focus:border-slate-400">
                                                     <option value="">All statuses</option>
-                                                    {detailedJobsMeta.statuses.map(function(s){ return <option key={s} value={s}>{s}</option>; })}
+                                                    {facetValues('status').map(function(s){ return <option key={s} value={s}>{s}</option>; })}
                                                 </select>
-                                                <select value={filterJobOpenClosed} onChange={(e) => setFilterJobOpenClosed(e.target.value)}
+                                                <select value={filterJobOpenClosed} onChange={(e) => { setFilterJobOpenClosed(e.target.value); setDetailedPage(1); }}
                                                     className="px-3 py-1.5 border border-slate-300 rounded-md text-sm focus:ring-2 focus:ring-slate-400 focus:border-slate-400">
                                                     <option value="">All</option>
                                                     <option value="open">Open Only</option>
                                                     <option value="closed">Closed Only</option>
                                                 </select>
                                                 {(filterJobOwner || filterJobStatus || filterJobOpenClosed) && (
-                                                    <button type="button" onClick={() => { setFilterJobOwner(''); setFilterJobStatus(''); setFilterJobOpenClosed(''); }}
+                                                    <button type="button" onClick={() => { setFilterJobOwner(''); setFilterJobStatus(''); setFilterJobOpenClosed(''); setDetailedPage(1); }}
                                                         className="text-sm text-slate-600 hover:text-slate-800">Clear</button>
                                                 )}
                                             </div>
@@ -1379,14 +1625,14 @@ ANALYTICS_TEMPLATE = '''
                                                         </tr>
                                                     </thead>
                                                     <tbody>
-                                                        {filteredDetailedJobs.length === 0 ? (
+                                                        {detailedJobs.length === 0 ? (
                                                             <tr>
                                                                 <td colSpan="7" className="text-center py-12 text-slate-500 text-sm">
-                                                                    {detailedJobs.length === 0 ? 'No jobs for this period' : 'No rows match the filters'}
+                                                                    {detailedAvailable === 0 ? 'No jobs for this period' : 'No rows match the filters'}
                                                                 </td>
                                                             </tr>
                                                         ) : (
-                                                            filteredDetailedJobs.map(function(job, idx) {
+                                                            detailedJobs.map(function(job, idx) {
                                                                 var statusColor = { 'Open': 'bg-green-50 text-green-800', 'Closed': 'bg-slate-100 text-slate-600', 'On Hold': 'bg-yellow-50 text-yellow-800', 'Cancelled': 'bg-red-50 text-red-700' }[job.status] || 'bg-slate-100 text-slate-600';
                                                                 var isOpenVal = job.isOpen === true || job.isOpen === 1;
                                                                 return (
@@ -1409,6 +1655,7 @@ ANALYTICS_TEMPLATE = '''
                                                     </tbody>
                                                 </table>
                                             </div>
+                                            {pager}
                                         </div>
                                     </>
                                 )}
@@ -1563,6 +1810,7 @@ AHSA_HTML_TEMPLATE = '''
 
     <script>
         let jobsData = [];
+        let snapshotId = null;  // Dataset id from /api/ahsa/jobs, pushed as-is
 
         // Show status message
         function showStatus(message, isError = false) {
@@ -1664,6 +1912,7 @@ AHSA_HTML_TEMPLATE = '''
                 }
 
                 if (data.success && data.data) {
+                    snapshotId = data.snapshotId || null;
                     renderJobs(data.data);
                     showStatus(`Successfully fetched ${data.count || data.data.length} job(s)`, false);
                 } else {
@@ -1696,7 +1945,8 @@ AHSA_HTML_TEMPLATE = '''
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json'
-                    }
+                    },
+                    body: JSON.stringify({ snapshotId })
                 });
 
                 const data = await response.json();
@@ -1705,10 +1955,25 @@ AHSA_HTML_TEMPLATE = '''
                     throw new Error(data.error || 'Failed to push jobs to Supabase');
                 }
 
-                if (data.success) {
-                    showStatus(`Successfully pushed ${data.count || jobsData.length} job(s) to Supabase`, false);
+                // The push runs as a background task: poll it until it finishes
+                let task = data.task;
+                while (task && (task.status === 'queued' || task.status === 'running')) {
+                    pushBtn.innerHTML = `<span>⏳</span> ${task.phase} (${task.rows.fetched} fetched, ${task.rows.upserted} pushed)`;
+                    await new Promise(resolve => setTimeout(resolve, 1000));
+                    const poll = await fetch(data.statusUrl);
+                    if (!poll.ok) {
+                        throw new Error('Lost track of the push task');
+                    }
+                    task = await poll.json();
+                }
+
+                if (task && task.status === 'succeeded') {
+                    const failed = task.errorCount ? ` (${task.errorCount} job(s) could not be fetched)` : '';
+                    const repulled = task.result && task.result.refetched && snapshotId ? ' (list had expired, pulled again)' : '';
+                    const unchanged = task.result && task.result.unchanged ? `, ${task.result.unchanged} unchanged` : '';
+                    showStatus(`Successfully pushed ${task.rows.upserted} job(s) to Supabase${unchanged}${failed}${repulled}`, false);
                 } else {
-                    throw new Error(data.error || 'Push operation failed');
+                    throw new Error((task && task.errors.length && task.errors[task.errors.length - 1]) || 'Push operation failed');
                 }
             } catch (error) {
                 console.error('Error pushing to Supabase:', error);
@@ -1728,121 +1993,158 @@ AHSA_HTML_TEMPLATE = '''
 </html>
 '''
 
+def read_token_file():
+    """The stored token dict as written, including a logout tombstone; None if there is none."""
+    if os.path.exists(TOKEN_FILE):
+        with open(TOKEN_FILE, 'r') as f:
+            return json.load(f)
+    return None
+
 def load_tokens():
-    """Load tokens from file"""
+    """Load tokens from file (restored from the warm-restart snapshot if the file is gone after a deploy)"""
     try:
-        if os.path.exists(TOKEN_FILE):
-            with open(TOKEN_FILE, 'r') as f:
-                return json.load(f)
+        ensure_snapshot_restored()
+        tokens = read_token_file()
+        if tokens and not tokens.get('loggedOut'):
+            return tokens
     except Exception as e:
         print(f"Error loading tokens: {e}")
     return None
 
-def save_tokens(tokens):
-    """Save tokens to file"""
+def save_tokens(tokens, stamp=True):
+    """Save tokens to file (stamp=False keeps saved_at, for tokens copied from another process)"""
     try:
-        tokens['saved_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if stamp:
+            tokens['saved_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         with open(TOKEN_FILE, 'w') as f:
             json.dump(tokens, f, indent=2)
+        if stamp and SCHEDULER_MODE == 'worker':
+            save_snapshot()  # Hand new tokens to the other tier right away
         return True
     except Exception as e:
         print(f"Error saving tokens: {e}")
         return False
 
-def sync_bullhorn_jobs():
-    """Fetch open jobs from Bullhorn API and upsert into Supabase open_jobs table"""
+def open_job_row(job, synced_at):
+    """Map a Bullhorn JobOrder to an open_jobs row (SQL schema)."""
+    owner = (job.get('owner') or {})
+    client = (job.get('clientCorporation') or {})
+    address = (job.get('address') or {})
+    
+    date_added_ms = job.get('dateAdded')
+    date_added = None
+    if date_added_ms:
+        date_added = datetime.fromtimestamp(date_added_ms / 1000).isoformat()
+    
+    # Handle start_date conversion
+    start_date_ms = job.get('startDate')
+    start_date = None
+    if start_date_ms:
+        start_date = datetime.fromtimestamp(start_date_ms / 1000).isoformat()
+    
+    owner_name = f"{owner.get('firstName', '')} {owner.get('lastName', '')}".strip() or None
+    
+    # Get description from either description or publicDescription field
+    description = job.get('description') or job.get('publicDescription')
+    
+    return {
+        'bullhorn_id': job.get('id'),
+        'title': job.get('title', 'Unknown'),
+        'status': job.get('status', 'Unknown'),
+        'description': description,  # NEW: Job description
+        'specialties': job.get('specialties'),  # NEW: Specialties
+        'city': address.get('city') if address else None,  # NEW: City from address
+        'state': address.get('state') if address else None,  # NEW: State from address
+        'client_id': client.get('id'),
+        'client_name': client.get('name'),
+        'owner_id': owner.get('id'),
+        'owner_name': owner_name,
+        'employment_type': job.get('employmentType'),
+        'salary': job.get('salary'),
+        'start_date': start_date,  # UPDATED: Now extracts from API
+        'num_openings': job.get('numOpenings'),
+        'is_open': job.get('isOpen', True),
+        'date_added': date_added,
+        'synced_at': synced_at,
+        'updated_at': synced_at
+    }
+
+@upstream_priority('bulk')
+def sync_bullhorn_jobs(task=None):
+    """Fetch open jobs from Bullhorn API and upsert into Supabase open_jobs table, one page at a time.
+    Pages are read in id order and checkpointed in the sync journal, so a run that dies midway is
+    resumed after its last committed page. Reports progress on `task` when run as a background task;
+    returns a result dict."""
+    supabase = get_supabase()
     if not supabase:
         print("⚠️ Supabase client not initialized. Skipping job sync.")
-        return
+        return {'success': False, 'error': 'Supabase client not initialized', 'count': 0}
     
     tokens = load_tokens()
     if not tokens or not tokens.get('bh_rest_token'):
         print("⚠️ No valid Bullhorn session. Skipping job sync.")
-        return
+        return {'success': False, 'error': 'No valid Bullhorn session', 'count': 0}
+    
+    run = journal_start('bullhorn-jobs', {'syncedAt': datetime.now().isoformat()})
+    if run is None:
+        print("⏭️ A Bullhorn jobs sync is already running. Skipping.")
+        return {'success': False, 'error': 'A Bullhorn jobs sync is already running', 'count': 0}
+    if run['resumed']:
+        print(f"↩️ Resuming Bullhorn jobs sync {run['id']} after job {run['lastId']} ({run['rows']} already synced)")
     
     try:
+        task_progress(task, phase='fetching')
         rest_url = tokens['rest_url']
         if not rest_url.endswith('/'):
             rest_url += '/'
         
         url = f"{rest_url}query/JobOrder"
+        # Rows keep the run's first timestamp, so a resumed run looks like one sync
+        synced_at = run['cursor']['syncedAt']
+        last_id = int(run['lastId'] or 0)
+        count = 0
         
-        params = {
-            'BhRestToken': tokens['bh_rest_token'],
-            'where': 'isOpen=true AND isDeleted=false',
-            'fields': 'id,title,status,isOpen,dateAdded,employmentType,salary,numOpenings,description,specialties,address(city,state),startDate,publicDescription,clientCorporation(id,name),owner(id,firstName,lastName)',
-            'count': 500
-        }
-        
-        response = requests.get(url, params=params, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-        
-        jobs = data.get('data', [])
-        print(f"📥 Fetched {len(jobs)} open jobs from Bullhorn")
-        
-        if not jobs:
-            print("ℹ️ No open jobs to sync")
-            return
-        
-        # Map Bullhorn API response to SQL schema
-        synced_at = datetime.now().isoformat()
-        upsert_data = []
-        
-        for job in jobs:
-            owner = (job.get('owner') or {})
-            client = (job.get('clientCorporation') or {})
-            address = (job.get('address') or {})
-            
-            date_added_ms = job.get('dateAdded')
-            date_added = None
-            if date_added_ms:
-                date_added = datetime.fromtimestamp(date_added_ms / 1000).isoformat()
-            
-            # Handle start_date conversion
-            start_date_ms = job.get('startDate')
-            start_date = None
-            if start_date_ms:
-                start_date = datetime.fromtimestamp(start_date_ms / 1000).isoformat()
-            
-            owner_name = f"{owner.get('firstName', '')} {owner.get('lastName', '')}".strip() or None
+        while True:
+            # Keyset paging (id > last committed id) stays correct while jobs open and close
+            params = {
+                'BhRestToken': tokens['bh_rest_token'],
+                'where': f'isOpen=true AND isDeleted=false AND id>{last_id}',
+                'fields': 'id,title,status,isOpen,dateAdded,employmentType,salary,numOpenings,description,specialties,address(city,state),startDate,publicDescription,clientCorporation(id,name),owner(id,firstName,lastName)',
+                'orderBy': 'id',
+                'count': BULLHORN_PAGE_SIZE
+            }
             
-            # Get description from either description or publicDescription field
-            description = job.get('description') or job.get('publicDescription')
+            response = upstream_get(url, params=params, timeout=60)
+            response.raise_for_status()
+            jobs = response.json().get('data', [])
+            task_progress(task, phase='syncing', fetched=len(jobs))
+            if not jobs:
+                break
             
-            row = {
-                'bullhorn_id': job.get('id'),
-                'title': job.get('title', 'Unknown'),
-                'status': job.get('status', 'Unknown'),
-                'description': description,  # NEW: Job description
-                'specialties': job.get('specialties'),  # NEW: Specialties
-                'city': address.get('city') if address else None,  # NEW: City from address
-                'state': address.get('state') if address else None,  # NEW: State from address
-                'client_id': client.get('id'),
-                'client_name': client.get('name'),
-                'owner_id': owner.get('id'),
-                'owner_name': owner_name,
-                'employment_type': job.get('employmentType'),
-                'salary': job.get('salary'),
-                'start_date': start_date,  # UPDATED: Now extracts from API
-                'num_openings': job.get('numOpenings'),
-                'is_open': job.get('isOpen', True),
-                'date_added': date_added,
-                'synced_at': synced_at,
-                'updated_at': synced_at
-            }
-            upsert_data.append(row)
+            seq = journal_chunk(run, [job.get('id') for job in jobs])
+            supabase_upsert('open_jobs', [open_job_row(job, synced_at) for job in jobs], 'bullhorn_id')
+            journal_commit(run, seq)
+            count += len(jobs)
+            last_id = jobs[-1]['id']
+            task_progress(task, upserted=len(jobs))
+            if len(jobs) < BULLHORN_PAGE_SIZE:
+                break
         
-        # Bulk upsert to Supabase
-        result = supabase.table('open_jobs').upsert(
-            upsert_data,
-            on_conflict='bullhorn_id'
-        ).execute()
+        journal_finish(run)
+        if not count and not run['resumed']:
+            print("ℹ️ No open jobs to sync")
+            return {'success': True, 'count': 0}
         
-        print(f"✅ Synced {len(upsert_data)} jobs to Supabase (upserted/updated)")
+        print(f"✅ Synced {count} jobs to Supabase (upserted/updated)")
+        result = {'success': True, 'count': count}
+        if run['resumed']:
+            result['resumedAfter'] = run['rows'] - count
+        return result
         
     except Exception as e:
+        journal_finish(run, error=e)
         print(f"❌ Error syncing Bullhorn jobs: {e}")
+        return {'success': False, 'error': str(e), 'count': 0}
 
 def exchange_for_bh_rest_token(access_token, rest_url=None):
     """Exchange OAuth access token for BhRestToken"""
@@ -1857,7 +2159,7 @@ def exchange_for_bh_rest_token(access_token, rest_url=None):
     
     for login_url in login_urls:
         try:
-            response = requests.post(
+            response = upstream_post(
                 login_url,
                 params={'version': '*', 'access_token': access_token},
                 headers={'Content-Type': 'application/x-www-form-urlencoded'},
@@ -1895,7 +2197,7 @@ def get_bh_rest_token_expiration(rest_url, bh_rest_token):
         if not rest_url or not bh_rest_token:
             return None
         u = rest_url if rest_url.endswith('/') else rest_url + '/'
-        r = requests.get(u + 'ping', params={'BhRestToken': bh_rest_token}, timeout=10)
+        r = upstream_get(u + 'ping', params={'BhRestToken': bh_rest_token}, timeout=10)
         if r.ok:
             d = r.json()
             ms = d.get('sessionExpires')
@@ -1915,7 +2217,7 @@ def refresh_oauth_access_token():
         print("⚠️ CLIENT_ID or CLIENT_SECRET not set")
         return False
     try:
-        r = requests.post(
+        r = upstream_post(
             'https://auth.bullhornstaffing.com/oauth/token',
             data={
                 'grant_type': 'refresh_token',
@@ -1954,6 +2256,7 @@ def refresh_oauth_access_token():
         print(f"❌ OAuth refresh error: {e}")
         return False
 
+@upstream_priority('maintenance')
 def maintain_session():
     """Two-tier token refresh: OAuth access_token + BhRestToken"""
     print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] maintain_session: running...")
@@ -1961,6 +2264,7 @@ def maintain_session():
     if not tokens or not tokens.get('access_token'):
         print("⚠️ No tokens to maintain")
         return
+    had_session = bool(tokens.get('bh_rest_token'))
     # Step 1: Refresh OAuth access_token if it expires within 30 minutes
     if access_token_expires_within(minutes=30):
         ok = refresh_oauth_access_token()
@@ -1986,30 +2290,8 @@ def maintain_session():
     tokens['last_refresh'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     save_tokens(tokens)
     print(f"✅ maintain_session: BhRestToken refreshed at {tokens['last_refresh']}")
-
-# Schedule two-tier token maintenance (OAuth + BhRestToken)
-scheduler.add_job(
-    func=maintain_session,
-    trigger="interval",
-    minutes=REFRESH_INTERVAL_MINUTES,
-    id='token_maintenance',
-    name='Maintain OAuth and BhRestToken',
-    replace_existing=True,
-)
-
-# Schedule Bullhorn jobs sync to Supabase (every 60 minutes)
-if supabase:
-    scheduler.add_job(
-        func=sync_bullhorn_jobs,
-        trigger="interval",
-        minutes=60,
-        id='sync_bullhorn_jobs',
-        name='Sync Bullhorn open jobs to Supabase',
-        replace_existing=True,
-    )
-    print("✅ Scheduled Bullhorn jobs sync: every 60 minutes")
-else:
-    print("⚠️ Supabase not configured. Job sync scheduler not started.")
+    if cache_warming_due(tokens, had_session):
+        schedule_cache_warming()
 
 @app.route('/')
 def home():
@@ -2066,7 +2348,7 @@ def callback():
             'redirect_uri': REDIRECT_URI
         }
         
-        response = requests.post(token_url, params=params)
+        response = upstream_post(token_url, params=params)
         data = response.json()
         
         if not response.ok or 'access_token' not in data:
@@ -2104,6 +2386,7 @@ def callback():
         save_tokens(tokens)
         
         if bh_rest_token:
+            schedule_cache_warming()  # A new session: warm before the dashboard asks
             return render_template_string(HTML_TEMPLATE, 
                 tokens=tokens,
                 session_status="Active",
@@ -2161,7 +2444,7 @@ def test():
             rest_url += '/'
         
         ping_url = f"{rest_url}ping"
-        response = requests.get(ping_url, params={'BhRestToken': bh_rest_token})
+        response = upstream_get(ping_url, params={'BhRestToken': bh_rest_token})
         
         if response.ok:
             data = response.json()
@@ -2193,8 +2476,11 @@ def test():
 def logout():
     """Clear tokens"""
     try:
-        if os.path.exists(TOKEN_FILE):
-            os.remove(TOKEN_FILE)
+        # A tombstone rather than a missing file: it is newer than the tokens in any older snapshot, so
+        # neither a restart nor the other tier's next pull restores them; the snapshot gets it right away
+        with open(TOKEN_FILE, 'w') as f:
+            json.dump({'loggedOut': True, 'saved_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}, f, indent=2)
+        save_snapshot()
         return render_template_string(HTML_TEMPLATE, 
             message="Tokens cleared successfully")
     except Exception as e:
@@ -2204,26 +2490,157 @@ def logout():
 
 # ==================== HELPER FUNCTIONS FOR ANALYTICS ====================
 
+# ==================== CONCURRENT ENTITY FETCHES ====================
+
+FETCH_DEADLINE_SECONDS = 45  # Shared budget for all entity queries behind one API call
+
+# One pool per nesting level, so a fetch that fans out again (e.g. per month) never waits on its own pool
+_fetch_executors = [
+    ThreadPoolExecutor(max_workers=8, thread_name_prefix='bullhorn-fetch'),
+    ThreadPoolExecutor(max_workers=16, thread_name_prefix='bullhorn-fetch-inner'),
+]
+_fetch_context = threading.local()
+
+def fetch_time_remaining(default):
+    """Request timeout to use: default, capped by the shared deadline of the enclosing concurrent fetch."""
+    deadline_at = getattr(_fetch_context, 'deadline_at', None)
+    if deadline_at is None:
+        return default
+    return max(0.1, min(default, deadline_at - time.monotonic()))
+
+def fetch_cancelled():
+    """True if a sibling query in the enclosing concurrent fetch failed and the rest should stop."""
+    events = getattr(_fetch_context, 'cancel_events', None) or ()
+    return any(event.is_set() for event in events)
+
+def fetch_entities_concurrently(queries, deadline=FETCH_DEADLINE_SECONDS):
+    """
+    Run independent entity fetches in parallel under one shared deadline.
+
+    Args:
+        queries: Dict of name -> (fetch_function, args tuple). A fetch returning None or raising
+            is a fatal failure: the remaining queries are cancelled.
+        deadline: Seconds allowed for all queries together
+
+    Returns:
+        (results, timings, error): results maps name -> rows (None if failed or cancelled),
+        timings maps name -> seconds taken, error is None or a message naming the failure.
+    """
+    depth = getattr(_fetch_context, 'depth', 0)
+    parent_deadline = getattr(_fetch_context, 'deadline_at', None)
+    deadline_at = time.monotonic() + deadline
+    if parent_deadline is not None:
+        deadline_at = min(deadline_at, parent_deadline)
+    cancel_events = tuple(getattr(_fetch_context, 'cancel_events', None) or ()) + (threading.Event(),)
+    priority = current_upstream_priority()
+    results = {name: None for name in queries}
+    timings = {}
+
+    def run(name, func, args):
+        _fetch_context.depth = depth + 1
+        _fetch_context.deadline_at = deadline_at
+        _fetch_context.cancel_events = cancel_events
+        started = time.monotonic()
+        try:
+            with upstream_priority(priority):
+                return func(*args)
+        finally:
+            timings[name] = round(time.monotonic() - started, 3)
+            _fetch_context.depth = 0
+            _fetch_context.deadline_at = None
+            _fetch_context.cancel_events = None
+
+    if depth >= len(_fetch_executors):
+        # Too deeply nested for another pool: run in this thread (its fetch context already carries
+        # the deadline and cancel events), with the same error, timing and deadline handling
+        error = None
+        for name, (func, args) in queries.items():
+            if time.monotonic() >= deadline_at:
+                error = f"Deadline of {deadline}s exceeded waiting for {', '.join(n for n, rows in results.items() if rows is None)}"
+                break
+            started = time.monotonic()
+            try:
+                rows = func(*args)
+            except Exception as e:
+                print(f"Error in sequential {name} fetch: {e}")
+                rows = None
+            finally:
+                timings[name] = round(time.monotonic() - started, 3)
+            if rows is None:
+                error = f"{name} fetch failed"
+                break
+            results[name] = rows
+        if error:
+            cancel_events[-1].set()
+            print(f"⚠️ Concurrent fetch aborted: {error}")
+        return results, timings, error
+
+    executor = _fetch_executors[depth]
+    futures = {executor.submit(run, name, func, args): name for name, (func, args) in queries.items()}
+    error = None
+    try:
+        for future in as_completed(futures, timeout=max(0, deadline_at - time.monotonic())):
+            name = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                print(f"Error in concurrent {name} fetch: {e}")
+                rows = None
+            if rows is None:
+                error = f"{name} fetch failed"
+                break
+            results[name] = rows
+    except FuturesTimeoutError:
+        pending = sorted(name for future, name in futures.items() if not future.done())
+        error = f"Deadline of {deadline}s exceeded waiting for {', '.join(pending)}"
+
+    if error:
+        cancel_events[-1].set()
+        for future in futures:
+            future.cancel()
+        print(f"⚠️ Concurrent fetch aborted: {error}")
+    return results, timings, error
+
+def with_fetch_timings(response, timings):
+    """Attach per-entity fetch timings to a response as a Server-Timing header."""
+    if timings:
+        response.headers['Server-Timing'] = ', '.join(
+            f"{name};dur={seconds * 1000:.0f}" for name, seconds in sorted(timings.items())
+        )
+    return response
+
 def parse_date_range_from_request():
-    """Get (start_ms, end_ms) from request: start/end (YYYY-MM-DD), or year+month, or year only."""
-    import calendar
-    args = request.args
+    """Get (start_ms, end_ms) from request: start/end (YYYY-MM-DD), or year+month, or year only.
+    Each range is logged so cache warming can learn the most requested ones."""
+    start_ms, end_ms = parse_date_range(request.args)
+    log_requested_range(start_ms, end_ms)
+    return start_ms, end_ms
+
+def parse_date_range(args):
+    """Get (start_ms, end_ms) from a mapping of query args: start/end (YYYY-MM-DD), or year+month, or year only."""
     start_arg, end_arg = args.get('start'), args.get('end')
     if start_arg and end_arg:
         start_dt = datetime.strptime(start_arg, '%Y-%m-%d')
         end_dt = datetime.strptime(end_arg, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
         return int(start_dt.timestamp() * 1000), int(end_dt.timestamp() * 1000)
-    year = int(args.get('year', datetime.now().year))
-    month = args.get('month', type=int)
+    year = int(args.get('year') or datetime.now().year)
+    try:
+        month = int(args.get('month'))
+    except (TypeError, ValueError):
+        month = None
     if month is None:
         start_dt = datetime(year, 1, 1)
         end_dt = datetime(year, 12, 31, 23, 59, 59)
     else:
-        start_dt = datetime(year, month, 1)
-        last = calendar.monthrange(year, month)[1]
-        end_dt = datetime(year, month, last, 23, 59, 59)
+        start_dt, end_dt = get_month_range(year, month)
     return int(start_dt.timestamp() * 1000), int(end_dt.timestamp() * 1000)
 
+def get_month_range(year, month):
+    """First instant and last second (23:59:59) of a calendar month as datetimes."""
+    import calendar
+    last = calendar.monthrange(year, month)[1]
+    return datetime(year, month, 1), datetime(year, month, last, 23, 59, 59)
+
 def fetch_job_submissions(start_ms, end_ms, include_recruiter=True):
     """
     Safely fetch JobSubmission records from Bullhorn.
@@ -2236,37 +2653,13 @@ def fetch_job_submissions(start_ms, end_ms, include_recruiter=True):
     Returns:
         List of submission records or None on error
     """
-    tokens = load_tokens()
-    if not tokens or not tokens.get('bh_rest_token'):
-        return None
-    
-    try:
-        rest_url = tokens['rest_url']
-        if not rest_url.endswith('/'):
-            rest_url += '/'
-        
-        url = f"{rest_url}query/JobSubmission"
-        
-        if include_recruiter:
-            fields = 'id,dateAdded,status,sendingUser(id,firstName,lastName)'
-        else:
-            fields = 'id,dateAdded,status'
-        
-        params = {
-            'BhRestToken': tokens['bh_rest_token'],
-            'where': f"dateAdded>={start_ms} AND dateAdded<={end_ms}",
-            'fields': fields,
-            'orderBy': '-dateAdded',
-            'count': 500
-        }
-        
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        return data.get('data', [])
-    except Exception as e:
-        print(f"Error fetching JobSubmissions: {e}")
-        return None
+    if include_recruiter:
+        fields = 'id,dateAdded,status,sendingUser(id,firstName,lastName)'
+    else:
+        fields = 'id,dateAdded,status'
+    # Every row in range, assembled from cached month shards (a page cap would drop the oldest rows
+    # of a busy range while the shards already hold them)
+    return fetch_rows_sharded('JobSubmission', fields, start_ms, end_ms)
 
 def fetch_placements(start_ms, end_ms, include_recruiter=True):
     """
@@ -2280,37 +2673,13 @@ def fetch_placements(start_ms, end_ms, include_recruiter=True):
     Returns:
         List of placement records or None on error
     """
-    tokens = load_tokens()
-    if not tokens or not tokens.get('bh_rest_token'):
-        return None
-    
-    try:
-        rest_url = tokens['rest_url']
-        if not rest_url.endswith('/'):
-            rest_url += '/'
-        
-        url = f"{rest_url}query/Placement"
-        
-        if include_recruiter:
-            fields = 'id,dateAdded,owner(id,firstName,lastName)'
-        else:
-            fields = 'id,dateAdded'
-        
-        params = {
-            'BhRestToken': tokens['bh_rest_token'],
-            'where': f"dateAdded>={start_ms} AND dateAdded<={end_ms}",
-            'fields': fields,
-            'orderBy': '-dateAdded',
-            'count': 500
-        }
-        
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        return data.get('data', [])
-    except Exception as e:
-        print(f"Error fetching Placements: {e}")
-        return None
+    if include_recruiter:
+        fields = 'id,dateAdded,owner(id,firstName,lastName)'
+    else:
+        fields = 'id,dateAdded'
+    # Every row in range, assembled from cached month shards (a page cap would drop the oldest rows
+    # of a busy range while the shards already hold them)
+    return fetch_rows_sharded('Placement', fields, start_ms, end_ms)
 
 def fetch_notes(start_ms, end_ms):
     """
@@ -2334,7 +2703,7 @@ def fetch_notes(start_ms, end_ms):
     }
     try:
         url = f"{rest_url}query/Note"
-        response = requests.get(url, params=params, timeout=30)
+        response = upstream_get(url, params=params, timeout=30)
         if response.status_code == 200:
             data = response.json()
             return (data.get('data', []), None)
@@ -2351,26 +2720,2418 @@ def fetch_notes(start_ms, end_ms):
         print(f"Error fetching Notes: {msg}")
         return (None, msg)
 
-def get_recruiter_name(item):
-    """Extract recruiter name from sendingUser (JobSubmission) or owner (Placement) field."""
-    u = item.get('sendingUser') or item.get('owner')
-    if u and (u.get('firstName') or u.get('lastName')):
-        return f"{u.get('firstName', '')} {u.get('lastName', '')}".strip() or "Unknown"
+BULLHORN_PAGE_SIZE = 500  # Bullhorn caps query/<Entity> at 500 rows per call
+
+def fetch_bullhorn_rows(entity, fields, start_ms, end_ms, max_rows=10000, timeout=30, where=None):
+    """
+    Fetch all records of a Bullhorn entity added in a date range, following 500-row pages.
+
+    Args:
+        entity: Bullhorn entity name (JobSubmission, Placement, JobOrder, ...)
+        fields: Bullhorn fields selector
+        start_ms: Start timestamp in milliseconds
+        end_ms: End timestamp in milliseconds
+        max_rows: Stop paging after this many rows
+        where: Optional extra condition ANDed to the date range
+
+    Returns:
+        List of records (newest first) or None on error
+    """
+    tokens = load_tokens()
+    if not tokens or not tokens.get('bh_rest_token'):
+        return None
+
+    try:
+        rest_url = tokens['rest_url']
+        if not rest_url.endswith('/'):
+            rest_url += '/'
+
+        url = f"{rest_url}query/{entity}"
+        rows = []
+        while len(rows) < max_rows:
+            if fetch_cancelled():
+                return None
+            page_size = min(BULLHORN_PAGE_SIZE, max_rows - len(rows))
+            params = {
+                'BhRestToken': tokens['bh_rest_token'],
+                'where': f"dateAdded>={start_ms} AND dateAdded<={end_ms}" + (f" AND {where}" if where else ''),
+                'fields': fields,
+                'orderBy': '-dateAdded',
+                'start': len(rows),
+                'count': page_size
+            }
+            response = upstream_get(url, params=params, timeout=fetch_time_remaining(timeout))
+            response.raise_for_status()
+            page = response.json().get('data', [])
+            rows.extend(page)
+            if len(page) < page_size:
+                break
+        return rows
+    except Exception as e:
+        print(f"Error fetching {entity} rows: {e}")
+        return None
+
+def shift_months(dt, months):
+    """Move a datetime by whole calendar months, clamping the day to the target month's length."""
+    import calendar
+    month_index = dt.year * 12 + (dt.month - 1) + months
+    year, month = divmod(month_index, 12)
+    day = min(dt.day, calendar.monthrange(year, month + 1)[1])
+    return dt.replace(year=year, month=month + 1, day=day)
+
+def get_recruiter_name(item):
+    """Extract recruiter name from sendingUser (JobSubmission) or owner (Placement) field."""
+    u = item.get('sendingUser') or item.get('owner')
+    if u and (u.get('firstName') or u.get('lastName')):
+        return f"{u.get('firstName', '')} {u.get('lastName', '')}".strip() or "Unknown"
     return "Unknown"
 
-def get_recruiter_id(item):
-    """Extract recruiter ID from sendingUser (JobSubmission) or owner (Placement) field."""
-    u = item.get('sendingUser') or item.get('owner')
-    return u.get('id') if u else None
+def get_recruiter_id(item):
+    """Extract recruiter ID from sendingUser (JobSubmission) or owner (Placement) field."""
+    u = item.get('sendingUser') or item.get('owner')
+    return u.get('id') if u else None
+
+def get_week_range(date_ms):
+    """Get week start and end dates for a given timestamp"""
+    date = datetime.fromtimestamp(date_ms / 1000)
+    # Get Monday of the week
+    days_since_monday = date.weekday()
+    week_start = date - timedelta(days=days_since_monday)
+    week_end = week_start + timedelta(days=6)
+    return week_start, week_end
+
+# ==================== CALENDAR BUCKETS ====================
+
+# A calendar index holds the start of every day/week/month/quarter bucket in a range, computed
+# once; rows are bucketed by bisecting their dateAdded into it rather than building a datetime per row.
+CALENDAR_GRANULARITIES = ('day', 'week', 'month', 'quarter')
+CALENDAR_MAX_BUCKETS = 2000
+CALENDAR_INDEX_TTL_SECONDS = 24 * 3600
+
+def _bucket_floor(dt, granularity):
+    """Start of the bucket containing dt (weeks start on Monday, as in get_week_range)."""
+    day = datetime(dt.year, dt.month, dt.day)
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return datetime(dt.year, dt.month, 1)
+    return datetime(dt.year, 3 * ((dt.month - 1) // 3) + 1, 1)
+
+def _bucket_after(bucket_start, granularity):
+    if granularity == 'day':
+        return bucket_start + timedelta(days=1)
+    if granularity == 'week':
+        return bucket_start + timedelta(days=7)
+    return shift_months(bucket_start, 1 if granularity == 'month' else 3)
+
+def _bucket_label(bucket_start, granularity):
+    if granularity in ('day', 'week'):
+        return bucket_start.strftime('%Y-%m-%d')
+    if granularity == 'month':
+        return bucket_start.strftime('%Y-%m')
+    return f"{bucket_start.year}-Q{(bucket_start.month - 1) // 3 + 1}"
+
+def calendar_index(granularity, start_ms, end_ms):
+    """
+    Calendar buckets covering a range, cached per granularity and bucket-aligned range.
+
+    Args:
+        granularity: day, week (Monday-based), month or quarter
+        start_ms: Start timestamp in milliseconds
+        end_ms: End timestamp in milliseconds
+
+    Returns:
+        Dict with starts (bucket start ms, ascending), labels (2025-03-17, 2025-03, 2025-Q1),
+        firstDays and lastDays (YYYY-MM-DD) per bucket
+
+    Raises:
+        ValueError: Unknown granularity or more than CALENDAR_MAX_BUCKETS buckets
+    """
+    if granularity not in CALENDAR_GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(CALENDAR_GRANULARITIES)}")
+    first = _bucket_floor(datetime.fromtimestamp(start_ms / 1000), granularity)
+    last = _bucket_floor(datetime.fromtimestamp(end_ms / 1000), granularity)
+    key = ('calendar', granularity, first, last)
+    index = cache_get(key)
+    if index is not None:
+        return index
+
+    index = {'granularity': granularity, 'starts': [], 'labels': [], 'firstDays': [], 'lastDays': []}
+    cursor = first
+    while cursor <= last:
+        following = _bucket_after(cursor, granularity)
+        index['starts'].append(int(cursor.timestamp() * 1000))
+        index['labels'].append(_bucket_label(cursor, granularity))
+        index['firstDays'].append(cursor.strftime('%Y-%m-%d'))
+        index['lastDays'].append((following - timedelta(days=1)).strftime('%Y-%m-%d'))
+        if len(index['starts']) > CALENDAR_MAX_BUCKETS:
+            raise ValueError(f"Range spans more than {CALENDAR_MAX_BUCKETS} {granularity} buckets")
+        cursor = following
+    return cache_set(key, index, ttl=CALENDAR_INDEX_TTL_SECONDS)
+
+def bucket_position(index, date_ms):
+    """Position of a timestamp's bucket in a calendar index, or None if it falls before the first bucket."""
+    pos = bisect_right(index['starts'], date_ms) - 1
+    return pos if pos >= 0 else None
+
+# ==================== STATUS CLASSIFICATION ====================
+
+# Placement status buckets used by every server-side stat. Keys are the bucket names
+# returned to the dashboard; values are normalized (lowercase, single-spaced) statuses.
+STATUS_CLASSIFICATION = {
+    'booked': ('requested credentialing', 'credentialed', 'on assignment', 'assignment completed'),
+    'cancelled': ('provider cancelled', 'concord cancelled', 'client cancelled', 'credentialing cancelled'),
+}
+BOOKED_STATUSES = STATUS_CLASSIFICATION['booked']
+CANCELLED_STATUSES = STATUS_CLASSIFICATION['cancelled']
+_STATUS_BUCKETS = {status: bucket for bucket, statuses in STATUS_CLASSIFICATION.items() for status in statuses}
+
+# Submissions are fetched this many months before the range when filtering by owner, so
+# placements in range can be linked to the (candidate, job) pair the owner submitted.
+EXTENDED_SUBMISSIONS_MONTHS = 12
+
+def normalize_status(status):
+    """Lowercase a Bullhorn status and collapse whitespace ('On  Assignment ' -> 'on assignment')."""
+    return ' '.join(str(status or '').lower().split())
+
+def classify_placement_status(status):
+    """Return the STATUS_CLASSIFICATION bucket for a placement status ('booked', 'cancelled') or None."""
+    return _STATUS_BUCKETS.get(normalize_status(status))
+
+def compute_basic_summary(submissions, placements, start_ms, end_ms, owner_id=None, owner_pairs=None):
+    """
+    Compute the "At a glance" dashboard figures from raw submissions and placements.
+
+    Args:
+        submissions: JobSubmission rows with sendingUser, candidate(id), jobOrder(id). When owner_id
+            is set these may start before start_ms (owner-to-placement linkage window).
+        placements: Placement rows in range with status, candidate(id), jobOrder(id)
+        start_ms: Start of the selected range in milliseconds
+        end_ms: End of the selected range in milliseconds
+        owner_id: Optional submitter (sendingUser) id to filter by
+        owner_pairs: Optional precomputed (candidate id, job id) pairs of owner_id (e.g. from the
+            submission link index); when given, submissions need not reach back before start_ms
+
+    Returns:
+        Dict with stats, chartData (Monday-based weeks in date order) and owners (submitters in range)
+    """
+    in_range = [s for s in submissions if s.get('dateAdded') is not None and start_ms <= s['dateAdded'] <= end_ms]
+
+    owners = {}
+    for sub in in_range:
+        u = sub.get('sendingUser') or {}
+        if u.get('id') is None:
+            continue
+        owners[str(u['id'])] = f"{u.get('firstName') or ''} {u.get('lastName') or ''}".strip() or 'Unknown'
+    owner_list = sorted(({'id': k, 'name': v} for k, v in owners.items()), key=lambda o: o['name'].lower())
+
+    if owner_id:
+        owner_id = str(owner_id)
+        if owner_pairs is not None:
+            owned_pairs = set(owner_pairs)
+        else:
+            owned_pairs = set()
+            for sub in submissions:
+                if str((sub.get('sendingUser') or {}).get('id')) != owner_id:
+                    continue
+                cid = (sub.get('candidate') or {}).get('id')
+                jid = (sub.get('jobOrder') or {}).get('id')
+                if cid is not None and jid is not None:
+                    owned_pairs.add((cid, jid))
+        in_range = [s for s in in_range if str((s.get('sendingUser') or {}).get('id')) == owner_id]
+        placements = [
+            p for p in placements
+            if ((p.get('candidate') or {}).get('id'), (p.get('jobOrder') or {}).get('id')) in owned_pairs
+        ]
+
+    weeks = calendar_index('week', start_ms, end_ms)
+    week_slots = [None] * len(weeks['starts'])
+
+    def week_bucket(date_ms):
+        pos = bucket_position(weeks, date_ms) or 0
+        if week_slots[pos] is None:
+            iso_week = datetime.strptime(weeks['firstDays'][pos], '%Y-%m-%d').isocalendar()[1]
+            week_slots[pos] = {'name': f"Week {iso_week}", 'weekStart': weeks['labels'][pos],
+                               'submissions': 0, 'placements': 0, 'booked': 0, 'cancelled': 0}
+        return week_slots[pos]
+
+    for sub in in_range:
+        week_bucket(sub['dateAdded'])['submissions'] += 1
+
+    totals = {'booked': 0, 'cancelled': 0}
+    for place in placements:
+        bucket = classify_placement_status(place.get('status'))
+        if bucket:
+            totals[bucket] += 1
+        if not place.get('dateAdded'):
+            continue
+        week_data = week_bucket(place['dateAdded'])
+        week_data['placements'] += 1
+        if bucket:
+            week_data[bucket] += 1
+
+    total_submissions = len(in_range)
+    total_ever_booked = totals['booked'] + totals['cancelled']
+    stats = {
+        'totalSubmissions': total_submissions,
+        'totalPlacements': len(placements),
+        'totalBooked': totals['booked'],
+        'totalCancelled': totals['cancelled'],
+        'totalEverBooked': total_ever_booked,
+        'conversionRate': round(totals['booked'] / total_submissions * 100, 1) if total_submissions else 0,
+        'cancelledShare': (totals['cancelled'] / total_ever_booked * 100) if total_ever_booked else None,
+    }
+
+    return {
+        'stats': stats,
+        'chartData': [week for week in week_slots if week is not None],
+        'owners': owner_list,
+    }
+
+# ==================== ANALYTICS AGGREGATIONS ====================
+
+def is_presented_status(status):
+    """Submission statuses counted as 'presented' (any status containing 'presented')."""
+    return 'presented' in (status or '').lower()
+
+def _new_recruiter_bucket(recruiter_id, recruiter_name):
+    return {
+        'recruiterId': recruiter_id,
+        'name': recruiter_name,
+        'submissions': 0,
+        'presented': 0,
+        'placed': 0,
+        'statusCounts': {}
+    }
+
+def _add_to_recruiter_buckets(by_recruiter, submissions, placements):
+    """Count submissions (with status breakdown) and placements per recruiter into by_recruiter."""
+    for sub in submissions:
+        recruiter_id = get_recruiter_id(sub)
+        recruiter_name = get_recruiter_name(sub)
+        recruiter_key = f"{recruiter_id}_{recruiter_name}"
+        if recruiter_key not in by_recruiter:
+            by_recruiter[recruiter_key] = _new_recruiter_bucket(recruiter_id, recruiter_name)
+        rec_data = by_recruiter[recruiter_key]
+        rec_data['submissions'] += 1
+        if is_presented_status(sub.get('status')):
+            rec_data['presented'] += 1
+        status_val = sub.get('status', 'Unknown')
+        rec_data['statusCounts'][status_val] = rec_data['statusCounts'].get(status_val, 0) + 1
+
+    for place in placements:
+        recruiter_id = get_recruiter_id(place)
+        recruiter_name = get_recruiter_name(place)
+        recruiter_key = f"{recruiter_id}_{recruiter_name}"
+        if recruiter_key not in by_recruiter:
+            by_recruiter[recruiter_key] = _new_recruiter_bucket(recruiter_id, recruiter_name)
+        by_recruiter[recruiter_key]['placed'] += 1
+
+def aggregate_weekly(submissions, placements):
+    """Group submissions/presented/placed by Monday-based week, with a per-recruiter breakdown per week."""
+    week_map = {}
+    week_rows = {}
+    dates = [row['dateAdded'] for row in list(submissions) + list(placements) if row.get('dateAdded')]
+    if not dates:
+        return []
+    weeks = calendar_index('week', min(dates), max(dates))
+
+    def week_for(date_ms):
+        pos = bucket_position(weeks, date_ms)
+        week_key = weeks['labels'][pos]
+        if week_key not in week_map:
+            week_map[week_key] = {
+                'weekStart': week_key,
+                'weekEnd': weeks['lastDays'][pos],
+                'submissions': 0,
+                'presented': 0,
+                'placed': 0,
+                'byRecruiter': {}
+            }
+            week_rows[week_key] = ([], [])
+        return week_key
+
+    for sub in submissions:
+        if not sub.get('dateAdded'):
+            continue
+        week_key = week_for(sub['dateAdded'])
+        week_map[week_key]['submissions'] += 1
+        if is_presented_status(sub.get('status')):
+            week_map[week_key]['presented'] += 1
+        week_rows[week_key][0].append(sub)
+
+    for place in placements:
+        if not place.get('dateAdded'):
+            continue
+        week_key = week_for(place['dateAdded'])
+        week_map[week_key]['placed'] += 1
+        week_rows[week_key][1].append(place)
+
+    result = []
+    for week_key in sorted(week_map.keys()):
+        week_data = week_map[week_key]
+        _add_to_recruiter_buckets(week_data['byRecruiter'], *week_rows[week_key])
+        week_data['byRecruiter'] = list(week_data['byRecruiter'].values())
+        result.append(week_data)
+    return result
+
+def aggregate_monthly(submissions, placements, start_date, end_date):
+    """Totals for one month plus a per-recruiter breakdown."""
+    result = {
+        'monthStart': start_date.strftime('%Y-%m-%d'),
+        'monthEnd': end_date.strftime('%Y-%m-%d'),
+        'submissions': len(submissions),
+        'presented': sum(1 for sub in submissions if is_presented_status(sub.get('status'))),
+        'placed': len(placements),
+        'byRecruiter': {}
+    }
+    _add_to_recruiter_buckets(result['byRecruiter'], submissions, placements)
+    result['byRecruiter'] = list(result['byRecruiter'].values())
+    return result
+
+def aggregate_recruiters(submissions, placements):
+    """Recruiter leaderboard rows (totalSubmissions, totalPlacements, statusBreakdown), most submissions first."""
+    by_recruiter = {}
+    _add_to_recruiter_buckets(by_recruiter, submissions, placements)
+    return recruiter_leaderboard(by_recruiter)
+
+def recruiter_leaderboard(by_recruiter):
+    """Leaderboard rows from recruiter buckets, most submissions first."""
+    result = [
+        {
+            'recruiterId': rec['recruiterId'],
+            'name': rec['name'],
+            'totalSubmissions': rec['submissions'],
+            'totalPlacements': rec['placed'],
+            'statusBreakdown': rec['statusCounts']
+        }
+        for rec in by_recruiter.values()
+    ]
+    result.sort(key=lambda x: x['totalSubmissions'], reverse=True)
+    return result
+
+def aggregate_notes_by_user(notes):
+    """Count notes per commenting person, most notes first."""
+    user_map = {}
+    for n in (notes or []):
+        person = n.get('commentingPerson') or {}
+        uid = person.get('id')
+        name = f"{person.get('firstName', '')} {person.get('lastName', '')}".strip() or "Unknown"
+        if uid is None:
+            uid = 0
+        key = f"{uid}_{name}"
+        if key not in user_map:
+            user_map[key] = {'userId': uid, 'name': name, 'noteCount': 0}
+        user_map[key]['noteCount'] += 1
+    result = list(user_map.values())
+    result.sort(key=lambda x: x['noteCount'], reverse=True)
+    return result
+
+# Metrics for /api/analytics/timeseries: name -> (entity, row predicate or None for every row)
+TIMESERIES_METRICS = {
+    'submissions': ('JobSubmission', None),
+    'presented': ('JobSubmission', lambda row: is_presented_status(row.get('status'))),
+    'placements': ('Placement', None),
+    'booked': ('Placement', lambda row: classify_placement_status(row.get('status')) == 'booked'),
+    'cancelled': ('Placement', lambda row: classify_placement_status(row.get('status')) == 'cancelled'),
+    'notes': ('Note', None),
+}
+TIMESERIES_FIELDS = {
+    'JobSubmission': 'id,dateAdded,status,sendingUser(id,firstName,lastName)',
+    'Placement': 'id,dateAdded,status,owner(id,firstName,lastName)',
+    'Note': 'id,dateAdded,commentingPerson(id,firstName,lastName),action',
+}
+
+def compute_timeseries(rows_by_entity, index, metrics, owner_id=None):
+    """
+    Count metrics per calendar bucket.
+
+    Args:
+        rows_by_entity: Dict of entity -> rows in range
+        index: Result of calendar_index
+        metrics: Metric names from TIMESERIES_METRICS
+        owner_id: Optional recruiter id (sendingUser, Placement owner or Note commentingPerson)
+
+    Returns:
+        Dict with buckets (one per calendar bucket, empty ones included) and totals
+    """
+    counts = {metric: [0] * len(index['starts']) for metric in metrics}
+    for entity, rows in rows_by_entity.items():
+        entity_metrics = [(metric, TIMESERIES_METRICS[metric][1]) for metric in metrics
+                          if TIMESERIES_METRICS[metric][0] == entity]
+        for row in rows:
+            if owner_id is not None:
+                person = row.get('commentingPerson') if entity == 'Note' else (row.get('sendingUser') or row.get('owner'))
+                if str((person or {}).get('id')) != owner_id:
+                    continue
+            pos = bucket_position(index, row.get('dateAdded') or 0)
+            if pos is None:
+                continue
+            for metric, predicate in entity_metrics:
+                if predicate is None or predicate(row):
+                    counts[metric][pos] += 1
+
+    buckets = []
+    for pos, label in enumerate(index['labels']):
+        bucket = {'id': label, 'start': index['firstDays'][pos], 'end': index['lastDays'][pos]}
+        for metric in metrics:
+            bucket[metric] = counts[metric][pos]
+        buckets.append(bucket)
+    return {
+        'granularity': index['granularity'],
+        'metrics': list(metrics),
+        'buckets': buckets,
+        'totals': {metric: sum(counts[metric]) for metric in metrics},
+    }
+
+def parse_timeseries_metrics(value):
+    """Metric list from a comma-separated string (default submissions,placements). Raises ValueError if unknown."""
+    metrics = [m.strip() for m in (value or 'submissions,placements').split(',') if m.strip()]
+    unknown = [m for m in metrics if m not in TIMESERIES_METRICS]
+    if unknown or not metrics:
+        raise ValueError(f"Unknown metric(s): {', '.join(unknown)}. Use: {', '.join(TIMESERIES_METRICS)}")
+    return list(dict.fromkeys(metrics))
+
+# ==================== ANALYTICS CACHE & DETAILED INDEXES ====================
+
+ANALYTICS_CACHE_TTL_SECONDS = 300  # Cached Bullhorn datasets are reused for 5 minutes
+DETAILED_MAX_LIMIT = 1000  # Largest page the detailed endpoints will return
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYTICS_CACHE_MAX_ENTRIES', '512'))  # Least recently used go first
+ANALYTICS_CACHE_SWEEP_SECONDS = 60  # Expired entries are swept from cache_set at most this often
+
+_analytics_cache = OrderedDict()  # key -> (expires_at, value), least recently used first
+_analytics_cache_lock = threading.Lock()
+_analytics_cache_state = {'sweptAt': 0.0}
+
+def cache_get(key):
+    """Return a cached value, or None if missing or expired."""
+    ensure_snapshot_restored()
+    with _analytics_cache_lock:
+        entry = _analytics_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del _analytics_cache[key]
+            forget_shard_fields(key)
+            return None
+        _analytics_cache.move_to_end(key)
+        return value
+
+def cache_set(key, value, ttl=ANALYTICS_CACHE_TTL_SECONDS):
+    """Store a value in the in-process analytics cache for ttl seconds."""
+    with _analytics_cache_lock:
+        _analytics_cache[key] = (time.time() + ttl, value)
+        _analytics_cache.move_to_end(key)
+        remember_shard_fields(key)
+        trim_analytics_cache()
+    return value
+
+def trim_analytics_cache():
+    """Drop expired entries (at most every ANALYTICS_CACHE_SWEEP_SECONDS), then least recently used ones
+    beyond ANALYTICS_CACHE_MAX_ENTRIES. Call with _analytics_cache_lock held."""
+    now = time.time()
+    if now - _analytics_cache_state['sweptAt'] >= ANALYTICS_CACHE_SWEEP_SECONDS:
+        _analytics_cache_state['sweptAt'] = now
+        for key in [key for key, (expires_at, _) in _analytics_cache.items() if expires_at < now]:
+            del _analytics_cache[key]
+            forget_shard_fields(key)
+    while len(_analytics_cache) > ANALYTICS_CACHE_MAX_ENTRIES:
+        key, _ = _analytics_cache.popitem(last=False)
+        forget_shard_fields(key)
+
+def format_person_name(person):
+    """'First Last' for a Bullhorn person reference, or 'Unknown'."""
+    person = person or {}
+    return f"{person.get('firstName', '')} {person.get('lastName', '')}".strip() or 'Unknown'
+
+def format_date_ms(date_ms):
+    """Format a Bullhorn millisecond timestamp as 'YYYY-MM-DD HH:MM' (None if missing)."""
+    return datetime.fromtimestamp(date_ms / 1000).strftime('%Y-%m-%d %H:%M') if date_ms else None
+
+def format_detailed_submission(sub):
+    """Flatten a JobSubmission (candidate, job, client, sendingUser) into a detailed table row."""
+    candidate = sub.get('candidate', {}) or {}
+    job = sub.get('jobOrder', {}) or {}
+    client = job.get('clientCorporation', {}) or {}
+    owner = sub.get('sendingUser', {}) or {}
+    return {
+        'id': sub.get('id'),
+        'dateAdded': sub.get('dateAdded'),
+        'dateFormatted': format_date_ms(sub.get('dateAdded')),
+        'status': sub.get('status', 'Unknown'),
+        'candidateId': candidate.get('id'),
+        'candidateName': format_person_name(candidate),
+        'candidateEmail': candidate.get('email', ''),
+        'jobId': job.get('id'),
+        'jobTitle': job.get('title', 'Unknown'),
+        'clientName': client.get('name', 'Unknown'),
+        'ownerId': owner.get('id'),
+        'ownerName': format_person_name(owner)
+    }
+
+def format_detailed_placement(plc):
+    """Flatten a Placement (candidate, job, client, owner) into a detailed table row."""
+    return format_detailed_submission({**plc, 'sendingUser': plc.get('owner')})
+
+def format_detailed_job(job):
+    """Flatten a JobOrder (client, owner) into a detailed table row."""
+    owner = (job.get('owner') or {})
+    client = (job.get('clientCorporation') or {})
+    ts = job.get('dateAdded')
+    return {
+        'id': job.get('id'),
+        'dateAdded': ts,
+        'dateFormatted': format_date_ms(ts),
+        'title': job.get('title', 'Unknown'),
+        'status': job.get('status', 'Unknown'),
+        'isOpen': job.get('isOpen', False),
+        'clientName': client.get('name', 'Unknown'),
+        'ownerId': owner.get('id'),
+        'ownerName': format_person_name(owner)
+    }
+
+# kind -> (Bullhorn entity, fields, row formatter)
+DETAILED_DATASETS = {
+    'submissions': (
+        'JobSubmission',
+        'id,dateAdded,status,candidate(id,firstName,lastName,email),jobOrder(id,title,clientCorporation(id,name)),sendingUser(id,firstName,lastName)',
+        format_detailed_submission,
+    ),
+    'placements': (
+        'Placement',
+        'id,dateAdded,status,candidate(id,firstName,lastName,email),jobOrder(id,title,clientCorporation(id,name)),owner(id,firstName,lastName)',
+        format_detailed_placement,
+    ),
+    'jobs': (
+        'JobOrder',
+        'id,dateAdded,title,status,isOpen,clientCorporation(id,name),owner(id,firstName,lastName)',
+        format_detailed_job,
+    ),
+}
+
+# Filter param -> row field indexed with a hash index
+DETAILED_INDEXED_FIELDS = {'owner': 'ownerName', 'status': 'status', 'client': 'clientName'}
+
+def build_detailed_index(rows):
+    """
+    Index detailed rows for filtering: rows sorted newest first plus hash indexes
+    (value -> ascending row positions) for owner, status, client and open/closed.
+    """
+    rows = sorted(rows, key=lambda r: r.get('dateAdded') or 0, reverse=True)
+    index = {'rows': rows, 'by': {param: {} for param in DETAILED_INDEXED_FIELDS}}
+    index['by']['open'] = {}
+    for pos, row in enumerate(rows):
+        for param, field in DETAILED_INDEXED_FIELDS.items():
+            value = str(row.get(field) if row.get(field) is not None else '').strip()
+            index['by'][param].setdefault(value, []).append(pos)
+        if 'isOpen' in row:
+            is_open = row.get('isOpen') is True or row.get('isOpen') == 1
+            index['by']['open'].setdefault('open' if is_open else 'closed', []).append(pos)
+    return index
+
+def get_detailed_index(kind, start_ms, end_ms, refresh=False):
+    """Return the cached detailed index for a dataset kind and range, fetching from Bullhorn on a miss.
+    Returns None if the Bullhorn fetch fails."""
+    key = ('detailed', kind, start_ms, end_ms)
+    index = None if refresh else cache_get(key)
+    if index is None:
+        entity, fields, formatter = DETAILED_DATASETS[kind]
+        raw = fetch_rows_sharded(entity, fields, start_ms, end_ms, refresh=refresh)
+        if raw is None:
+            return None
+        index = cache_set(key, build_detailed_index([formatter(r) for r in raw]))
+    return index
+
+def match_detailed_filters(index, filters, skip=None):
+    """Ascending row positions matching every non-empty filter except `skip`, or None when no filter applies."""
+    postings = [index['by'].get(param, {}).get(value, [])
+                for param, value in filters.items() if value and param != skip]
+    if not postings:
+        return None
+    postings.sort(key=len)
+    matched = postings[0]
+    for other in postings[1:]:
+        other_set = set(other)
+        matched = [pos for pos in matched if pos in other_set]
+    return matched
+
+def query_detailed_index(index, filters, sort='-dateAdded', page=None, limit=None):
+    """
+    Resolve filters against a detailed index and return one page.
+
+    Args:
+        index: Result of build_detailed_index
+        filters: Dict of filter param (owner, status, client, open) -> exact value; empty values ignored
+        sort: Row field to sort by, prefixed with '-' for descending (default newest first)
+        page: 1-based page number (None returns every matching row)
+        limit: Page size
+
+    Returns:
+        Dict with data, total (matching rows), available (all rows), page, limit and facets. Facet
+        counts apply every active filter except the facet's own, so each lists the values still
+        selectable alongside the other filters.
+    """
+    rows = index['rows']
+    matched = match_detailed_filters(index, filters)
+    if matched is None:
+        matched = range(len(rows))
+
+    descending = sort.startswith('-')
+    sort_field = sort.lstrip('-') or 'dateAdded'
+    if sort_field == 'dateAdded':
+        # Positions are already newest first; reverse for ascending
+        ordered = [rows[pos] for pos in (matched if descending else reversed(matched))]
+    else:
+        ordered = sorted(
+            (rows[pos] for pos in matched),
+            key=lambda r: str(r.get(sort_field) if r.get(sort_field) is not None else '').lower(),
+            reverse=descending
+        )
+
+    total = len(ordered)
+    if page is not None or limit is not None:
+        limit = max(1, min(limit or 100, DETAILED_MAX_LIMIT))
+        page = max(1, page or 1)
+        ordered = ordered[(page - 1) * limit:page * limit]
+
+    facets = {}
+    for param, by_value in index['by'].items():
+        allowed = match_detailed_filters(index, filters, skip=param)
+        allowed = None if allowed is None else set(allowed)
+        counts = []
+        for value, positions in by_value.items():
+            count = len(positions) if allowed is None else sum(1 for pos in positions if pos in allowed)
+            if value and count:
+                counts.append({'value': value, 'count': count})
+        facets[param] = sorted(counts, key=lambda f: f['value'].lower())
+
+    return {
+        'data': ordered,
+        'total': total,
+        'available': len(rows),
+        'page': page,
+        'limit': limit,
+        'facets': facets,
+    }
+
+def detailed_response(kind):
+    """Shared handler for the detailed endpoints: filter (owner, status, client, open), sort and page/limit."""
+    tokens = load_tokens()
+    if not tokens or not tokens.get('bh_rest_token'):
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    start_ms, end_ms = parse_date_range_from_request()
+    args = request.args
+
+    try:
+        index = get_detailed_index(kind, start_ms, end_ms, refresh=args.get('refresh', 'false').lower() == 'true')
+        if index is None:
+            return jsonify({'success': False, 'error': 'Failed to fetch data from Bullhorn'}), 500
+
+        filters = {param: args.get(param, '').strip() for param in list(DETAILED_INDEXED_FIELDS) + ['open']}
+        result = query_detailed_index(
+            index,
+            filters,
+            sort=args.get('sort', '-dateAdded'),
+            page=args.get('page', type=int),
+            limit=args.get('limit', type=int)
+        )
+        return jsonify({'success': True, 'count': len(result['data']), **result})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# ==================== MONTH SHARDS ====================
+
+SHARD_CLOSED_TTL_SECONDS = 6 * 3600  # Months that have ended rarely change
+SHARD_OPEN_TTL_SECONDS = ANALYTICS_CACHE_TTL_SECONDS  # The current month keeps changing
+SHARD_MAX_ROWS = 10000  # Row budget per entity-month
+SHARD_MAX_MONTHS = 36  # Wider ranges are fetched directly rather than month by month
+
+_shard_fields = {}  # (entity, year, month) -> field selectors cached for that month (guarded by _analytics_cache_lock)
+
+def month_shards(start_ms, end_ms):
+    """Calendar months overlapping a range as (year, month, first_ms, last_ms), newest first."""
+    start = datetime.fromtimestamp(start_ms / 1000)
+    cursor = datetime(start.year, start.month, 1)
+    shards = []
+    while int(cursor.timestamp() * 1000) <= end_ms:
+        following = shift_months(cursor, 1)
+        shards.append((cursor.year, cursor.month, int(cursor.timestamp() * 1000), int(following.timestamp() * 1000) - 1))
+        cursor = following
+    return shards[::-1]
+
+def field_selector_covers(have, want):
+    """True if fields selector `have` includes everything `want` selects (nested selections included)."""
+    def covers(have_tree, want_tree):
+        return all(name in have_tree and covers(have_tree[name], sub) for name, sub in want_tree.items())
+    return covers(parse_field_selector(have), parse_field_selector(want))
+
+def remember_shard_fields(key):
+    """Register a shard cache key's field selector. Call with _analytics_cache_lock held."""
+    if key[0] == 'shard':
+        _, entity, year, month, fields = key
+        _shard_fields.setdefault((entity, year, month), set()).add(fields)
+
+def forget_shard_fields(key):
+    """Drop an evicted or expired shard's field selector, and the month once none are left.
+    Call with _analytics_cache_lock held."""
+    if key[0] == 'shard':
+        _, entity, year, month, fields = key
+        selectors = _shard_fields.get((entity, year, month))
+        if selectors is not None:
+            selectors.discard(fields)
+            if not selectors:
+                del _shard_fields[(entity, year, month)]
+
+def get_cached_shard(entity, fields, year, month):
+    """Cached rows of one entity-month fetched with these fields, or with a superset of them."""
+    rows = cache_get(('shard', entity, year, month, fields))
+    if rows is not None:
+        return rows
+    with _analytics_cache_lock:
+        others = list(_shard_fields.get((entity, year, month), ()))
+    for other in others:
+        if other != fields and field_selector_covers(other, fields):
+            rows = cache_get(('shard', entity, year, month, other))
+            if rows is not None:
+                return rows
+    return None
+
+def fetch_shard(entity, fields, year, month, first_ms, last_ms):
+    """Fetch and cache one entity-month. Closed months are kept far longer than the current one."""
+    rows = fetch_bullhorn_rows(entity, fields, first_ms, last_ms, max_rows=SHARD_MAX_ROWS)
+    if rows is None:
+        return None
+    ttl = SHARD_CLOSED_TTL_SECONDS if last_ms < time.time() * 1000 else SHARD_OPEN_TTL_SECONDS
+    cache_set(('shard', entity, year, month, fields), rows, ttl=ttl)
+    if entity in ROLLUP_FIELDS and field_selector_covers(fields, ROLLUP_FIELDS[entity]):
+        feed_month_rollup(entity, year, month, rows, complete=len(rows) < SHARD_MAX_ROWS)
+    return rows
+
+def fetch_rows_sharded(entity, fields, start_ms, end_ms, max_rows=SHARD_MAX_ROWS, refresh=False):
+    """
+    fetch_bullhorn_rows backed by calendar-month shards: the range is assembled from cached
+    entity-months and only missing months are fetched (concurrently).
+
+    Args:
+        entity: Bullhorn entity name
+        fields: Bullhorn fields selector (a cached shard with a superset of these fields is reused)
+        start_ms: Start timestamp in milliseconds
+        end_ms: End timestamp in milliseconds
+        max_rows: Return at most this many rows (newest first, as a direct fetch would); None for all
+        refresh: Ignore cached shards and refetch every month in range
+
+    Returns:
+        List of records (newest first) or None on error
+    """
+    now_ms = time.time() * 1000
+    shards = [s for s in month_shards(start_ms, end_ms) if s[2] <= now_ms]  # Nothing is added in the future
+    if len(shards) > SHARD_MAX_MONTHS:
+        return fetch_bullhorn_rows(entity, fields, start_ms, end_ms, max_rows=max_rows or SHARD_MAX_ROWS)
+
+    month_rows = {}
+    missing = {}
+    for year, month, first_ms, last_ms in shards:
+        rows = None if refresh else get_cached_shard(entity, fields, year, month)
+        if rows is None:
+            missing[(year, month)] = (fetch_shard, (entity, fields, year, month, first_ms, last_ms))
+        else:
+            month_rows[(year, month)] = rows
+
+    if missing:
+        fetched, _, error = fetch_entities_concurrently(
+            {f"{entity}-{year}-{month:02d}": query for (year, month), query in missing.items()})
+        if error:
+            return None
+        for year, month in missing:
+            month_rows[(year, month)] = fetched[f"{entity}-{year}-{month:02d}"]
+
+    result = []
+    for year, month, _, _ in shards:
+        for row in month_rows[(year, month)]:
+            if start_ms <= (row.get('dateAdded') or 0) <= end_ms:
+                result.append(row)
+                if max_rows is not None and len(result) >= max_rows:
+                    return result
+    return result
+
+# ==================== COUNT PROBES ====================
+
+STATUS_OPTIONS_TTL_SECONDS = 24 * 3600  # Picklist values change rarely
+
+def fetch_bullhorn_total(entity, where, timeout=30):
+    """
+    Count records matching a where clause without downloading them: query/<Entity> with count=1
+    and showTotalMatched=true, reading 'total' from the response.
+
+    Returns:
+        Matching record count, or None on error
+    """
+    tokens = load_tokens()
+    if not tokens or not tokens.get('bh_rest_token'):
+        return None
+
+    try:
+        rest_url = tokens['rest_url']
+        if not rest_url.endswith('/'):
+            rest_url += '/'
+        if fetch_cancelled():
+            return None
+        params = {
+            'BhRestToken': tokens['bh_rest_token'],
+            'where': where,
+            'fields': 'id',
+            'count': 1,
+            'showTotalMatched': 'true'
+        }
+        response = upstream_get(f"{rest_url}query/{entity}", params=params, timeout=fetch_time_remaining(timeout))
+        response.raise_for_status()
+        data = response.json()
+        return int(data.get('total', data.get('count', 0)))
+    except Exception as e:
+        print(f"Error counting {entity} rows: {e}")
+        return None
+
+def fetch_cached_total(entity, where):
+    """fetch_bullhorn_total through the analytics cache (keyed by entity and where clause)."""
+    key = ('count', entity, where)
+    total = cache_get(key)
+    if total is None:
+        total = fetch_bullhorn_total(entity, where)
+        if total is not None:
+            cache_set(key, total)
+    return total
+
+def count_bullhorn_probes(probes):
+    """
+    Run count probes concurrently.
+
+    Args:
+        probes: Dict of name -> (entity, where clause)
+
+    Returns:
+        (counts, timings, error, cached): counts maps name -> total (None if failed),
+        cached is how many probes were answered from the cache
+    """
+    counts = {}
+    pending = {}
+    for name, (entity, where) in probes.items():
+        total = cache_get(('count', entity, where))
+        if total is None:
+            pending[name] = (fetch_cached_total, (entity, where))
+        else:
+            counts[name] = total
+    cached = len(counts)
+    fetched, timings, error = fetch_entities_concurrently(pending) if pending else ({}, {}, None)
+    counts.update(fetched)
+    return counts, timings, error, cached
+
+def bullhorn_quote(value):
+    """Quote a string for a Bullhorn where clause."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def fetch_status_options(entity):
+    """Raw picklist values of an entity's status field from meta/<Entity>, cached. Empty list if unavailable."""
+    key = ('status-options', entity)
+    options = cache_get(key)
+    if options is not None:
+        return options
+
+    tokens = load_tokens()
+    if not tokens or not tokens.get('bh_rest_token'):
+        return []
+    try:
+        rest_url = tokens['rest_url']
+        if not rest_url.endswith('/'):
+            rest_url += '/'
+        params = {'BhRestToken': tokens['bh_rest_token'], 'fields': 'status', 'meta': 'full'}
+        response = upstream_get(f"{rest_url}meta/{entity}", params=params, timeout=fetch_time_remaining(30))
+        response.raise_for_status()
+        options = []
+        for field in response.json().get('fields', []):
+            if field.get('name') == 'status':
+                options = [o.get('value') for o in field.get('options') or [] if o.get('value')]
+        return cache_set(key, options, ttl=STATUS_OPTIONS_TTL_SECONDS)
+    except Exception as e:
+        print(f"Error fetching {entity} status options: {e}")
+        return cache_set(key, [])
+
+def status_bucket_clause(bucket, options):
+    """
+    'status IN (...)' for a STATUS_CLASSIFICATION bucket. Bullhorn matches exact spellings, so the
+    picklist values that normalize into the bucket are used, plus the capitalized canonical names.
+    """
+    spellings = {status.capitalize() for status in STATUS_CLASSIFICATION[bucket]}
+    spellings.update(option for option in options if classify_placement_status(option) == bucket)
+    return f"status IN ({','.join(bullhorn_quote(s) for s in sorted(spellings))})"
+
+def compute_kpis(start_ms, end_ms, owner_ids=()):
+    """
+    Top-line counts for a range from count probes only (no rows downloaded).
+
+    Args:
+        start_ms: Start timestamp in milliseconds
+        end_ms: End timestamp in milliseconds
+        owner_ids: Optional recruiter ids; adds per-recruiter submission (sendingUser),
+            placement and booked (placement owner) counts
+
+    Returns:
+        Dict with kpis, byOwner, probes and cachedProbes, or None if a probe failed; plus timings
+    """
+    in_range = f"dateAdded>={start_ms} AND dateAdded<={end_ms}"
+    options = fetch_status_options('Placement')
+    booked = status_bucket_clause('booked', options)
+    cancelled = status_bucket_clause('cancelled', options)
+
+    probes = {
+        'submissions': ('JobSubmission', in_range),
+        'placements': ('Placement', in_range),
+        'booked': ('Placement', f"{in_range} AND {booked}"),
+        'cancelled': ('Placement', f"{in_range} AND {cancelled}"),
+    }
+    for owner_id in owner_ids:
+        probes[f"submissions-{owner_id}"] = ('JobSubmission', f"{in_range} AND sendingUser.id={int(owner_id)}")
+        probes[f"placements-{owner_id}"] = ('Placement', f"{in_range} AND owner.id={int(owner_id)}")
+        probes[f"booked-{owner_id}"] = ('Placement', f"{in_range} AND owner.id={int(owner_id)} AND {booked}")
+
+    counts, timings, error, cached = count_bullhorn_probes(probes)
+    if error:
+        return None, timings
+
+    total_submissions = counts['submissions']
+    total_ever_booked = counts['booked'] + counts['cancelled']
+    kpis = {
+        'totalSubmissions': total_submissions,
+        'totalPlacements': counts['placements'],
+        'totalBooked': counts['booked'],
+        'totalCancelled': counts['cancelled'],
+        'totalEverBooked': total_ever_booked,
+        'conversionRate': round(counts['booked'] / total_submissions * 100, 1) if total_submissions else 0,
+        'cancelledShare': (counts['cancelled'] / total_ever_booked * 100) if total_ever_booked else None,
+    }
+    by_owner = {
+        str(owner_id): {
+            'submissions': counts[f"submissions-{owner_id}"],
+            'placements': counts[f"placements-{owner_id}"],
+            'booked': counts[f"booked-{owner_id}"],
+        }
+        for owner_id in owner_ids
+    }
+    return {'kpis': kpis, 'byOwner': by_owner, 'probes': len(probes), 'cachedProbes': cached}, timings
+
+# ==================== ROLLUP STORE ====================
+
+# Closed months are aggregated into SQLite as counters per (month, week, recruiter, status), with
+# each row's contribution recorded so it can be retracted when the row changes or disappears.
+# A stored month is re-validated against Bullhorn at most hourly; only rows modified after its
+# dateLastModified watermark are refetched and applied, so upkeep costs O(changed rows).
+ROLLUP_DB_PATH = os.environ.get('ROLLUP_DB_PATH', 'rollups.db')
+ROLLUP_RECHECK_SECONDS = 3600
+
+ROLLUP_FIELDS = {
+    'JobSubmission': 'id,dateAdded,dateLastModified,status,sendingUser(id,firstName,lastName)',
+    'Placement': 'id,dateAdded,dateLastModified,status,owner(id,firstName,lastName)',
+}
+
+_rollup_lock = threading.RLock()
+_rollup_schema_ready = False
+
+def rollup_db():
+    """Open the analytics database (rollups, the submission link index, background tasks, AHSA
+    snapshots and the sync journal), creating the schema on first use."""
+    global _rollup_schema_ready
+    conn = sqlite3.connect(ROLLUP_DB_PATH, timeout=30)
+    if not _rollup_schema_ready:
+        with _rollup_lock:
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(rollups)')]
+            if columns and 'week_start' not in columns:
+                # Month-only counters from an older layout: rebuild from Bullhorn
+                conn.executescript('DROP TABLE rollups; DROP TABLE IF EXISTS rollup_months;')
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS rollup_months (
+                    entity TEXT NOT NULL,
+                    year INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    row_count INTEGER NOT NULL,
+                    watermark INTEGER NOT NULL,
+                    computed_at REAL NOT NULL,
+                    checked_at REAL NOT NULL,
+                    PRIMARY KEY (entity, year, month)
+                );
+                CREATE TABLE IF NOT EXISTS rollups (
+                    entity TEXT NOT NULL,
+                    year INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    week_start TEXT NOT NULL,
+                    recruiter_id INTEGER,
+                    recruiter_name TEXT NOT NULL,
+                    status TEXT,
+                    count INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS rollups_by_month ON rollups (entity, year, month);
+                CREATE TABLE IF NOT EXISTS rollup_rows (
+                    entity TEXT NOT NULL,
+                    row_id INTEGER NOT NULL,
+                    year INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    week_start TEXT NOT NULL,
+                    recruiter_id INTEGER,
+                    recruiter_name TEXT NOT NULL,
+                    status TEXT,
+                    date_last_modified INTEGER NOT NULL,
+                    PRIMARY KEY (entity, row_id)
+                );
+                CREATE INDEX IF NOT EXISTS rollup_rows_by_month ON rollup_rows (entity, year, month);
+                CREATE TABLE IF NOT EXISTS submission_links (
+                    submission_id INTEGER PRIMARY KEY,
+                    candidate_id INTEGER,
+                    job_order_id INTEGER,
+                    date_added INTEGER NOT NULL,
+                    date_last_modified INTEGER NOT NULL,
+                    sending_user_id INTEGER,
+                    sending_user_name TEXT,
+                    status TEXT
+                );
+                CREATE INDEX IF NOT EXISTS submission_links_by_pair ON submission_links (candidate_id, job_order_id);
+                CREATE INDEX IF NOT EXISTS submission_links_by_date ON submission_links (date_added);
+                CREATE TABLE IF NOT EXISTS submission_link_months (
+                    year INTEGER NOT NULL,
+                    month INTEGER NOT NULL,
+                    watermark INTEGER NOT NULL,
+                    synced_at REAL NOT NULL,
+                    PRIMARY KEY (year, month)
+                );
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    dedupe_key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    phase TEXT NOT NULL,
+                    fetched INTEGER NOT NULL DEFAULT 0,
+                    upserted INTEGER NOT NULL DEFAULT 0,
+                    errors TEXT NOT NULL DEFAULT '[]',
+                    error_count INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    updated_at REAL NOT NULL,
+                    owner TEXT,
+                    heartbeat_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS tasks_by_key ON tasks (dedupe_key, status);
+                CREATE TABLE IF NOT EXISTS ahsa_snapshots (
+                    id TEXT PRIMARY KEY,
+                    job_count INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    payload BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS sync_runs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    cursor TEXT NOT NULL DEFAULT '{}',
+                    rows INTEGER NOT NULL DEFAULT 0,
+                    chunks INTEGER NOT NULL DEFAULT 0,
+                    last_id TEXT,
+                    resumes INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    started_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS sync_runs_by_kind ON sync_runs (kind, started_at);
+                CREATE TABLE IF NOT EXISTS sync_checkpoints (
+                    run_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    page_offset INTEGER NOT NULL,
+                    rows INTEGER NOT NULL,
+                    last_id TEXT,
+                    ids TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    committed_at REAL,
+                    PRIMARY KEY (run_id, seq)
+                );
+            """)
+            task_columns = [row[1] for row in conn.execute('PRAGMA table_info(tasks)')]
+            if 'owner' not in task_columns:
+                conn.executescript('ALTER TABLE tasks ADD COLUMN owner TEXT; ALTER TABLE tasks ADD COLUMN heartbeat_at REAL;')
+            _rollup_schema_ready = True
+    return conn
+
+def rollup_contribution(row):
+    """(year, month, week start, recruiter id, recruiter name, status) counter a row adds to, or None without dateAdded."""
+    if not row.get('dateAdded'):
+        return None
+    added = datetime.fromtimestamp(row['dateAdded'] / 1000)
+    week_start = get_week_range(row['dateAdded'])[0].strftime('%Y-%m-%d')
+    return (added.year, added.month, week_start, get_recruiter_id(row), get_recruiter_name(row), row.get('status', 'Unknown'))
+
+def rollup_counts_from_rows(rows):
+    """(week start, recruiter id, recruiter name, status) -> row count, the key used for all rollup counts."""
+    counts = {}
+    for row in rows:
+        contribution = rollup_contribution(row)
+        if contribution is None:
+            continue
+        key = contribution[2:]
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+def merge_rollup_counts(target, counts):
+    for key, count in counts.items():
+        target[key] = target.get(key, 0) + count
+    return target
+
+def _bump_rollup(conn, entity, contribution, delta):
+    year, month, week_start, recruiter_id, recruiter_name, status = contribution
+    match = ('entity=? AND year=? AND month=? AND week_start=? AND recruiter_id IS ? AND recruiter_name=? AND status IS ?')
+    params = (entity, year, month, week_start, recruiter_id, recruiter_name, status)
+    updated = conn.execute(f'UPDATE rollups SET count = count + ? WHERE {match}', (delta,) + params).rowcount
+    if not updated and delta > 0:
+        conn.execute('INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?)', params + (delta,))
+    elif updated and delta < 0:
+        conn.execute(f'DELETE FROM rollups WHERE count <= 0 AND {match}', params)
+
+def apply_rollup_changes(entity, rows=(), deleted_ids=()):
+    """
+    Incrementally maintain stored counters: each new or changed row retracts its previous
+    contribution (if any) and applies its current one; deleted ids are retracted and forgotten.
+    Rows landing in a month that is not stored are only retracted from where they were.
+
+    Args:
+        entity: JobSubmission or Placement
+        rows: New or changed records (id, dateAdded, dateLastModified, status, recruiter)
+        deleted_ids: Ids of records that no longer exist
+
+    Returns:
+        Set of (year, month) whose counters changed
+    """
+    with _rollup_lock, closing(rollup_db()) as conn, conn:
+        return _apply_rollup_changes(conn, entity, rows, deleted_ids)
+
+def _apply_rollup_changes(conn, entity, rows=(), deleted_ids=()):
+    """apply_rollup_changes inside the caller's transaction."""
+    touched = set()
+    stored_months = {
+        (year, month) for year, month in
+        conn.execute('SELECT year, month FROM rollup_months WHERE entity=?', (entity,))
+    }
+
+    def retract(row_id):
+        old = conn.execute(
+            'SELECT year, month, week_start, recruiter_id, recruiter_name, status FROM rollup_rows '
+            'WHERE entity=? AND row_id=?', (entity, row_id)
+        ).fetchone()
+        if old is not None:
+            _bump_rollup(conn, entity, old, -1)
+            conn.execute('DELETE FROM rollup_rows WHERE entity=? AND row_id=?', (entity, row_id))
+            touched.add((old[0], old[1]))
+
+    for row_id in deleted_ids:
+        retract(row_id)
+    for row in rows:
+        retract(row.get('id'))
+        contribution = rollup_contribution(row)
+        if contribution is None or contribution[:2] not in stored_months:
+            continue
+        _bump_rollup(conn, entity, contribution, 1)
+        conn.execute(
+            'INSERT INTO rollup_rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (entity, row.get('id')) + contribution + (row.get('dateLastModified') or 0,)
+        )
+        touched.add(contribution[:2])
+
+    for year, month in touched & stored_months:
+        conn.execute(
+            'UPDATE rollup_months SET '
+            'row_count = (SELECT COUNT(*) FROM rollup_rows WHERE entity=? AND year=? AND month=?), '
+            'watermark = MAX(watermark, (SELECT COALESCE(MAX(date_last_modified), 0) FROM rollup_rows '
+            'WHERE entity=? AND year=? AND month=?)) '
+            'WHERE entity=? AND year=? AND month=?',
+            (entity, year, month) * 3
+        )
+    return touched
+
+def feed_month_rollup(entity, year, month, rows, complete=False):
+    """
+    Apply rows of one entity-month fetched for another purpose (a shard, the link index) to its
+    stored rollup, so a change reaches the counters without waiting for the hourly re-check.
+    Only rows modified after the month's watermark are applied; a no-op for months not stored.
+
+    Args:
+        entity: JobSubmission or Placement
+        year, month: The calendar month every row was added in
+        rows: Records carrying at least the ROLLUP_FIELDS of the entity (just id with complete)
+        complete: rows are every record of the month, so stored ids missing from them are retracted
+    """
+    with closing(rollup_db()) as conn:
+        meta = conn.execute('SELECT watermark FROM rollup_months WHERE entity=? AND year=? AND month=?',
+                            (entity, year, month)).fetchone()
+        if meta is None:
+            return
+        stored_ids = [r[0] for r in conn.execute(
+            'SELECT row_id FROM rollup_rows WHERE entity=? AND year=? AND month=?', (entity, year, month))]
+    changed = [row for row in rows if (row.get('dateLastModified') or 0) > meta[0]]
+    gone = []
+    if complete:
+        current_ids = {row.get('id') for row in rows}
+        gone = [row_id for row_id in stored_ids if row_id not in current_ids]
+    if changed or gone:
+        apply_rollup_changes(entity, changed, gone)
+
+def store_month_rollup(entity, year, month, rows):
+    """Compute one entity-month from all of its rows, replacing anything stored for it. One
+    transaction, so a concurrent reader never sees the month stored with only some of its rows."""
+    now = time.time()
+    with _rollup_lock, closing(rollup_db()) as conn, conn:
+        conn.execute('DELETE FROM rollups WHERE entity=? AND year=? AND month=?', (entity, year, month))
+        conn.execute('DELETE FROM rollup_rows WHERE entity=? AND year=? AND month=?', (entity, year, month))
+        conn.execute(
+            'INSERT OR REPLACE INTO rollup_months VALUES (?, ?, ?, 0, 0, ?, ?)',
+            (entity, year, month, now, now)
+        )
+        _apply_rollup_changes(conn, entity, rows)
+
+def load_month_rollup(entity, year, month):
+    """Stored (meta, counts) for one entity-month; meta is None if never computed."""
+    with closing(rollup_db()) as conn:
+        meta = conn.execute(
+            'SELECT row_count, watermark, checked_at FROM rollup_months WHERE entity=? AND year=? AND month=?',
+            (entity, year, month)
+        ).fetchone()
+        if meta is None:
+            return None, {}
+        rows = conn.execute(
+            'SELECT week_start, recruiter_id, recruiter_name, status, count FROM rollups '
+            'WHERE entity=? AND year=? AND month=?',
+            (entity, year, month)
+        ).fetchall()
+    meta = {'row_count': meta[0], 'watermark': meta[1], 'checked_at': meta[2]}
+    return meta, {(week_start, rid, name, status): count for week_start, rid, name, status, count in rows}
+
+def refresh_month_rollup(entity, year, month, first_ms, last_ms, meta):
+    """
+    Bring a stored month up to date with Bullhorn: apply rows modified after the watermark and
+    retract rows that have disappeared. Returns False if Bullhorn could not be reached.
+    """
+    in_month = f"dateAdded>={first_ms} AND dateAdded<={last_ms}"
+    total = fetch_bullhorn_total(entity, in_month)
+    modified = fetch_bullhorn_total(entity, f"{in_month} AND dateLastModified>{meta['watermark']}")
+    if total is None or modified is None:
+        return False
+
+    if modified:
+        changed = fetch_bullhorn_rows(entity, ROLLUP_FIELDS[entity], first_ms, last_ms, max_rows=SHARD_MAX_ROWS,
+                                      where=f"dateLastModified>{meta['watermark']}")
+        if changed is None:
+            return False
+        apply_rollup_changes(entity, changed)
+        print(f"📦 Applied {len(changed)} changed {entity} rows to {year}-{month:02d}")
+
+    with closing(rollup_db()) as conn:
+        stored = conn.execute('SELECT row_count FROM rollup_months WHERE entity=? AND year=? AND month=?',
+                              (entity, year, month)).fetchone()[0]
+    if stored != total:
+        # Rows were removed (or moved out of the month): retract the ids Bullhorn no longer returns
+        current = fetch_bullhorn_rows(entity, 'id', first_ms, last_ms, max_rows=SHARD_MAX_ROWS)
+        if current is None:
+            return False
+        current_ids = {row.get('id') for row in current}
+        with closing(rollup_db()) as conn:
+            stored_ids = [r[0] for r in conn.execute(
+                'SELECT row_id FROM rollup_rows WHERE entity=? AND year=? AND month=?', (entity, year, month))]
+        gone = [row_id for row_id in stored_ids if row_id not in current_ids]
+        apply_rollup_changes(entity, deleted_ids=gone)
+        print(f"📦 Retracted {len(gone)} removed {entity} rows from {year}-{month:02d}")
+
+    with _rollup_lock, closing(rollup_db()) as conn, conn:
+        conn.execute('UPDATE rollup_months SET checked_at=? WHERE entity=? AND year=? AND month=?',
+                     (time.time(), entity, year, month))
+    return True
+
+def get_month_rollup(entity, year, month, first_ms, last_ms):
+    """
+    Rollup counts of one closed entity-month, computing or re-validating the stored copy as needed.
+
+    Returns:
+        Dict of (week start, recruiter id, recruiter name, status) -> count, or None if Bullhorn could not be reached
+    """
+    meta, counts = load_month_rollup(entity, year, month)
+    if meta is not None and time.time() - meta['checked_at'] < ROLLUP_RECHECK_SECONDS:
+        return counts
+
+    if meta is not None:
+        if not refresh_month_rollup(entity, year, month, first_ms, last_ms, meta):
+            return None
+        return load_month_rollup(entity, year, month)[1]
+
+    rows = fetch_bullhorn_rows(entity, ROLLUP_FIELDS[entity], first_ms, last_ms, max_rows=SHARD_MAX_ROWS)
+    if rows is None:
+        return None
+    print(f"📦 Rolled up {entity} {year}-{month:02d} ({len(rows)} rows)")
+    store_month_rollup(entity, year, month, rows)
+    return load_month_rollup(entity, year, month)[1]
+
+def closed_rollup_months(start_ms, end_ms):
+    """Calendar months lying wholly inside a range that have already ended (oldest first)."""
+    now_ms = time.time() * 1000
+    return [
+        (year, month, first_ms, last_ms)
+        for year, month, first_ms, last_ms in reversed(month_shards(start_ms, end_ms))
+        # Ranges end at 23:59:59.000; a month runs to its last millisecond
+        if first_ms >= start_ms and last_ms - 999 <= end_ms and last_ms < now_ms
+    ]
+
+def rollup_range_counts(start_ms, end_ms, row_fields):
+    """
+    Per-entity rollup counts for a range: closed whole months from the rollup store, any
+    remainder before/after them counted from (month-sharded) rows.
+
+    Args:
+        start_ms: Start timestamp in milliseconds
+        end_ms: End timestamp in milliseconds
+        row_fields: Dict of entity -> fields selector for the remainder rows
+
+    Returns:
+        (counts, timings, error): counts maps entity -> rollup counts, or is None if the range
+        has no closed whole month (callers fall back to raw rows)
+    """
+    months = closed_rollup_months(start_ms, end_ms)
+    if not months:
+        return None, {}, None
+
+    segments = []
+    if start_ms < months[0][2]:
+        segments.append((start_ms, months[0][2] - 1))
+    if months[-1][3] < end_ms:
+        segments.append((months[-1][3] + 1, end_ms))
+
+    queries = {}
+    for entity, fields in row_fields.items():
+        for year, month, first_ms, last_ms in months:
+            queries[f"rollup-{entity}-{year}-{month:02d}"] = (get_month_rollup, (entity, year, month, first_ms, last_ms))
+        for pos, (seg_start, seg_end) in enumerate(segments):
+            queries[f"rows-{entity}-{pos}"] = (fetch_rows_sharded, (entity, fields, seg_start, seg_end))
+
+    fetched, timings, error = fetch_entities_concurrently(queries)
+    if error:
+        return {}, timings, error
+
+    counts = {entity: {} for entity in row_fields}
+    for name, result in fetched.items():
+        entity = name.split('-')[1]
+        merge_rollup_counts(counts[entity], result if name.startswith('rollup-') else rollup_counts_from_rows(result))
+    return counts, timings, None
+
+def recruiter_buckets_from_counts(submission_counts, placement_counts):
+    """Rollup-count twin of _add_to_recruiter_buckets."""
+    by_recruiter = {}
+    for (_, recruiter_id, recruiter_name, status), count in submission_counts.items():
+        recruiter_key = f"{recruiter_id}_{recruiter_name}"
+        if recruiter_key not in by_recruiter:
+            by_recruiter[recruiter_key] = _new_recruiter_bucket(recruiter_id, recruiter_name)
+        rec_data = by_recruiter[recruiter_key]
+        rec_data['submissions'] += count
+        if is_presented_status(status):
+            rec_data['presented'] += count
+        rec_data['statusCounts'][status] = rec_data['statusCounts'].get(status, 0) + count
+    for (_, recruiter_id, recruiter_name, _), count in placement_counts.items():
+        recruiter_key = f"{recruiter_id}_{recruiter_name}"
+        if recruiter_key not in by_recruiter:
+            by_recruiter[recruiter_key] = _new_recruiter_bucket(recruiter_id, recruiter_name)
+        by_recruiter[recruiter_key]['placed'] += count
+    return by_recruiter
+
+def rollup_recruiters(start_ms, end_ms):
+    """aggregate_recruiters for a range served from the rollup store. Returns (result, timings, error);
+    result is None when the range has no closed whole month."""
+    counts, timings, error = rollup_range_counts(start_ms, end_ms, {
+        'JobSubmission': RECRUITER_SUBMISSION_FIELDS,
+        'Placement': RECRUITER_PLACEMENT_FIELDS,
+    })
+    if counts is None or error:
+        return None, timings, error
+    by_recruiter = recruiter_buckets_from_counts(counts['JobSubmission'], counts['Placement'])
+    return recruiter_leaderboard(by_recruiter), timings, None
+
+def rollup_monthly(start_date, end_date):
+    """aggregate_monthly for a closed month served from the rollup store. Returns (result, timings, error);
+    result is None when the month has not ended yet."""
+    start_ms, end_ms = int(start_date.timestamp() * 1000), int(end_date.timestamp() * 1000)
+    counts, timings, error = rollup_range_counts(start_ms, end_ms, {
+        'JobSubmission': RECRUITER_SUBMISSION_FIELDS,
+        'Placement': RECRUITER_PLACEMENT_FIELDS,
+    })
+    if counts is None or error:
+        return None, timings, error
+    submission_counts, placement_counts = counts['JobSubmission'], counts['Placement']
+    result = {
+        'monthStart': start_date.strftime('%Y-%m-%d'),
+        'monthEnd': end_date.strftime('%Y-%m-%d'),
+        'submissions': sum(submission_counts.values()),
+        'presented': sum(n for (_, _, _, status), n in submission_counts.items() if is_presented_status(status)),
+        'placed': sum(placement_counts.values()),
+        'byRecruiter': list(recruiter_buckets_from_counts(submission_counts, placement_counts).values())
+    }
+    return result, timings, None
+
+def rollup_weekly(start_date, end_date):
+    """aggregate_weekly for a closed month served from the week counters of the rollup store.
+    Returns (result, timings, error); result is None when the month has not ended yet."""
+    start_ms, end_ms = int(start_date.timestamp() * 1000), int(end_date.timestamp() * 1000)
+    counts, timings, error = rollup_range_counts(start_ms, end_ms, {
+        'JobSubmission': RECRUITER_SUBMISSION_FIELDS,
+        'Placement': RECRUITER_PLACEMENT_FIELDS,
+    })
+    if counts is None or error:
+        return None, timings, error
+    weeks = {}
+    for entity, entity_counts in counts.items():
+        for key, count in entity_counts.items():
+            weeks.setdefault(key[0], ({}, {}))[0 if entity == 'JobSubmission' else 1][key] = count
+    result = []
+    for week_key in sorted(weeks):
+        submission_counts, placement_counts = weeks[week_key]
+        week_end = datetime.strptime(week_key, '%Y-%m-%d') + timedelta(days=6)
+        result.append({
+            'weekStart': week_key,
+            'weekEnd': week_end.strftime('%Y-%m-%d'),
+            'submissions': sum(submission_counts.values()),
+            'presented': sum(n for (_, _, _, status), n in submission_counts.items() if is_presented_status(status)),
+            'placed': sum(placement_counts.values()),
+            'byRecruiter': list(recruiter_buckets_from_counts(submission_counts, placement_counts).values())
+        })
+    return result, timings, None
+
+# ==================== COHORTS ====================
+
+# Persistent (candidate, job) join index: every JobSubmission's link metadata, kept per month in the
+# analytics database. Closed months are re-validated hourly from rows modified after their watermark;
+# the current month is refreshed as often as a month shard.
+SUBMISSION_LINK_FIELDS = 'id,dateAdded,dateLastModified,status,sendingUser(id,firstName,lastName),candidate(id),jobOrder(id)'
+COHORT_PLACEMENT_FIELDS = 'id,dateAdded,status,candidate(id),jobOrder(id)'
+
+def upsert_submission_links(rows):
+    with _rollup_lock, closing(rollup_db()) as conn, conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO submission_links VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [
+                (
+                    row.get('id'),
+                    (row.get('candidate') or {}).get('id'),
+                    (row.get('jobOrder') or {}).get('id'),
+                    row.get('dateAdded') or 0,
+                    row.get('dateLastModified') or 0,
+                    (row.get('sendingUser') or {}).get('id'),
+                    get_recruiter_name(row),
+                    row.get('status'),
+                )
+                for row in rows if row.get('id') is not None
+            ]
+        )
+
+def index_submission_month(year, month, first_ms, last_ms):
+    """
+    Bring one month of the submission link index up to date. Returns True, or None if Bullhorn
+    could not be reached (so it can run under fetch_entities_concurrently).
+    """
+    now = time.time()
+    with closing(rollup_db()) as conn:
+        meta = conn.execute('SELECT watermark, synced_at FROM submission_link_months WHERE year=? AND month=?',
+                            (year, month)).fetchone()
+    max_age = ROLLUP_RECHECK_SECONDS if last_ms < now * 1000 else SHARD_OPEN_TTL_SECONDS
+    if meta is not None and now - meta[1] < max_age:
+        return True
+
+    in_month = f"dateAdded>={first_ms} AND dateAdded<={last_ms}"
+    if meta is None:
+        rows = fetch_bullhorn_rows('JobSubmission', SUBMISSION_LINK_FIELDS, first_ms, last_ms, max_rows=SHARD_MAX_ROWS)
+        if rows is None:
+            return None
+        upsert_submission_links(rows)
+        feed_month_rollup('JobSubmission', year, month, rows, complete=len(rows) < SHARD_MAX_ROWS)
+    else:
+        total = fetch_bullhorn_total('JobSubmission', in_month)
+        changed = fetch_bullhorn_rows('JobSubmission', SUBMISSION_LINK_FIELDS, first_ms, last_ms,
+                                      max_rows=SHARD_MAX_ROWS, where=f"dateLastModified>{meta[0]}")
+        if total is None or changed is None:
+            return None
+        upsert_submission_links(changed)
+        feed_month_rollup('JobSubmission', year, month, changed)
+        with closing(rollup_db()) as conn:
+            stored = conn.execute('SELECT COUNT(*) FROM submission_links WHERE date_added BETWEEN ? AND ?',
+                                  (first_ms, last_ms)).fetchone()[0]
+        if stored != total:
+            current = fetch_bullhorn_rows('JobSubmission', 'id', first_ms, last_ms, max_rows=SHARD_MAX_ROWS)
+            if current is None:
+                return None
+            current_ids = {row.get('id') for row in current}
+            with _rollup_lock, closing(rollup_db()) as conn, conn:
+                stored_ids = [r[0] for r in conn.execute(
+                    'SELECT submission_id FROM submission_links WHERE date_added BETWEEN ? AND ?', (first_ms, last_ms))]
+                conn.executemany('DELETE FROM submission_links WHERE submission_id=?',
+                                 [(row_id,) for row_id in stored_ids if row_id not in current_ids])
+            feed_month_rollup('JobSubmission', year, month, current, complete=len(current) < SHARD_MAX_ROWS)
+
+    with _rollup_lock, closing(rollup_db()) as conn, conn:
+        watermark = conn.execute(
+            'SELECT COALESCE(MAX(date_last_modified), 0) FROM submission_links WHERE date_added BETWEEN ? AND ?',
+            (first_ms, last_ms)
+        ).fetchone()[0]
+        conn.execute('INSERT OR REPLACE INTO submission_link_months VALUES (?, ?, ?, ?)',
+                     (year, month, max(watermark, meta[0] if meta else 0), time.time()))
+    return True
+
+def ensure_submission_links(start_ms, end_ms):
+    """Index every month overlapping a range (concurrently). Returns True, or None on failure."""
+    now_ms = time.time() * 1000
+    months = [s for s in month_shards(start_ms, end_ms) if s[2] <= now_ms]
+    if not months:
+        return True
+    _, _, error = fetch_entities_concurrently({
+        f"links-{year}-{month:02d}": (index_submission_month, (year, month, first_ms, last_ms))
+        for year, month, first_ms, last_ms in months
+    })
+    return None if error else True
+
+def submission_pairs_for_owner(owner_id, start_ms, end_ms):
+    """(candidate id, job id) pairs the owner submitted in a range, from the link index."""
+    with closing(rollup_db()) as conn:
+        return {
+            (candidate_id, job_id) for candidate_id, job_id in conn.execute(
+                'SELECT DISTINCT candidate_id, job_order_id FROM submission_links '
+                'WHERE sending_user_id=? AND date_added BETWEEN ? AND ? '
+                'AND candidate_id IS NOT NULL AND job_order_id IS NOT NULL',
+                (int(owner_id), start_ms, end_ms)
+            )
+        }
+
+def fetch_cohort_placements(start_ms, end_ms):
+    """
+    Every placement added in a range, newest first, for matching against cohorts.
+
+    The horizon runs up to today and can span more months than fetch_rows_sharded shards (past that it
+    falls back to one capped fetch and would drop the oldest placements), so it is read in windows of
+    at most SHARD_MAX_MONTHS months, each sharded and uncapped.
+
+    Returns:
+        List of placement records or None on error
+    """
+    shards = month_shards(start_ms, end_ms)
+    rows = []
+    for i in range(0, len(shards), SHARD_MAX_MONTHS):
+        window = shards[i:i + SHARD_MAX_MONTHS]
+        window_rows = fetch_rows_sharded('Placement', COHORT_PLACEMENT_FIELDS,
+                                         max(start_ms, window[-1][2]), min(end_ms, window[0][3]), max_rows=None)
+        if window_rows is None:
+            return None
+        rows.extend(window_rows)
+    return rows
+
+def _duration_stats(days):
+    if not days:
+        return {'median': None, 'mean': None, 'p90': None}
+    days = sorted(days)
+    mid = len(days) // 2
+    median = days[mid] if len(days) % 2 else (days[mid - 1] + days[mid]) / 2
+    return {
+        'median': round(median, 1),
+        'mean': round(sum(days) / len(days), 1),
+        'p90': round(days[min(len(days) - 1, int(len(days) * 0.9))], 1),
+    }
+
+def compute_cohorts(start_ms, end_ms, index, placements, owner_id=None):
+    """
+    Submission cohorts and their placement funnel.
+
+    A cohort member is a (candidate, job) pair, dated by its earliest submission in the range and
+    bucketed by the calendar index. It converts when a placement exists for the pair (any date);
+    time-to-placement runs from that submission to the pair's earliest placement.
+
+    Args:
+        start_ms: Start of the submission window in milliseconds
+        end_ms: End of the submission window in milliseconds
+        index: calendar_index for the cohort granularity
+        placements: Placement rows with candidate(id), jobOrder(id), status, dateAdded
+        owner_id: Optional sendingUser id of the cohort submission
+
+    Returns:
+        Dict with cohorts (one per bucket), totals and funnel
+    """
+    with closing(rollup_db()) as conn:
+        submitted = conn.execute(
+            'SELECT candidate_id, job_order_id, date_added, sending_user_id FROM submission_links '
+            'WHERE date_added BETWEEN ? AND ? AND candidate_id IS NOT NULL AND job_order_id IS NOT NULL '
+            'ORDER BY date_added',
+            (start_ms, end_ms)
+        ).fetchall()
+
+    pairs = {}
+    for candidate_id, job_id, date_added, sending_user_id in submitted:
+        if (candidate_id, job_id) not in pairs:
+            pairs[(candidate_id, job_id)] = (date_added, sending_user_id)
+    if owner_id is not None:
+        pairs = {pair: sub for pair, sub in pairs.items() if str(sub[1]) == str(owner_id)}
+
+    first_placement = {}
+    for place in placements:
+        pair = ((place.get('candidate') or {}).get('id'), (place.get('jobOrder') or {}).get('id'))
+        if pair in pairs and place.get('dateAdded'):
+            if pair not in first_placement or place['dateAdded'] < first_placement[pair]['dateAdded']:
+                first_placement[pair] = place
+
+    slots = [{'submitted': 0, 'placed': 0, 'booked': 0, 'cancelled': 0, 'days': []} for _ in index['starts']]
+    for pair, (date_added, _) in pairs.items():
+        pos = bucket_position(index, date_added)
+        if pos is None:
+            continue
+        slot = slots[pos]
+        slot['submitted'] += 1
+        place = first_placement.get(pair)
+        if place is None:
+            continue
+        slot['placed'] += 1
+        bucket = classify_placement_status(place.get('status'))
+        if bucket:
+            slot[bucket] += 1
+        if place['dateAdded'] >= date_added:
+            slot['days'].append((place['dateAdded'] - date_added) / 86400000)
+
+    def summarize(slot):
+        return {
+            'submitted': slot['submitted'],
+            'placed': slot['placed'],
+            'booked': slot['booked'],
+            'cancelled': slot['cancelled'],
+            'conversionRate': round(slot['placed'] / slot['submitted'] * 100, 1) if slot['submitted'] else 0,
+            'bookedRate': round(slot['booked'] / slot['submitted'] * 100, 1) if slot['submitted'] else 0,
+            'timeToPlacementDays': _duration_stats(slot['days']),
+        }
+
+    cohorts = []
+    for pos, label in enumerate(index['labels']):
+        cohorts.append({'id': label, 'start': index['firstDays'][pos], 'end': index['lastDays'][pos], **summarize(slots[pos])})
+    total = {'submitted': 0, 'placed': 0, 'booked': 0, 'cancelled': 0, 'days': []}
+    for slot in slots:
+        for key in ('submitted', 'placed', 'booked', 'cancelled'):
+            total[key] += slot[key]
+        total['days'].extend(slot['days'])
+    totals = summarize(total)
+    funnel = [{'stage': stage, 'count': totals[stage]} for stage in ('submitted', 'placed', 'booked')]
+    return {'granularity': index['granularity'], 'cohorts': cohorts, 'totals': totals, 'funnel': funnel}
+
+# ==================== CACHE WARMING ====================
+
+# Ranges warmed at startup, after a sign-in, when a token refresh moves the session to another
+# rest_url, and otherwise at most every CACHE_WARM_INTERVAL_MINUTES (checked on each token refresh).
+# CACHE_WARM_RANGES is a comma-separated list of week, month, last_month, quarter, year or explicit
+# YYYY-MM-DD:YYYY-MM-DD ranges ('off' disables warming); the ranges users requested most over the
+# last day are warmed as well.
+CACHE_WARM_RANGES = os.environ.get('CACHE_WARM_RANGES', 'month,quarter,year')
+CACHE_WARM_LEARNED = int(os.environ.get('CACHE_WARM_LEARNED', '5'))  # Most-requested ranges to add
+CACHE_WARM_INTERVAL_MINUTES = int(os.environ.get('CACHE_WARM_INTERVAL_MINUTES', '60'))
+RANGE_LOG_SIZE = 1000
+RANGE_LOG_WINDOW_SECONDS = 24 * 3600
+
+_range_log = deque(maxlen=RANGE_LOG_SIZE)  # (requested_at, start_ms, end_ms)
+_warm_lock = threading.Lock()
+_warm_state = {'restUrl': None, 'startedAt': 0.0}  # rest_url and start time of the last warming run
+
+def log_requested_range(start_ms, end_ms):
+    _range_log.append((time.time(), start_ms, end_ms))
+
+def learned_ranges(limit=CACHE_WARM_LEARNED):
+    """Ranges requested at least twice in the last day, most requested first."""
+    cutoff = time.time() - RANGE_LOG_WINDOW_SECONDS
+    counts = Counter((start_ms, end_ms) for requested_at, start_ms, end_ms in list(_range_log) if requested_at >= cutoff)
+    return [rng for rng, count in counts.most_common(limit) if count >= 2]
+
+def configured_ranges(spec=None, today=None):
+    """(start_ms, end_ms) for each CACHE_WARM_RANGES entry, with the same bounds the dashboard requests."""
+    spec = CACHE_WARM_RANGES if spec is None else spec
+    today = today or datetime.now()
+    day = datetime(today.year, today.month, today.day)
+    ranges = []
+    for name in (s.strip() for s in spec.split(',')):
+        if not name or name == 'off':
+            continue
+        if name == 'week':
+            first = day - timedelta(days=day.weekday())
+            last = first + timedelta(days=6)
+        elif name in ('month', 'last_month'):
+            first = shift_months(datetime(day.year, day.month, 1), -1 if name == 'last_month' else 0)
+            last = shift_months(first, 1) - timedelta(days=1)
+        elif name == 'quarter':
+            first = datetime(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+            last = shift_months(first, 3) - timedelta(days=1)
+        elif name == 'year':
+            first, last = datetime(day.year, 1, 1), datetime(day.year, 12, 31)
+        elif ':' in name:
+            first, last = (datetime.strptime(part, '%Y-%m-%d') for part in name.split(':', 1))
+        else:
+            print(f"⚠️ Unknown CACHE_WARM_RANGES entry: {name}")
+            continue
+        ranges.append(parse_date_range({'start': first.strftime('%Y-%m-%d'), 'end': last.strftime('%Y-%m-%d')}))
+    return ranges
+
+def warm_ranges():
+    """Configured ranges plus learned ones, without duplicates."""
+    if CACHE_WARM_RANGES.strip() == 'off':
+        return []
+    return list(dict.fromkeys(configured_ranges() + learned_ranges()))
+
+def warm_range(start_ms, end_ms):
+    """Load one range into the caches the dashboard reads: detailed indexes (which fill the month
+    shards), then KPI counts and closed-month rollups. Returns (timings, error)."""
+    _, detailed_timings, error = fetch_entities_concurrently({
+        kind: (get_detailed_index, (kind, start_ms, end_ms)) for kind in DETAILED_DATASETS
+    })
+    if error:
+        return detailed_timings, error
+    # The detailed placement shards carry every summary field, so the summary needs no fetch of its own
+    _, timings, error = fetch_entities_concurrently({
+        'kpis': (_warm_kpis, (start_ms, end_ms)),
+        'rollups': (_warm_rollups, (start_ms, end_ms)),
+    })
+    return {**detailed_timings, **timings}, error
+
+def _warm_kpis(start_ms, end_ms):
+    result, _ = compute_kpis(start_ms, end_ms)
+    return result
+
+def _warm_rollups(start_ms, end_ms):
+    _, _, error = rollup_recruiters(start_ms, end_ms)
+    return None if error else True
+
+@upstream_priority('bulk')
+def warm_analytics_cache():
+    """Scheduler job: warm every range from warm_ranges(). Skipped if a run is already in progress."""
+    tokens = load_tokens()
+    if not tokens or not tokens.get('bh_rest_token'):
+        return
+    if not _warm_lock.acquire(blocking=False):
+        print("⏭️ Cache warming already running")
+        return
+    try:
+        _warm_state.update(restUrl=tokens.get('rest_url'), startedAt=time.time())
+        ranges = warm_ranges()
+        started = time.monotonic()
+        failed = 0
+        for start_ms, end_ms in ranges:
+            try:
+                _, error = warm_range(start_ms, end_ms)
+            except Exception as e:
+                error = str(e)
+            if error:
+                failed += 1
+                print(f"⚠️ Cache warming {format_date_ms(start_ms)} - {format_date_ms(end_ms)} failed: {error}")
+        print(f"🔥 Warmed {len(ranges) - failed}/{len(ranges)} ranges in {time.monotonic() - started:.1f}s")
+        if SCHEDULER_MODE == 'worker':
+            save_snapshot()  # Hand the warm caches to the web processes
+    finally:
+        _warm_lock.release()
+
+def cache_warming_due(tokens, had_session=True):
+    """Whether a token refresh should warm the caches: the session is new (had_session False) or
+    on another rest_url than the last run, or the last run is CACHE_WARM_INTERVAL_MINUTES old."""
+    return (not had_session
+            or tokens.get('rest_url') != _warm_state['restUrl']
+            or time.time() - _warm_state['startedAt'] >= CACHE_WARM_INTERVAL_MINUTES * 60)
+
+def schedule_cache_warming(delay_seconds=0):
+    """Queue a one-off warming run on the scheduler (after a token refresh, at startup, or on demand).
+    In a process without a running scheduler (SCHEDULER_MODE 'worker' or 'off') it runs on its own thread."""
+    if not scheduler.running:
+        threading.Timer(delay_seconds, warm_analytics_cache).start()
+        return
+    scheduler.add_job(
+        func=warm_analytics_cache,
+        trigger='date',
+        run_date=datetime.now() + timedelta(seconds=delay_seconds),
+        id='warm_analytics_cache',
+        name='Warm analytics caches',
+        replace_existing=True,
+    )
+
+# ==================== WARM-RESTART SNAPSHOTS ====================
+
+# Render restarts wipe in-process state, so the token state and the expensive cache entries (month
+# shards, count probes, status picklists) plus the requested-range log are periodically written to a
+# snapshot and read back after a deploy. SNAPSHOT_STORE is 'disk' (SNAPSHOT_PATH), 'supabase' (one row
+# per SNAPSHOT_NAME in the app_snapshots table: name text primary key, payload text, created_at
+# timestamptz) or 'off'; it defaults to Supabase when configured, since Render's disk does not survive
+# a deploy. The payload holds OAuth tokens, so the table must only be reachable with the service key.
+SNAPSHOT_STORE = os.environ.get('SNAPSHOT_STORE', 'supabase' if SUPABASE_URL and SUPABASE_KEY else 'disk')
+SNAPSHOT_PATH = os.environ.get('SNAPSHOT_PATH', 'warm_snapshot.bin')
+SNAPSHOT_TABLE = 'app_snapshots'
+SNAPSHOT_NAME = os.environ.get('SNAPSHOT_NAME', 'warm-restart')
+SNAPSHOT_INTERVAL_MINUTES = int(os.environ.get('SNAPSHOT_INTERVAL_MINUTES', '10'))
+SNAPSHOT_MAX_ROWS = int(os.environ.get('SNAPSHOT_MAX_ROWS', '200000'))  # Shard rows kept, longest-lived first
+SNAPSHOT_PULL_SECONDS = int(os.environ.get('SNAPSHOT_PULL_SECONDS', '60'))  # SCHEDULER_MODE 'worker' re-read interval
+SNAPSHOT_CACHE_KINDS = ('shard', 'count', 'status-options')
+SNAPSHOT_MAGIC = b'BHSNAP1\n'
+
+_snapshot_state = {'restored_at': None, 'version': None}
+_snapshot_lock = threading.Lock()
+
+def encode_snapshot(state):
+    """Compact binary form of a snapshot dict: magic header + zlib-compressed JSON."""
+    return SNAPSHOT_MAGIC + zlib.compress(json.dumps(state, separators=(',', ':'), default=str).encode('utf-8'), 6)
+
+def decode_snapshot(blob):
+    """Inverse of encode_snapshot. Raises ValueError for anything that is not a snapshot."""
+    if not blob or not blob.startswith(SNAPSHOT_MAGIC):
+        raise ValueError("Not a snapshot (bad header)")
+    return json.loads(zlib.decompress(blob[len(SNAPSHOT_MAGIC):]).decode('utf-8'))
+
+def write_snapshot_blob(blob):
+    if SNAPSHOT_STORE == 'supabase':
+        get_supabase().table(SNAPSHOT_TABLE).upsert({
+            'name': SNAPSHOT_NAME,
+            'payload': base64.b64encode(blob).decode('ascii'),
+            'created_at': datetime.utcnow().isoformat() + 'Z',
+        }, on_conflict='name').execute()
+    else:
+        tmp_path = SNAPSHOT_PATH + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp_path, SNAPSHOT_PATH)
+
+def read_snapshot_blob():
+    """The stored snapshot bytes, or None if there is none yet."""
+    if SNAPSHOT_STORE == 'supabase':
+        result = get_supabase().table(SNAPSHOT_TABLE).select('payload').eq('name', SNAPSHOT_NAME).limit(1).execute()
+        return base64.b64decode(result.data[0]['payload']) if result.data else None
+    if not os.path.exists(SNAPSHOT_PATH):
+        return None
+    with open(SNAPSHOT_PATH, 'rb') as f:
+        return f.read()
+
+def snapshot_enabled():
+    return SNAPSHOT_STORE == 'disk' or (SNAPSHOT_STORE == 'supabase' and get_supabase() is not None)
+
+def collect_snapshot():
+    """Current tokens (or the logout tombstone), live cache entries of SNAPSHOT_CACHE_KINDS and the range log
+    as a JSON-ready dict. Shards are kept longest-lived first (closed months before the current one) up to
+    SNAPSHOT_MAX_ROWS."""
+    now = time.time()
+    with _analytics_cache_lock:
+        entries = [(key, expires_at, value) for key, (expires_at, value) in _analytics_cache.items()
+                   if key[0] in SNAPSHOT_CACHE_KINDS and expires_at > now]
+    entries.sort(key=lambda entry: -entry[1])
+    cache, rows = [], 0
+    for key, expires_at, value in entries:
+        if key[0] == 'shard':
+            if rows + len(value) > SNAPSHOT_MAX_ROWS:
+                continue
+            rows += len(value)
+        cache.append([list(key), expires_at, value])
+    return {
+        'version': 1,
+        'createdAt': now,
+        'tokens': read_token_file(),
+        'cache': cache,
+        'rangeLog': [list(entry) for entry in list(_range_log)],
+    }
+
+def save_snapshot():
+    """Scheduler job: write a snapshot. Returns a small report dict, or None if skipped or failed."""
+    if not snapshot_enabled():
+        return None
+    # Never overwrite the previous snapshot with a cold or stale process's state (e.g. tokens the
+    # other tier has since logged out)
+    ensure_snapshot_restored(force=True)
+    try:
+        state = collect_snapshot()
+        if not state['tokens'] and not state['cache']:
+            return None
+        blob = encode_snapshot(state)
+        write_snapshot_blob(blob)
+        _snapshot_state['version'] = snapshot_version()  # Our own write is nothing to pull back
+        return {'store': SNAPSHOT_STORE, 'bytes': len(blob), 'entries': len(state['cache']),
+                'rows': sum(len(value) for key, _, value in state['cache'] if key[0] == 'shard')}
+    except Exception as e:
+        print(f"⚠️ Snapshot save failed: {e}")
+        return None
+
+def restore_snapshot():
+    """Load the stored snapshot into this process: cache entries that are still live and outlive the
+    local copy, the range log, and the tokens when they are newer than token_store.json (or it is missing).
+    A newer logout tombstone replaces the local tokens, so a logout in one tier logs out the other.
+    Returns a report dict or None."""
+    try:
+        blob = read_snapshot_blob()
+        if blob is None:
+            return None
+        state = decode_snapshot(blob)
+    except Exception as e:
+        print(f"⚠️ Snapshot restore failed: {e}")
+        return None
+
+    now = time.time()
+    restored = 0
+    with _analytics_cache_lock:
+        for key, expires_at, value in state.get('cache', []):
+            key = tuple(key)
+            current = _analytics_cache.get(key)
+            if expires_at <= now or (current is not None and current[0] >= expires_at):
+                continue
+            _analytics_cache[key] = (expires_at, value)
+            remember_shard_fields(key)
+            restored += 1
+        trim_analytics_cache()
+    if not _range_log:
+        _range_log.extend(tuple(entry) for entry in state.get('rangeLog', []))
+
+    tokens_restored = False
+    if state.get('tokens'):
+        try:
+            local_saved_at = (read_token_file() or {}).get('saved_at') or ''
+        except (OSError, ValueError):
+            local_saved_at = ''
+        if (state['tokens'].get('saved_at') or '') > local_saved_at:
+            tokens_restored = save_tokens(state['tokens'], stamp=False)
+    age = now - state.get('createdAt', now)
+    logged_out = tokens_restored and state['tokens'].get('loggedOut')
+    print(f"♻️ Restored snapshot from {age / 60:.0f} min ago: {restored} cache entries"
+          f"{(', logout' if logged_out else ', tokens') if tokens_restored else ''}")
+    return {'age_seconds': round(age), 'entries': restored, 'tokens': tokens_restored}
+
+def snapshot_version():
+    """Cheap change marker for the stored snapshot (its timestamp), or None if there is none."""
+    if SNAPSHOT_STORE == 'supabase':
+        result = get_supabase().table(SNAPSHOT_TABLE).select('created_at').eq('name', SNAPSHOT_NAME).limit(1).execute()
+        return result.data[0]['created_at'] if result.data else None
+    return os.path.getmtime(SNAPSHOT_PATH) if os.path.exists(SNAPSHOT_PATH) else None
+
+def ensure_snapshot_restored(force=False):
+    """
+    Restore the snapshot on first need (first cache read, first token read or the boot job,
+    whichever comes first); concurrent callers wait for that one restore.
+
+    With SCHEDULER_MODE 'worker' the web and worker processes share tokens and warm caches through
+    the snapshot, so it is re-read whenever it changed, at most every SNAPSHOT_PULL_SECONDS. Those
+    later pulls never block: whoever finds the lock taken carries on with the current state.
+    force=True (before writing a snapshot) checks for a newer one regardless of either mode or age.
+    """
+    restored_at = _snapshot_state['restored_at']
+    if not force and restored_at is not None and (
+            SCHEDULER_MODE != 'worker' or time.time() - restored_at < SNAPSHOT_PULL_SECONDS):
+        return
+    if not _snapshot_lock.acquire(blocking=force or restored_at is None):
+        return
+    try:
+        if not force and _snapshot_state['restored_at'] != restored_at:
+            return  # Another caller restored while we waited
+        if snapshot_enabled():
+            version = snapshot_version()
+            if version is not None and version != _snapshot_state['version']:
+                restore_snapshot()
+                _snapshot_state['version'] = version
+    except Exception as e:
+        print(f"⚠️ Snapshot check failed: {e}")
+    finally:
+        _snapshot_state['restored_at'] = time.time()
+        _snapshot_lock.release()
+
+# ==================== BACKGROUND TASKS ====================
+
+# Long syncs and pushes run as tasks on a small pool instead of inside the request. Task state lives
+# in the analytics database, so any gunicorn worker can answer GET /api/tasks/<id>, and a second
+# submission of the same work (same dedupe key) joins the queued or running task instead of starting
+# another one. Each task row names its owning process, which heartbeats its queued and running tasks;
+# a task is only given up as abandoned once its owner has stopped heartbeating, however long it waits
+# in the pool or sits in a phase without progress.
+TASK_WORKERS = 2
+TASK_HEARTBEAT_SECONDS = 30
+TASK_STALE_SECONDS = 300  # A queued/running task whose owner has not heartbeated for this long is dead
+TASK_FLUSH_SECONDS = 1.0  # Progress is written at most this often (phase changes and the end always)
+TASK_MAX_ERRORS = 50  # Errors kept per task; errorCount has the total
+TASK_HISTORY_DAYS = 7
+
+_task_pool = ThreadPoolExecutor(max_workers=TASK_WORKERS, thread_name_prefix='task')
+_task_progress_lock = threading.Lock()
+_task_owner_state = {'pid': None, 'owner': None}
+_live_tasks = set()  # Ids of tasks queued or running in this process's pool (guarded by _live_tasks_lock)
+_live_tasks_lock = threading.Lock()
+_task_heartbeat_state = {'running': False}
+
+def task_owner():
+    """This process's owner id for task rows (host, pid and a per-process nonce, renewed after a fork)."""
+    if _task_owner_state['pid'] != os.getpid():
+        _task_owner_state.update(pid=os.getpid(), owner=f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}")
+    return _task_owner_state['owner']
+
+def task_heartbeat():
+    """Touch heartbeat_at on every task this process holds, every TASK_HEARTBEAT_SECONDS, until none are left."""
+    while True:
+        with _live_tasks_lock:
+            task_ids = list(_live_tasks)
+            if not task_ids:
+                _task_heartbeat_state['running'] = False
+                return
+        try:
+            now = time.time()
+            with _rollup_lock, closing(rollup_db()) as conn, conn:
+                conn.executemany('UPDATE tasks SET heartbeat_at = ? WHERE id = ?', [(now, task_id) for task_id in task_ids])
+        except Exception as e:
+            print(f"⚠️ Task heartbeat failed: {e}")
+        time.sleep(TASK_HEARTBEAT_SECONDS)
+
+def hold_task(task_id):
+    """Count a task as live in this process and make sure the heartbeat thread is running."""
+    with _live_tasks_lock:
+        _live_tasks.add(task_id)
+        if _task_heartbeat_state['running']:
+            return
+        _task_heartbeat_state['running'] = True
+    threading.Thread(target=task_heartbeat, name='task-heartbeat', daemon=True).start()
+
+def submit_task(kind, func, *args, dedupe_key=None):
+    """
+    Queue func(task, *args) on the task pool. func reports through task_progress() and returns a
+    JSON-able result; an exception or a result with success=False marks the task failed.
+
+    Returns:
+        (task_id, created): created is False when a task with the same dedupe key (default: kind)
+        was already queued or running and its id is returned instead
+    """
+    dedupe_key = dedupe_key or kind
+    now = time.time()
+    owner = task_owner()
+    with _rollup_lock, closing(rollup_db()) as conn, conn:
+        conn.execute('BEGIN IMMEDIATE')  # Serialize the check-and-insert across worker processes
+        # Only tasks of another process that stopped heartbeating (rows from before owners were recorded
+        # fall back to their last update); this process's own tasks are alive while it is
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', phase = 'abandoned', finished_at = ? "
+            "WHERE status IN ('queued', 'running') AND owner IS NOT ? AND COALESCE(heartbeat_at, updated_at) < ?",
+            (now, owner, now - TASK_STALE_SECONDS))
+        row = conn.execute(
+            "SELECT id FROM tasks WHERE dedupe_key = ? AND status IN ('queued', 'running') ORDER BY created_at DESC LIMIT 1",
+            (dedupe_key,)).fetchone()
+        if row:
+            return row[0], False
+        conn.execute('DELETE FROM tasks WHERE created_at < ?', (now - TASK_HISTORY_DAYS * 86400,))
+        task_id = uuid.uuid4().hex[:16]
+        conn.execute(
+            "INSERT INTO tasks (id, kind, dedupe_key, status, phase, created_at, updated_at, owner, heartbeat_at) "
+            "VALUES (?, ?, ?, 'queued', 'queued', ?, ?, ?, ?)",
+            (task_id, kind, dedupe_key, now, now, owner, now))
+    task = {'id': task_id, 'phase': 'queued', 'fetched': 0, 'upserted': 0, 'errors': [], 'errorCount': 0, 'flushedAt': 0}
+    hold_task(task_id)
+    _task_pool.submit(run_task, task, func, args)
+    return task_id, True
+
+def flush_task(task, **columns):
+    """Write a task's progress (plus any extra columns, e.g. status) to the tasks table."""
+    task['flushedAt'] = time.time()
+    columns.update(phase=task['phase'], fetched=task['fetched'], upserted=task['upserted'],
+                   errors=json.dumps(task['errors']), error_count=task['errorCount'], updated_at=task['flushedAt'])
+    assignments = ', '.join(f"{name} = ?" for name in columns)
+    with _rollup_lock, closing(rollup_db()) as conn, conn:
+        conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?", (*columns.values(), task['id']))
+
+def task_progress(task, phase=None, fetched=0, upserted=0, error=None):
+    """Record progress on a running task (no-op without one, so task functions also run standalone).
+    Safe to call from several pipeline threads at once."""
+    if task is None:
+        return
+    with _task_progress_lock:
+        task['fetched'] += fetched
+        task['upserted'] += upserted
+        if error:
+            task['errorCount'] += 1
+            if len(task['errors']) < TASK_MAX_ERRORS:
+                task['errors'].append(str(error))
+        phase_changed = phase is not None and phase != task['phase']
+        if phase is not None:
+            task['phase'] = phase
+        if phase_changed or time.time() - task['flushedAt'] >= TASK_FLUSH_SECONDS:
+            flush_task(task)
+
+def run_task(task, func, args):
+    try:
+        flush_task(task, status='running', started_at=time.time())
+        try:
+            result = func(task, *args)
+            failed = isinstance(result, dict) and result.get('success') is False
+            if failed and result.get('error'):
+                task_progress(task, error=result['error'])
+        except Exception as e:
+            print(f"❌ Task {task['id']} failed: {e}")
+            result, failed = None, True
+            task_progress(task, error=e)
+        task['phase'] = 'failed' if failed else 'done'
+        flush_task(task, status='failed' if failed else 'succeeded', result=json.dumps(result, default=str), finished_at=time.time())
+    finally:
+        with _live_tasks_lock:
+            _live_tasks.discard(task['id'])
+
+def task_status(row):
+    """API view of a tasks row: phase, row counts, throughput and errors."""
+    (task_id, kind, status, phase, fetched, upserted, errors, error_count, result,
+     created_at, started_at, finished_at, updated_at) = row
+    elapsed = ((finished_at or time.time()) - started_at) if started_at else 0
+
+    def iso(ts):
+        return datetime.fromtimestamp(ts).isoformat(timespec='seconds') if ts else None
+
+    return {
+        'id': task_id,
+        'kind': kind,
+        'status': status,
+        'phase': phase,
+        'rows': {'fetched': fetched, 'upserted': upserted},
+        'throughput': {
+            'fetchedPerSecond': round(fetched / elapsed, 1) if elapsed else None,
+            'upsertedPerSecond': round(upserted / elapsed, 1) if elapsed else None,
+        },
+        'elapsedSeconds': round(elapsed, 1),
+        'errors': json.loads(errors),
+        'errorCount': error_count,
+        'result': json.loads(result) if result else None,
+        'createdAt': iso(created_at),
+        'startedAt': iso(started_at),
+        'finishedAt': iso(finished_at),
+        'updatedAt': iso(updated_at),
+    }
+
+TASK_COLUMNS = ('id, kind, status, phase, fetched, upserted, errors, error_count, result, '
+                'created_at, started_at, finished_at, updated_at')
+
+def get_task(task_id):
+    with _rollup_lock, closing(rollup_db()) as conn:
+        row = conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    return task_status(row) if row else None
+
+def recent_tasks(limit=20):
+    with _rollup_lock, closing(rollup_db()) as conn:
+        rows = conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+    return [task_status(row) for row in rows]
+
+def task_accepted(task_id, created):
+    """202 response for a submitted (or joined) task."""
+    return jsonify({
+        'success': True,
+        'taskId': task_id,
+        'duplicate': not created,
+        'statusUrl': f'/api/tasks/{task_id}',
+        'task': get_task(task_id),
+    }), 202
+
+# ==================== SYNC JOURNAL ====================
+
+# Long syncs (Bullhorn open jobs, AHSA pushes) checkpoint as they go: one sync_runs row per run (its
+# cursor, rows done, last id) and one sync_checkpoints row per chunk, written 'pending' before the
+# chunk is upserted and 'committed' once Supabase accepted it. A run that dies midway (network error,
+# worker recycle) is claimed by the next run of the same kind, which continues after its last
+# committed chunk instead of starting over; upserts are idempotent, so a pending chunk is just redone.
+SYNC_RESUME_HOURS = 12  # Unfinished runs older than this are abandoned and the next run starts fresh
+SYNC_STALE_SECONDS = TASK_STALE_SECONDS  # A running run without a checkpoint for this long is presumed dead
+SYNC_HISTORY_DAYS = TASK_HISTORY_DAYS
 
-def get_week_range(date_ms):
-    """Get week start and end dates for a given timestamp"""
-    date = datetime.fromtimestamp(date_ms / 1000)
-    # Get Monday of the week
-    days_since_monday = date.weekday()
-    week_start = date - timedelta(days=days_since_monday)
-    week_end = week_start + timedelta(days=6)
-    return week_start, week_end
+def journal_start(kind, cursor=None):
+    """
+    Claim a sync run of `kind`: resume the latest unfinished one, or open a new one with `cursor`
+    (a JSON-able dict of run-wide state, e.g. the synced_at stamp).
+
+    Returns:
+        Run dict (id, kind, cursor, rows, lastId, resumed, doneIds: ids in committed chunks), or None
+        when another process is actively running the same kind
+    """
+    now = time.time()
+    with _rollup_lock, closing(rollup_db()) as conn, conn:
+        conn.execute('BEGIN IMMEDIATE')  # Serialize the claim across worker processes
+        expired = now - SYNC_HISTORY_DAYS * 86400
+        conn.execute('DELETE FROM sync_checkpoints WHERE run_id IN (SELECT id FROM sync_runs WHERE started_at < ?)', (expired,))
+        conn.execute('DELETE FROM sync_runs WHERE started_at < ?', (expired,))
+        row = conn.execute(
+            "SELECT id, status, cursor, rows, last_id, started_at, updated_at FROM sync_runs "
+            "WHERE kind = ? AND status IN ('running', 'failed') ORDER BY started_at DESC LIMIT 1",
+            (kind,)).fetchone()
+        if row:
+            run_id, status, stored_cursor, rows, last_id, started_at, updated_at = row
+            if status == 'running' and updated_at >= now - SYNC_STALE_SECONDS:
+                return None
+            if started_at >= now - SYNC_RESUME_HOURS * 3600:
+                conn.execute("UPDATE sync_runs SET status = 'running', error = NULL, resumes = resumes + 1, "
+                             "updated_at = ? WHERE id = ?", (now, run_id))
+                conn.execute("DELETE FROM sync_checkpoints WHERE run_id = ? AND status = 'pending'", (run_id,))
+                done_ids = set()
+                for (ids,) in conn.execute("SELECT ids FROM sync_checkpoints WHERE run_id = ?", (run_id,)):
+                    done_ids.update(json.loads(ids))
+                return {'id': run_id, 'kind': kind, 'cursor': {**(cursor or {}), **json.loads(stored_cursor)}, 'rows': rows,
+                        'lastId': last_id, 'resumed': True, 'doneIds': done_ids}
+            conn.execute("UPDATE sync_runs SET status = 'abandoned', finished_at = ? WHERE id = ?", (now, run_id))
+        run_id = uuid.uuid4().hex[:16]
+        cursor = cursor or {}
+        conn.execute("INSERT INTO sync_runs (id, kind, status, cursor, started_at, updated_at) VALUES (?, ?, 'running', ?, ?, ?)",
+                     (run_id, kind, json.dumps(cursor), now, now))
+    return {'id': run_id, 'kind': kind, 'cursor': cursor, 'rows': 0, 'lastId': None, 'resumed': False, 'doneIds': set()}
+
+def journal_chunk(run, ids):
+    """Record a chunk of `ids` as pending before it is written; returns its sequence number for
+    journal_commit() (no-op without a run)."""
+    if run is None:
+        return None
+    ids = list(ids)
+    with _rollup_lock, closing(rollup_db()) as conn, conn:
+        seq = conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM sync_checkpoints WHERE run_id = ?', (run['id'],)).fetchone()[0]
+        conn.execute(
+            "INSERT INTO sync_checkpoints (run_id, seq, status, page_offset, rows, last_id, ids, created_at) "
+            "VALUES (?, ?, 'pending', ?, ?, ?, ?, ?)",
+            (run['id'], seq, run['rows'], len(ids), str(ids[-1]) if ids else None, json.dumps(ids), time.time()))
+    run['pending'] = ids
+    return seq
+
+def journal_commit(run, seq):
+    """Mark chunk `seq` committed and advance the run's durable checkpoint past it."""
+    if run is None:
+        return
+    ids = run.pop('pending')
+    now = time.time()
+    with _rollup_lock, closing(rollup_db()) as conn, conn:
+        conn.execute("UPDATE sync_checkpoints SET status = 'committed', committed_at = ? WHERE run_id = ? AND seq = ?",
+                     (now, run['id'], seq))
+        conn.execute('UPDATE sync_runs SET rows = rows + ?, chunks = chunks + 1, last_id = COALESCE(?, last_id), '
+                     'updated_at = ? WHERE id = ?', (len(ids), str(ids[-1]) if ids else None, now, run['id']))
+    run['rows'] += len(ids)
+    run['doneIds'].update(ids)
+    if ids:
+        run['lastId'] = str(ids[-1])
+
+def journal_finish(run, error=None):
+    """Close a run: completed, or failed (resumable by the next run) when `error` is given."""
+    if run is None:
+        return
+    now = time.time()
+    with _rollup_lock, closing(rollup_db()) as conn, conn:
+        conn.execute('UPDATE sync_runs SET status = ?, error = ?, updated_at = ?, finished_at = ? WHERE id = ?',
+                     ('failed' if error else 'completed', str(error) if error else None, now, now, run['id']))
+
+def recent_sync_runs(limit=20):
+    """Most recent sync runs with their checkpoint progress, newest first."""
+    with _rollup_lock, closing(rollup_db()) as conn:
+        rows = conn.execute(
+            'SELECT id, kind, status, rows, chunks, last_id, resumes, error, started_at, updated_at, finished_at '
+            'FROM sync_runs ORDER BY started_at DESC LIMIT ?', (limit,)).fetchall()
+
+    def iso(ts):
+        return datetime.fromtimestamp(ts).isoformat(timespec='seconds') if ts else None
+
+    return [{
+        'id': run_id,
+        'kind': kind,
+        'status': status,
+        'rows': rows_done,
+        'chunks': chunks,
+        'lastId': last_id,
+        'resumes': resumes,
+        'error': error,
+        'startedAt': iso(started_at),
+        'updatedAt': iso(updated_at),
+        'finishedAt': iso(finished_at),
+    } for run_id, kind, status, rows_done, chunks, last_id, resumes, error, started_at, updated_at, finished_at in rows]
+
+# ==================== STALE FALLBACK ====================
+
+# The last good (200) JSON body of each upstream-backed GET endpoint is kept per path + query. While
+# the endpoint's upstream circuit is open it is served straight away, and a 5xx caused by an open or
+# probing circuit is replaced by it; either way the body says stale: true with its age. Bodies are
+# kept for STALE_MAX_AGE_SECONDS, oldest evicted first beyond STALE_MAX_BYTES (per process).
+STALE_FALLBACK_PATHS = (
+    ('/api/ahsa/jobs', 'ahsa'),
+    ('/api/analytics/', 'bullhorn'),
+    ('/api/submissions', 'bullhorn'),
+    ('/api/placements', 'bullhorn'),
+    ('/api/jobs/', 'bullhorn'),
+    ('/api/meta/', 'bullhorn'),
+)
+STALE_MAX_AGE_SECONDS = 24 * 3600
+STALE_MAX_BYTES = 64 * 1024 * 1024
+
+_stale_lock = threading.Lock()
+_stale_responses = {}  # path + query -> (stored_at, body), oldest first
+_stale_state = {'bytes': 0}
+
+def stale_fallback_host(path):
+    """Upstream host behind a GET endpoint that has a stale fallback, else None."""
+    for prefix, upstream in STALE_FALLBACK_PATHS:
+        if not path.startswith(prefix):
+            continue
+        if upstream == 'ahsa':
+            return urlsplit(AHSA_API_BASE_URL).hostname
+        tokens = load_tokens()
+        return urlsplit(tokens['rest_url']).hostname if tokens and tokens.get('rest_url') else None
+    return None
+
+def remember_response(key, body):
+    """Keep a good response body as the fallback for key."""
+    with _stale_lock:
+        previous = _stale_responses.pop(key, None)
+        if previous:
+            _stale_state['bytes'] -= len(previous[1])
+        if len(body) > STALE_MAX_BYTES // 4:
+            return
+        _stale_responses[key] = (time.time(), body)
+        _stale_state['bytes'] += len(body)
+        while _stale_state['bytes'] > STALE_MAX_BYTES:
+            _, evicted = _stale_responses.pop(next(iter(_stale_responses)))
+            _stale_state['bytes'] -= len(evicted)
+
+def stale_payload(key, host):
+    """The last good body for key flagged stale (stale, staleAgeSeconds, staleReason), or None."""
+    with _stale_lock:
+        entry = _stale_responses.get(key)
+    if entry is None or time.time() - entry[0] > STALE_MAX_AGE_SECONDS:
+        return None
+    age = time.time() - entry[0]
+    payload = json.loads(entry[1])
+    if isinstance(payload, dict):
+        payload.update(stale=True, staleAgeSeconds=round(age), staleReason=f"{host} is unavailable")
+    return payload
+
+def stale_response(key, host):
+    payload = stale_payload(key, host)
+    if payload is None:
+        return None
+    response = jsonify(payload)
+    response.headers['Warning'] = '110 - "Response is Stale"'
+    response.headers['X-Upstream-Stale'] = host
+    return response
+
+@app.before_request
+def serve_stale_while_circuit_open():
+    """Answer from the stale fallback without running the handler while its upstream is failing fast."""
+    if request.method != 'GET':
+        return None
+    host = stale_fallback_host(request.path)
+    if host and breaker_state(host) == 'open':
+        return stale_response(request.full_path, host)  # None: no fallback, the handler fails fast
+    return None
+
+@app.after_request
+def remember_good_responses(response):
+    if request.method != 'GET' or 'X-Upstream-Stale' in response.headers:
+        return response
+    host = stale_fallback_host(request.path)
+    if not host:
+        return response
+    if response.status_code == 200 and response.is_json:
+        remember_response(request.full_path, response.get_data())
+    elif response.status_code >= 500 and breaker_state(host) != 'closed':
+        return stale_response(request.full_path, host) or response
+    return response
 
 # ==================== API ENDPOINTS ====================
 
@@ -2392,6 +5153,7 @@ def api_tokens():
 @app.route('/api/supabase/status')
 def api_supabase_status():
     """Check Supabase configuration and connection status"""
+    supabase = get_supabase()
     # Check which environment variables are actually set
     env_supabase_url = os.environ.get('SUPABASE_URL', '')
     env_service_key = os.environ.get('SUPABASE_SERVICE_KEY', '')
@@ -2472,19 +5234,15 @@ def api_supabase_status():
 
 @app.route('/api/supabase/sync', methods=['POST'])
 def api_supabase_sync():
-    """Manually trigger Bullhorn jobs sync to Supabase"""
-    if not supabase:
+    """Queue a Bullhorn jobs sync to Supabase; poll the returned statusUrl for progress"""
+    if not get_supabase():
         return jsonify({
             'success': False,
             'error': 'Supabase not configured. Set SUPABASE_URL and SUPABASE_SERVICE_KEY (or SUPABASE_KEY) environment variables.'
         }), 400
     
     try:
-        sync_bullhorn_jobs()
-        return jsonify({
-            'success': True,
-            'message': 'Sync completed. Check logs for details.'
-        }), 200
+        return task_accepted(*submit_task('supabase-sync', sync_bullhorn_jobs))
     except Exception as e:
         return jsonify({
             'success': False,
@@ -2508,7 +5266,7 @@ def api_status():
             rest_url += '/'
         
         ping_url = f"{rest_url}ping"
-        response = requests.get(
+        response = upstream_get(
             ping_url,
             params={'BhRestToken': tokens.get('bh_rest_token')},
             timeout=5
@@ -2553,6 +5311,54 @@ def api_refresh():
             'message': 'Token refresh failed'
         }), 500
 
+@app.route('/api/cache/warm', methods=['POST'])
+def api_cache_warm():
+    """Queue a cache warming run now; returns the ranges it will warm."""
+    tokens = load_tokens()
+    if not tokens or not tokens.get('bh_rest_token'):
+        return jsonify({'error': 'Not authenticated'}), 401
+    schedule_cache_warming()
+    return jsonify({
+        'success': True,
+        'ranges': [
+            {'start': datetime.fromtimestamp(s / 1000).strftime('%Y-%m-%d'), 'end': datetime.fromtimestamp(e / 1000).strftime('%Y-%m-%d')}
+            for s, e in warm_ranges()
+        ]
+    })
+
+@app.route('/api/cache/snapshot', methods=['POST'])
+def api_cache_snapshot():
+    """Write a warm-restart snapshot now (e.g. right before a deploy)."""
+    if not snapshot_enabled():
+        return jsonify({'error': f"Snapshots are disabled (SNAPSHOT_STORE={SNAPSHOT_STORE})"}), 400
+    report = save_snapshot()
+    if report is None:
+        return jsonify({'success': False, 'error': 'Nothing to snapshot or save failed'}), 500
+    return jsonify({'success': True, **report})
+
+@app.route('/api/tasks')
+def api_tasks():
+    """Most recent background tasks, newest first."""
+    return jsonify({'tasks': recent_tasks()})
+
+@app.route('/api/upstream')
+def api_upstream():
+    """Upstream rate limiters (per host tokens left, per priority class queueing) and circuit breakers."""
+    return jsonify({'hosts': upstream_limit_stats(), 'priorities': list(UPSTREAM_PRIORITIES), 'breakers': breaker_stats()})
+
+@app.route('/api/sync/runs')
+def api_sync_runs():
+    """Sync journal: recent Bullhorn/AHSA sync runs, their checkpoints and whether they were resumed."""
+    return jsonify({'runs': recent_sync_runs()})
+
+@app.route('/api/tasks/<task_id>')
+def api_task_status(task_id):
+    """Progress of one background task: status, phase, rows fetched/upserted, throughput and errors."""
+    task = get_task(task_id)
+    if task is None:
+        return jsonify({'error': 'Task not found'}), 404
+    return jsonify(task)
+
 @app.route('/api/submissions')
 def api_submissions():
     """Fetch submissions from Bullhorn. Use start/end (YYYY-MM-DD), or year+month, or year."""
@@ -2589,7 +5395,7 @@ def api_submissions():
             'count': count
         }
         
-        response = requests.get(url, params=params, timeout=30)
+        response = upstream_get(url, params=params, timeout=30)
         response.raise_for_status()
         data = response.json()
         
@@ -2661,7 +5467,7 @@ def api_placements():
             'count': 500
         }
         
-        response = requests.get(url, params=params, timeout=30)
+        response = upstream_get(url, params=params, timeout=30)
         response.raise_for_status()
         data = response.json()
         
@@ -2681,134 +5487,16 @@ def api_placements():
 
 @app.route('/api/placements/detailed')
 def api_placements_detailed():
-    """Fetch detailed placements. Use start/end (YYYY-MM-DD), or year+month, or year. Same structure as detailed submissions."""
-    tokens = load_tokens()
-    
-    if not tokens or not tokens.get('bh_rest_token'):
-        return jsonify({'error': 'Not authenticated'}), 401
-    
-    start_ms, end_ms = parse_date_range_from_request()
-    
-    try:
-        rest_url = tokens['rest_url']
-        if not rest_url.endswith('/'):
-            rest_url += '/'
-        
-        url = f"{rest_url}query/Placement"
-        
-        # Full fields: candidate, job, client, owner. Placement uses owner (CorporateUser), not sendingUser.
-        fields = 'id,dateAdded,status,candidate(id,firstName,lastName,email),jobOrder(id,title,clientCorporation(id,name)),owner(id,firstName,lastName)'
-        
-        params = {
-            'BhRestToken': tokens['bh_rest_token'],
-            'where': f"dateAdded>={start_ms} AND dateAdded<={end_ms}",
-            'fields': fields,
-            'orderBy': '-dateAdded',
-            'count': 500
-        }
-        
-        response = requests.get(url, params=params, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-        
-        placements = data.get('data', [])
-        
-        formatted = []
-        for plc in placements:
-            candidate = plc.get('candidate', {}) or {}
-            job = plc.get('jobOrder', {}) or {}
-            owner = plc.get('owner', {}) or {}
-            client = job.get('clientCorporation', {}) or {}
-            
-            formatted.append({
-                'id': plc.get('id'),
-                'dateAdded': plc.get('dateAdded'),
-                'dateFormatted': datetime.fromtimestamp(plc.get('dateAdded', 0)/1000).strftime('%Y-%m-%d %H:%M') if plc.get('dateAdded') else None,
-                'status': plc.get('status', 'Unknown'),
-                'candidateId': candidate.get('id'),
-                'candidateName': f"{candidate.get('firstName', '')} {candidate.get('lastName', '')}".strip() or 'Unknown',
-                'candidateEmail': candidate.get('email', ''),
-                'jobId': job.get('id'),
-                'jobTitle': job.get('title', 'Unknown'),
-                'clientName': client.get('name', 'Unknown'),
-                'ownerId': owner.get('id'),
-                'ownerName': f"{owner.get('firstName', '')} {owner.get('lastName', '')}".strip() or 'Unknown'
-            })
-        
-        return jsonify({
-            'success': True,
-            'count': len(formatted),
-            'data': formatted
-        })
-    
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    """Fetch detailed placements. Use start/end (YYYY-MM-DD), or year+month, or year. Same structure as detailed submissions.
+    Optional owner/status/client filters, sort (e.g. -dateAdded, ownerName) and page/limit; facets list every owner/status/client."""
+    return detailed_response('placements')
 
 @app.route('/api/jobs/detailed')
 def api_jobs_detailed():
     """Fetch detailed JobOrder records. Use start/end (YYYY-MM-DD), or year+month, or year.
-    Bullhorn entity: JobOrder. Endpoint: query/JobOrder. JPQL where with dateAdded in ms."""
-    tokens = load_tokens()
-
-    if not tokens or not tokens.get('bh_rest_token'):
-        return jsonify({'error': 'Not authenticated'}), 401
-
-    start_ms, end_ms = parse_date_range_from_request()
-
-    try:
-        rest_url = tokens['rest_url']
-        if not rest_url.endswith('/'):
-            rest_url += '/'
-
-        url = f"{rest_url}query/JobOrder"
-
-        fields = 'id,dateAdded,title,status,isOpen,clientCorporation(id,name),owner(id,firstName,lastName)'
-
-        params = {
-            'BhRestToken': tokens['bh_rest_token'],
-            'where': f"dateAdded>={start_ms} AND dateAdded<={end_ms}",
-            'fields': fields,
-            'orderBy': '-dateAdded',
-            'count': 500
-        }
-
-        response = requests.get(url, params=params, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-
-        jobs = data.get('data', [])
-
-        formatted = []
-        for job in jobs:
-            owner = (job.get('owner') or {})
-            client = (job.get('clientCorporation') or {})
-            ts = job.get('dateAdded')
-            formatted.append({
-                'id': job.get('id'),
-                'dateAdded': ts,
-                'dateFormatted': datetime.fromtimestamp(ts / 1000).strftime('%Y-%m-%d %H:%M') if ts else None,
-                'title': job.get('title', 'Unknown'),
-                'status': job.get('status', 'Unknown'),
-                'isOpen': job.get('isOpen', False),
-                'clientName': client.get('name', 'Unknown'),
-                'ownerId': owner.get('id'),
-                'ownerName': f"{owner.get('firstName', '')} {owner.get('lastName', '')}".strip() or 'Unknown'
-            })
-
-        return jsonify({
-            'success': True,
-            'count': len(formatted),
-            'data': formatted
-        })
-
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    Bullhorn entity: JobOrder. Endpoint: query/JobOrder. JPQL where with dateAdded in ms.
+    Optional owner/status/client/open (open|closed) filters, sort and page/limit, as for detailed submissions."""
+    return detailed_response('jobs')
 
 @app.route('/api/meta/<entity>')
 def api_meta(entity):
@@ -2832,7 +5520,7 @@ def api_meta(entity):
             'fields': '*',
             'meta': 'full'
         }
-        response = requests.get(url, params=params, timeout=30)
+        response = upstream_get(url, params=params, timeout=30)
         response.raise_for_status()
         data = response.json()
         return jsonify(data)
@@ -2848,121 +5536,27 @@ def api_analytics_weekly():
     
     year = request.args.get('year', datetime.now().year, type=int)
     month = request.args.get('month', datetime.now().month, type=int)
-    
-    # Calculate month date range
-    import calendar
-    start_date = datetime(year, month, 1)
-    last_day = calendar.monthrange(year, month)[1]
-    end_date = datetime(year, month, last_day, 23, 59, 59)
+    start_date, end_date = get_month_range(year, month)
     start_ms = int(start_date.timestamp() * 1000)
     end_ms = int(end_date.timestamp() * 1000)
     
     try:
-        submissions = fetch_job_submissions(start_ms, end_ms, include_recruiter=True)
-        placements = fetch_placements(start_ms, end_ms, include_recruiter=True)
-        
-        if submissions is None or placements is None:
+        # Closed months come from the rollup store's week counters
+        result, timings, fetch_error = rollup_weekly(start_date, end_date)
+        if fetch_error:
             return jsonify({'error': 'Failed to fetch data from Bullhorn'}), 500
+        if result is not None:
+            return with_fetch_timings(jsonify(result), timings)
         
-        # Group by week
-        week_map = {}
-        
-        # Process submissions
-        for sub in submissions:
-            if not sub.get('dateAdded'):
-                continue
-            
-            week_start, week_end = get_week_range(sub['dateAdded'])
-            week_key = week_start.strftime('%Y-%m-%d')
-            
-            if week_key not in week_map:
-                week_map[week_key] = {
-                    'weekStart': week_start.strftime('%Y-%m-%d'),
-                    'weekEnd': week_end.strftime('%Y-%m-%d'),
-                    'submissions': 0,
-                    'presented': 0,
-                    'placed': 0,
-                    'byRecruiter': {}
-                }
-            
-            week_data = week_map[week_key]
-            week_data['submissions'] += 1
-            
-            # Check if presented (status is "Presented" or contains "presented")
-            status = sub.get('status', '') or ''
-            status_lower = status.lower()
-            if status_lower == 'presented' or 'presented' in status_lower:
-                week_data['presented'] += 1
-            
-            # Group by recruiter
-            recruiter_id = get_recruiter_id(sub)
-            recruiter_name = get_recruiter_name(sub)
-            recruiter_key = f"{recruiter_id}_{recruiter_name}"
-            
-            if recruiter_key not in week_data['byRecruiter']:
-                week_data['byRecruiter'][recruiter_key] = {
-                    'recruiterId': recruiter_id,
-                    'name': recruiter_name,
-                    'submissions': 0,
-                    'presented': 0,
-                    'placed': 0,
-                    'statusCounts': {}
-                }
-            
-            rec_data = week_data['byRecruiter'][recruiter_key]
-            rec_data['submissions'] += 1
-            
-            status_val = sub.get('status', 'Unknown')
-            if status_lower == 'presented' or 'presented' in status_lower:
-                rec_data['presented'] += 1
-            rec_data['statusCounts'][status_val] = rec_data['statusCounts'].get(status_val, 0) + 1
-        
-        # Process placements (count as "placed")
-        for place in placements:
-            if not place.get('dateAdded'):
-                continue
-            
-            week_start, week_end = get_week_range(place['dateAdded'])
-            week_key = week_start.strftime('%Y-%m-%d')
-            
-            if week_key not in week_map:
-                week_map[week_key] = {
-                    'weekStart': week_start.strftime('%Y-%m-%d'),
-                    'weekEnd': week_end.strftime('%Y-%m-%d'),
-                    'submissions': 0,
-                    'presented': 0,
-                    'placed': 0,
-                    'byRecruiter': {}
-                }
-            
-            week_data = week_map[week_key]
-            week_data['placed'] += 1
-            
-            # Group placement by recruiter
-            recruiter_id = get_recruiter_id(place)
-            recruiter_name = get_recruiter_name(place)
-            recruiter_key = f"{recruiter_id}_{recruiter_name}"
-            
-            if recruiter_key not in week_data['byRecruiter']:
-                week_data['byRecruiter'][recruiter_key] = {
-                    'recruiterId': recruiter_id,
-                    'name': recruiter_name,
-                    'submissions': 0,
-                    'presented': 0,
-                    'placed': 0,
-                    'statusCounts': {}
-                }
-            
-            week_data['byRecruiter'][recruiter_key]['placed'] += 1
-        
-        # Convert to list format
-        result = []
-        for week_key in sorted(week_map.keys()):
-            week_data = week_map[week_key]
-            week_data['byRecruiter'] = list(week_data['byRecruiter'].values())
-            result.append(week_data)
+        fetched, timings, fetch_error = fetch_entities_concurrently({
+            'submissions': (fetch_job_submissions, (start_ms, end_ms, True)),
+            'placements': (fetch_placements, (start_ms, end_ms, True)),
+        })
+        if fetch_error:
+            return jsonify({'error': 'Failed to fetch data from Bullhorn'}), 500
         
-        return jsonify(result)
+        result = aggregate_weekly(fetched['submissions'], fetched['placements'])
+        return with_fetch_timings(jsonify(result), timings)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -2975,249 +5569,508 @@ def api_analytics_monthly():
     
     year = request.args.get('year', datetime.now().year, type=int)
     month = request.args.get('month', datetime.now().month, type=int)
-    
-    # Calculate month date range
-    import calendar
-    start_date = datetime(year, month, 1)
-    last_day = calendar.monthrange(year, month)[1]
-    end_date = datetime(year, month, last_day, 23, 59, 59)
+    start_date, end_date = get_month_range(year, month)
     start_ms = int(start_date.timestamp() * 1000)
     end_ms = int(end_date.timestamp() * 1000)
     
     try:
-        submissions = fetch_job_submissions(start_ms, end_ms, include_recruiter=True)
-        placements = fetch_placements(start_ms, end_ms, include_recruiter=True)
-        
-        if submissions is None or placements is None:
+        # Closed months come from the rollup store
+        result, timings, fetch_error = rollup_monthly(start_date, end_date)
+        if fetch_error:
             return jsonify({'error': 'Failed to fetch data from Bullhorn'}), 500
+        if result is not None:
+            return with_fetch_timings(jsonify(result), timings)
         
-        # Aggregate for entire month
-        result = {
-            'monthStart': start_date.strftime('%Y-%m-%d'),
-            'monthEnd': end_date.strftime('%Y-%m-%d'),
-            'submissions': 0,
-            'presented': 0,
-            'placed': 0,
-            'byRecruiter': {}
-        }
-        
-        # Process submissions
-        for sub in submissions:
-            result['submissions'] += 1
-            
-            status = sub.get('status', '') or ''
-            status_lower = status.lower()
-            if status_lower == 'presented' or 'presented' in status_lower:
-                result['presented'] += 1
-            
-            # Group by recruiter
-            recruiter_id = get_recruiter_id(sub)
-            recruiter_name = get_recruiter_name(sub)
-            recruiter_key = f"{recruiter_id}_{recruiter_name}"
-            
-            if recruiter_key not in result['byRecruiter']:
-                result['byRecruiter'][recruiter_key] = {
-                    'recruiterId': recruiter_id,
-                    'name': recruiter_name,
-                    'submissions': 0,
-                    'presented': 0,
-                    'placed': 0,
-                    'statusCounts': {}
-                }
-            
-            rec_data = result['byRecruiter'][recruiter_key]
-            rec_data['submissions'] += 1
-            
-            status_val = sub.get('status', 'Unknown')
-            if status_lower == 'presented' or 'presented' in status_lower:
-                rec_data['presented'] += 1
-            rec_data['statusCounts'][status_val] = rec_data['statusCounts'].get(status_val, 0) + 1
-        
-        # Process placements (count as "placed")
-        for place in placements:
-            result['placed'] += 1
-            
-            # Group placement by recruiter
-            recruiter_id = get_recruiter_id(place)
-            recruiter_name = get_recruiter_name(place)
-            recruiter_key = f"{recruiter_id}_{recruiter_name}"
-            
-            if recruiter_key not in result['byRecruiter']:
-                result['byRecruiter'][recruiter_key] = {
-                    'recruiterId': recruiter_id,
-                    'name': recruiter_name,
-                    'submissions': 0,
-                    'presented': 0,
-                    'placed': 0,
-                    'statusCounts': {}
-                }
-            
-            result['byRecruiter'][recruiter_key]['placed'] += 1
+        fetched, timings, fetch_error = fetch_entities_concurrently({
+            'submissions': (fetch_job_submissions, (start_ms, end_ms, True)),
+            'placements': (fetch_placements, (start_ms, end_ms, True)),
+        })
+        if fetch_error:
+            return jsonify({'error': 'Failed to fetch data from Bullhorn'}), 500
         
-        result['byRecruiter'] = list(result['byRecruiter'].values())
-        return jsonify(result)
+        result = aggregate_monthly(fetched['submissions'], fetched['placements'], start_date, end_date)
+        return with_fetch_timings(jsonify(result), timings)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/submissions/detailed')
 def api_submissions_detailed():
-    """Fetch detailed submissions. Use start/end (YYYY-MM-DD), or year+month, or year."""
+    """Fetch detailed submissions. Use start/end (YYYY-MM-DD), or year+month, or year.
+    Optional owner/status/client filters (exact values), sort (e.g. -dateAdded, ownerName) and page/limit.
+    Rows come from a cached, indexed copy of the range; facets list every owner/status/client with counts."""
+    return detailed_response('submissions')
+
+@app.route('/api/analytics/recruiters')
+def api_analytics_recruiters():
+    """Get recruiter-level analytics. Use start/end (YYYY-MM-DD), or year+month, or year."""
     tokens = load_tokens()
-    
     if not tokens or not tokens.get('bh_rest_token'):
         return jsonify({'error': 'Not authenticated'}), 401
     
     start_ms, end_ms = parse_date_range_from_request()
     
-    # Query Bullhorn
     try:
-        rest_url = tokens['rest_url']
-        if not rest_url.endswith('/'):
-            rest_url += '/'
-        
-        url = f"{rest_url}query/JobSubmission"
+        # Whole closed months in the range come from the rollup store
+        result, timings, fetch_error = rollup_recruiters(start_ms, end_ms)
+        if fetch_error:
+            return jsonify({'error': 'Failed to fetch data from Bullhorn'}), 500
+        if result is not None:
+            return with_fetch_timings(jsonify({'recruiters': result}), timings)
         
-        # Full fields including candidate, job, client, and owner
-        fields = 'id,dateAdded,status,candidate(id,firstName,lastName,email),jobOrder(id,title,clientCorporation(id,name)),sendingUser(id,firstName,lastName)'
+        fetched, timings, fetch_error = fetch_entities_concurrently({
+            'submissions': (fetch_job_submissions, (start_ms, end_ms, True)),
+            'placements': (fetch_placements, (start_ms, end_ms, True)),
+        })
+        if fetch_error:
+            return jsonify({'error': 'Failed to fetch data from Bullhorn'}), 500
         
-        params = {
-            'BhRestToken': tokens['bh_rest_token'],
-            'where': f"dateAdded>={start_ms} AND dateAdded<={end_ms}",
-            'fields': fields,
-            'orderBy': '-dateAdded',
-            'count': 500
+        result = aggregate_recruiters(fetched['submissions'], fetched['placements'])
+        return with_fetch_timings(jsonify({'recruiters': result}), timings)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/notes-by-user')
+def api_analytics_notes_by_user():
+    """Get count of notes added per user in date range. Use start/end (YYYY-MM-DD), or year+month, or year."""
+    tokens = load_tokens()
+    if not tokens or not tokens.get('bh_rest_token'):
+        return jsonify({'error': 'Not authenticated'}), 401
+    start_ms, end_ms = parse_date_range_from_request()
+    try:
+        notes, err = fetch_notes(start_ms, end_ms)
+        if err is not None:
+            return jsonify({'error': err}), 500
+        return jsonify({'notesByUser': aggregate_notes_by_user(notes)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/summary')
+def api_analytics_summary():
+    """Stats, weekly chart series and owner list for the "At a glance" view. Use start/end (YYYY-MM-DD),
+    or year+month, or year. Optional owner=<sendingUser id> links placements to that owner's (candidate, job) submissions."""
+    tokens = load_tokens()
+    if not tokens or not tokens.get('bh_rest_token'):
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    start_ms, end_ms = parse_date_range_from_request()
+    owner_id = request.args.get('owner', '').strip() or None
+
+    try:
+        queries = {
+            'submissions': (fetch_rows_sharded, (
+                'JobSubmission',
+                'id,dateAdded,status,sendingUser(id,firstName,lastName),candidate(id),jobOrder(id)',
+                start_ms, end_ms
+            )),
+            'placements': (fetch_rows_sharded, (
+                'Placement',
+                'id,dateAdded,status,candidate(id),jobOrder(id)',
+                start_ms, end_ms
+            )),
         }
-        
-        response = requests.get(url, params=params, timeout=60)
-        response.raise_for_status()
-        data = response.json()
-        
-        submissions = data.get('data', [])
-        
-        # Format detailed data
-        formatted = []
-        for sub in submissions:
-            candidate = sub.get('candidate', {}) or {}
-            job = sub.get('jobOrder', {}) or {}
-            owner = sub.get('sendingUser', {}) or {}
-            client = job.get('clientCorporation', {}) or {}
-            
-            formatted.append({
-                'id': sub.get('id'),
-                'dateAdded': sub.get('dateAdded'),
-                'dateFormatted': datetime.fromtimestamp(sub.get('dateAdded', 0)/1000).strftime('%Y-%m-%d %H:%M') if sub.get('dateAdded') else None,
-                'status': sub.get('status', 'Unknown'),
-                'candidateId': candidate.get('id'),
-                'candidateName': f"{candidate.get('firstName', '')} {candidate.get('lastName', '')}".strip() or 'Unknown',
-                'candidateEmail': candidate.get('email', ''),
-                'jobId': job.get('id'),
-                'jobTitle': job.get('title', 'Unknown'),
-                'clientName': client.get('name', 'Unknown'),
-                'ownerId': owner.get('id'),
-                'ownerName': f"{owner.get('firstName', '')} {owner.get('lastName', '')}".strip() or 'Unknown'
-            })
-        
-        return jsonify({
-            'success': True,
-            'count': len(formatted),
-            'data': formatted
+        if owner_id:
+            # The owner's (candidate, job) pairs over the linkage window come from the submission link index
+            extended = shift_months(datetime.fromtimestamp(start_ms / 1000), -EXTENDED_SUBMISSIONS_MONTHS)
+            links_start_ms = int(extended.timestamp() * 1000)
+            queries['links'] = (ensure_submission_links, (links_start_ms, end_ms))
+
+        fetched, timings, fetch_error = fetch_entities_concurrently(queries)
+        if fetch_error:
+            return jsonify({'error': 'Failed to fetch data from Bullhorn'}), 500
+
+        owner_pairs = submission_pairs_for_owner(owner_id, links_start_ms, end_ms) if owner_id else None
+        result = compute_basic_summary(fetched['submissions'], fetched['placements'], start_ms, end_ms,
+                                       owner_id=owner_id, owner_pairs=owner_pairs)
+        result['success'] = True
+        result['owner'] = owner_id
+        return with_fetch_timings(jsonify(result), timings)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/kpis')
+def api_analytics_kpis():
+    """Top-line counts (submissions, placements, booked, cancelled) from Bullhorn totals, without downloading rows.
+    Use start/end (YYYY-MM-DD), or year+month, or year. Optional owner=<id>[,<id>...] adds per-recruiter counts."""
+    tokens = load_tokens()
+    if not tokens or not tokens.get('bh_rest_token'):
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    start_ms, end_ms = parse_date_range_from_request()
+    owner_ids = [o.strip() for o in request.args.get('owner', '').split(',') if o.strip()]
+    if not all(o.isdigit() for o in owner_ids):
+        return jsonify({'error': 'owner must be a comma-separated list of numeric ids'}), 400
+
+    try:
+        result, timings = compute_kpis(start_ms, end_ms, owner_ids)
+        if result is None:
+            return jsonify({'error': 'Failed to fetch counts from Bullhorn'}), 500
+        result['success'] = True
+        return with_fetch_timings(jsonify(result), timings)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/timeseries')
+def api_analytics_timeseries():
+    """Metric counts per day/week/month/quarter. Use start/end (YYYY-MM-DD), or year+month, or year.
+    granularity=day|week|month|quarter (default week), metrics=submissions,presented,placements,booked,cancelled,notes
+    (default submissions,placements), optional owner=<recruiter id>. Empty buckets are included."""
+    tokens = load_tokens()
+    if not tokens or not tokens.get('bh_rest_token'):
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    start_ms, end_ms = parse_date_range_from_request()
+    owner_id = request.args.get('owner', '').strip() or None
+    try:
+        metrics = parse_timeseries_metrics(request.args.get('metrics'))
+        index = calendar_index(request.args.get('granularity', 'week'), start_ms, end_ms)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        entities = {TIMESERIES_METRICS[metric][0] for metric in metrics}
+        fetched, timings, fetch_error = fetch_entities_concurrently({
+            entity: (fetch_rows_sharded, (entity, TIMESERIES_FIELDS[entity], start_ms, end_ms))
+            for entity in sorted(entities)
         })
-    
+        if fetch_error:
+            return jsonify({'error': 'Failed to fetch data from Bullhorn'}), 500
+
+        result = compute_timeseries(fetched, index, metrics, owner_id=owner_id)
+        result['success'] = True
+        return with_fetch_timings(jsonify(result), timings)
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+        return jsonify({'error': str(e)}), 500
 
-@app.route('/api/analytics/recruiters')
-def api_analytics_recruiters():
-    """Get recruiter-level analytics. Use start/end (YYYY-MM-DD), or year+month, or year."""
+@app.route('/api/analytics/cohorts')
+def api_analytics_cohorts():
+    """Submission cohorts with placement conversion, booked rate and time-to-placement per cohort.
+    Use start/end (YYYY-MM-DD), or year+month, or year for the submission window. granularity=week|month|quarter
+    (default month); optional owner=<sendingUser id>. Placements are matched by (candidate, job) up to today."""
     tokens = load_tokens()
     if not tokens or not tokens.get('bh_rest_token'):
         return jsonify({'error': 'Not authenticated'}), 401
-    
+
     start_ms, end_ms = parse_date_range_from_request()
-    
+    owner_id = request.args.get('owner', '').strip() or None
     try:
-        submissions = fetch_job_submissions(start_ms, end_ms, include_recruiter=True)
-        placements = fetch_placements(start_ms, end_ms, include_recruiter=True)
-        
-        if submissions is None or placements is None:
+        index = calendar_index(request.args.get('granularity', 'month'), start_ms, end_ms)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        now_ms = int(time.time() * 1000)
+        fetched, timings, fetch_error = fetch_entities_concurrently({
+            'links': (ensure_submission_links, (start_ms, end_ms)),
+            'placements': (fetch_cohort_placements, (start_ms, max(end_ms, now_ms))),
+        })
+        if fetch_error:
             return jsonify({'error': 'Failed to fetch data from Bullhorn'}), 500
-        
-        recruiter_map = {}
-        
-        # Process submissions
-        for sub in submissions:
-            recruiter_id = get_recruiter_id(sub)
-            recruiter_name = get_recruiter_name(sub)
-            recruiter_key = f"{recruiter_id}_{recruiter_name}"
-            
-            if recruiter_key not in recruiter_map:
-                recruiter_map[recruiter_key] = {
-                    'recruiterId': recruiter_id,
-                    'name': recruiter_name,
-                    'totalSubmissions': 0,
-                    'totalPlacements': 0,
-                    'statusBreakdown': {}
-                }
-            
-            rec_data = recruiter_map[recruiter_key]
-            rec_data['totalSubmissions'] += 1
-            
-            status = sub.get('status', 'Unknown')
-            rec_data['statusBreakdown'][status] = rec_data['statusBreakdown'].get(status, 0) + 1
-        
-        # Process placements
-        for place in placements:
-            recruiter_id = get_recruiter_id(place)
-            recruiter_name = get_recruiter_name(place)
-            recruiter_key = f"{recruiter_id}_{recruiter_name}"
-            
-            if recruiter_key not in recruiter_map:
-                recruiter_map[recruiter_key] = {
-                    'recruiterId': recruiter_id,
-                    'name': recruiter_name,
-                    'totalSubmissions': 0,
-                    'totalPlacements': 0,
-                    'statusBreakdown': {}
-                }
-            
-            recruiter_map[recruiter_key]['totalPlacements'] += 1
-        
-        result = list(recruiter_map.values())
-        result.sort(key=lambda x: x['totalSubmissions'], reverse=True)
-        
-        return jsonify({'recruiters': result})
+
+        result = compute_cohorts(start_ms, end_ms, index, fetched['placements'], owner_id=owner_id)
+        result['success'] = True
+        return with_fetch_timings(jsonify(result), timings)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/analytics/notes-by-user')
-def api_analytics_notes_by_user():
-    """Get count of notes added per user in date range. Use start/end (YYYY-MM-DD), or year+month, or year."""
+# ==================== BATCH QUERIES ====================
+
+BATCH_MAX_QUERIES = 20
+BATCH_FULL_ROWS = 10000  # Row budget for a fetch that also serves narrower ranges (must not be truncated)
+
+RECRUITER_SUBMISSION_FIELDS = 'id,dateAdded,status,sendingUser(id,firstName,lastName)'
+RECRUITER_PLACEMENT_FIELDS = 'id,dateAdded,owner(id,firstName,lastName)'
+SUMMARY_SUBMISSION_FIELDS = 'id,dateAdded,status,sendingUser(id,firstName,lastName),candidate(id),jobOrder(id)'
+SUMMARY_PLACEMENT_FIELDS = 'id,dateAdded,status,candidate(id),jobOrder(id)'
+NOTE_FIELDS = 'id,dateAdded,commentingPerson(id,firstName,lastName),action'
+
+def parse_field_selector(fields):
+    """Bullhorn fields selector -> nested dict, e.g. 'id,owner(id,name)' -> {'id': {}, 'owner': {'id': {}, 'name': {}}}."""
+    tree, stack, token = {}, [], ''
+    node = tree
+    for ch in fields:
+        if ch in ',()':
+            name = token.strip()
+            token = ''
+            if ch == '(':
+                stack.append(node)
+                node = node.setdefault(name, {})
+                continue
+            if name:
+                node.setdefault(name, {})
+            if ch == ')' and stack:
+                node = stack.pop()
+        else:
+            token += ch
+    if token.strip():
+        node.setdefault(token.strip(), {})
+    return tree
+
+def format_field_selector(tree):
+    """Inverse of parse_field_selector."""
+    return ','.join(name + (f"({format_field_selector(sub)})" if sub else '') for name, sub in tree.items())
+
+def merge_field_selectors(*selectors):
+    """Union of Bullhorn fields selectors, merging nested selections (owner(id) + owner(name) -> owner(id,name))."""
+    def merge(into, other):
+        for name, sub in other.items():
+            merge(into.setdefault(name, {}), sub)
+    merged = {}
+    for selector in selectors:
+        merge(merged, parse_field_selector(selector))
+    return format_field_selector(merged)
+
+def batch_int(params, name, default):
+    try:
+        return int(params.get(name))
+    except (TypeError, ValueError):
+        return default
+
+def rollup_result(outcome):
+    """Result of rollup_recruiters/rollup_monthly/rollup_weekly inside a batch build, raising on fetch failure."""
+    result, _, error = outcome
+    if error:
+        raise RuntimeError('Failed to fetch data from Bullhorn')
+    return result
+
+def plan_batch_query(params):
+    """
+    Upstream needs and result builder for one batch sub-query.
+
+    Args:
+        params: Sub-query dict: type plus the query args of the matching endpoint (start/end, year/month, owner, ...)
+
+    Returns:
+        (needs, build): needs maps a local name to a row fetch (entity, fields, start_ms, end_ms, max_rows)
+        or to a sub-query (function, args) run in the same concurrent plan, using the standalone
+        endpoint's data path; build(rows) turns {name: rows or sub-query result} into the payload the
+        standalone endpoint would return.
+
+    Raises:
+        ValueError: Unknown type or malformed date
+    """
+    qtype = params.get('type')
+
+    if qtype in ('weekly', 'monthly'):
+        start_date, end_date = get_month_range(
+            batch_int(params, 'year', datetime.now().year), batch_int(params, 'month', datetime.now().month))
+        start_ms, end_ms = int(start_date.timestamp() * 1000), int(end_date.timestamp() * 1000)
+        needs = {
+            'submissions': ('JobSubmission', RECRUITER_SUBMISSION_FIELDS, start_ms, end_ms, BATCH_FULL_ROWS),
+            'placements': ('Placement', RECRUITER_PLACEMENT_FIELDS, start_ms, end_ms, BATCH_FULL_ROWS),
+        }
+        if closed_rollup_months(start_ms, end_ms):
+            rollup = rollup_weekly if qtype == 'weekly' else rollup_monthly
+            return {'rollup': (rollup, (start_date, end_date))}, lambda rows: rollup_result(rows['rollup'])
+        if qtype == 'weekly':
+            return needs, lambda rows: aggregate_weekly(rows['submissions'], rows['placements'])
+        return needs, lambda rows: aggregate_monthly(rows['submissions'], rows['placements'], start_date, end_date)
+
+    start_ms, end_ms = parse_date_range(params)
+
+    if qtype == 'recruiters' and closed_rollup_months(start_ms, end_ms):
+        needs = {'rollup': (rollup_recruiters, (start_ms, end_ms))}
+        return needs, lambda rows: {'recruiters': rollup_result(rows['rollup'])}
+
+    if qtype == 'recruiters':
+        needs = {
+            'submissions': ('JobSubmission', RECRUITER_SUBMISSION_FIELDS, start_ms, end_ms, BATCH_FULL_ROWS),
+            'placements': ('Placement', RECRUITER_PLACEMENT_FIELDS, start_ms, end_ms, BATCH_FULL_ROWS),
+        }
+        return needs, lambda rows: {'recruiters': aggregate_recruiters(rows['submissions'], rows['placements'])}
+
+    if qtype == 'summary':
+        owner_id = str(params.get('owner') or '').strip() or None
+        needs = {
+            'submissions': ('JobSubmission', SUMMARY_SUBMISSION_FIELDS, start_ms, end_ms, BATCH_FULL_ROWS),
+            'placements': ('Placement', SUMMARY_PLACEMENT_FIELDS, start_ms, end_ms, BATCH_FULL_ROWS),
+        }
+        if owner_id:
+            # As in /api/analytics/summary: the owner's pairs over the linkage window come from the link index
+            extended = shift_months(datetime.fromtimestamp(start_ms / 1000), -EXTENDED_SUBMISSIONS_MONTHS)
+            links_start_ms = int(extended.timestamp() * 1000)
+            needs['links'] = (ensure_submission_links, (links_start_ms, end_ms))
+
+        def build_summary(rows):
+            owner_pairs = submission_pairs_for_owner(owner_id, links_start_ms, end_ms) if owner_id else None
+            result = compute_basic_summary(rows['submissions'], rows['placements'], start_ms, end_ms,
+                                           owner_id=owner_id, owner_pairs=owner_pairs)
+            result['owner'] = owner_id
+            return result
+        return needs, build_summary
+
+    if qtype == 'kpis':
+        owner_ids = [o.strip() for o in str(params.get('owner') or '').split(',') if o.strip()]
+        if not all(o.isdigit() for o in owner_ids):
+            raise ValueError('owner must be a comma-separated list of numeric ids')
+
+        def build_kpis(rows):
+            result, _ = rows['kpis']
+            if result is None:
+                raise RuntimeError('Failed to fetch counts from Bullhorn')
+            return result
+        return {'kpis': (compute_kpis, (start_ms, end_ms, owner_ids))}, build_kpis
+
+    if qtype == 'timeseries':
+        metrics = parse_timeseries_metrics(params.get('metrics'))
+        index = calendar_index(params.get('granularity') or 'week', start_ms, end_ms)
+        owner_id = str(params.get('owner') or '').strip() or None
+        needs = {
+            entity: (entity, TIMESERIES_FIELDS[entity], start_ms, end_ms, BATCH_FULL_ROWS)
+            for entity in {TIMESERIES_METRICS[metric][0] for metric in metrics}
+        }
+        return needs, lambda rows: compute_timeseries(rows, index, metrics, owner_id=owner_id)
+
+    if qtype == 'notes-by-user':
+        needs = {'notes': ('Note', NOTE_FIELDS, start_ms, end_ms, 2000)}
+        return needs, lambda rows: {'notesByUser': aggregate_notes_by_user(rows['notes'])}
+
+    if qtype in ('submissions', 'placements'):
+        entity, fields = (('JobSubmission', SUMMARY_SUBMISSION_FIELDS) if qtype == 'submissions'
+                          else ('Placement', SUMMARY_PLACEMENT_FIELDS))
+        count = max(1, min(batch_int(params, 'count', BULLHORN_PAGE_SIZE), 5000))
+        needs = {'rows': (entity, fields, start_ms, end_ms, count)}
+        return needs, lambda rows: {'count': len(rows['rows']), 'data': rows['rows']}
+
+    if qtype and qtype.startswith('detailed-') and qtype[len('detailed-'):] in DETAILED_DATASETS:
+        kind = qtype[len('detailed-'):]
+        key = ('detailed', kind, start_ms, end_ms)
+        refresh = str(params.get('refresh', '')).lower() == 'true'
+        cached = None if refresh else cache_get(key)
+        entity, fields, formatter = DETAILED_DATASETS[kind]
+        needs = {} if cached is not None else {'rows': (entity, fields, start_ms, end_ms, BATCH_FULL_ROWS)}
+
+        def build_detailed(rows):
+            index = cached
+            if index is None:
+                index = cache_set(key, build_detailed_index([formatter(r) for r in rows['rows']]))
+            filters = {param: str(params.get(param) or '').strip() for param in list(DETAILED_INDEXED_FIELDS) + ['open']}
+            result = query_detailed_index(
+                index, filters,
+                sort=params.get('sort') or '-dateAdded',
+                page=batch_int(params, 'page', None),
+                limit=batch_int(params, 'limit', None)
+            )
+            return {'count': len(result['data']), **result}
+        return needs, build_detailed
+
+    raise ValueError(f"Unknown query type: {qtype}")
+
+def build_fetch_plan(needs):
+    """
+    Collapse upstream needs into the fewest Bullhorn fetches.
+
+    A need shares a fetch with another need for the same entity whose date range contains its own;
+    field selectors are unioned. A fetch that serves a narrower range is given the full row budget so
+    the narrower slice is never cut off by truncation.
+
+    Args:
+        needs: List of (entity, fields, start_ms, end_ms, max_rows)
+
+    Returns:
+        (plan, served_by): list of fetch dicts (entity, fields, start, end, maxRows) and, per need,
+        the position of the fetch serving it
+    """
+    plan = []
+    served_by = [None] * len(needs)
+    # Widest ranges first so narrower ones can fold into them
+    for i in sorted(range(len(needs)), key=lambda i: needs[i][2] - needs[i][3]):
+        entity, fields, start_ms, end_ms, max_rows = needs[i]
+        for pos, fetch in enumerate(plan):
+            if fetch['entity'] == entity and fetch['start'] <= start_ms and end_ms <= fetch['end']:
+                fetch['fields'] = merge_field_selectors(fetch['fields'], fields)
+                narrower = (fetch['start'], fetch['end']) != (start_ms, end_ms)
+                fetch['maxRows'] = max(fetch['maxRows'], BATCH_FULL_ROWS if narrower else max_rows)
+                served_by[i] = pos
+                break
+        else:
+            plan.append({'entity': entity, 'fields': fields, 'start': start_ms, 'end': end_ms, 'maxRows': max_rows})
+            served_by[i] = len(plan) - 1
+    return plan, served_by
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    """
+    Run several dashboard queries in one round-trip.
+
+    Body: {"queries": [{"id": "glance", "type": "summary", "start": "YYYY-MM-DD", "end": "YYYY-MM-DD", "owner": "ID"}, ...]}
+    Types: summary, kpis, timeseries, recruiters, weekly, monthly, notes-by-user, submissions, placements,
+    detailed-submissions, detailed-placements, detailed-jobs; other keys are the matching endpoint's query args.
+    Upstream needs are deduplicated into one fetch plan executed concurrently; each result carries its own status.
+    """
     tokens = load_tokens()
     if not tokens or not tokens.get('bh_rest_token'):
         return jsonify({'error': 'Not authenticated'}), 401
-    start_ms, end_ms = parse_date_range_from_request()
+
+    body = request.get_json(silent=True) or {}
+    queries = body.get('queries') if isinstance(body, dict) else None
+    if not isinstance(queries, list) or not queries:
+        return jsonify({'error': 'Body must be {"queries": [...]}'}), 400
+    if len(queries) > BATCH_MAX_QUERIES:
+        return jsonify({'error': f'At most {BATCH_MAX_QUERIES} queries per batch'}), 400
+
+    results = {}
+    planned = []  # (query id, build, {local name: need position}, {local name: sub-query name})
+    needs = []
+    subqueries = {}
+    seen_ids = set()
+    for i, params in enumerate(queries):
+        if not isinstance(params, dict):
+            return jsonify({'error': f'Query {i} must be an object'}), 400
+        query_id = str(params.get('id') or i)
+        if query_id in seen_ids:
+            return jsonify({'error': f'Duplicate query id: {query_id}'}), 400
+        seen_ids.add(query_id)
+        try:
+            query_needs, build = plan_batch_query(params)
+        except ValueError as e:
+            results[query_id] = {'status': 400, 'error': str(e)}
+            continue
+        positions, calls = {}, {}
+        for name, need in query_needs.items():
+            if callable(need[0]):
+                calls[name] = f"{query_id}-{name}"
+                subqueries[calls[name]] = need
+            else:
+                positions[name] = len(needs)
+                needs.append(need)
+        planned.append((query_id, build, positions, calls))
+
     try:
-        notes, err = fetch_notes(start_ms, end_ms)
-        if err is not None:
-            return jsonify({'error': err}), 500
-        user_map = {}
-        for n in (notes or []):
-            person = n.get('commentingPerson') or {}
-            uid = person.get('id')
-            name = f"{person.get('firstName', '')} {person.get('lastName', '')}".strip() or "Unknown"
-            if uid is None:
-                uid = 0
-                name = name or "Unknown"
-            key = f"{uid}_{name}"
-            if key not in user_map:
-                user_map[key] = {'userId': uid, 'name': name, 'noteCount': 0}
-            user_map[key]['noteCount'] += 1
-        result = list(user_map.values())
-        result.sort(key=lambda x: x['noteCount'], reverse=True)
-        return jsonify({'notesByUser': result})
+        plan, served_by = build_fetch_plan(needs)
+        fetch_names = [f"{fetch['entity']}-{pos}" for pos, fetch in enumerate(plan)]
+        # Row fetches and sub-queries (rollups, count probes, link indexing) share one concurrent plan
+        fetched, timings, fetch_error = fetch_entities_concurrently({
+            **{name: (fetch_rows_sharded, (fetch['entity'], fetch['fields'], fetch['start'], fetch['end'], fetch['maxRows']))
+               for name, fetch in zip(fetch_names, plan)},
+            **subqueries,
+        })
+
+        for query_id, build, positions, calls in planned:
+            rows = {name: fetched[call_name] for name, call_name in calls.items() if fetched[call_name] is not None}
+            for name, need_pos in positions.items():
+                fetch_rows = fetched[fetch_names[served_by[need_pos]]]
+                if fetch_rows is None:
+                    break
+                _, _, start_ms, end_ms, max_rows = needs[need_pos]
+                # Rows are newest first, so the range slice capped at max_rows matches a standalone fetch
+                rows[name] = [r for r in fetch_rows if start_ms <= (r.get('dateAdded') or 0) <= end_ms][:max_rows]
+            if len(rows) < len(positions) + len(calls):
+                results[query_id] = {'status': 500, 'error': fetch_error or 'Failed to fetch data from Bullhorn'}
+                continue
+            try:
+                results[query_id] = {'status': 200, 'data': build(rows)}
+            except Exception as e:
+                results[query_id] = {'status': 500, 'error': str(e)}
+
+        for pos, fetch in enumerate(plan):
+            fetch['serves'] = [query_id for query_id, _, positions, _ in planned
+                               if any(served_by[need_pos] == pos for need_pos in positions.values())]
+        return with_fetch_timings(jsonify({
+            'success': fetch_error is None,
+            'results': results,
+            'fetchPlan': plan,
+            'upstreamNeeds': len(needs),
+        }), timings)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -3228,27 +6081,62 @@ def ahsa_page():
     """Render AHSA job board page"""
     return render_template_string(AHSA_HTML_TEMPLATE)
 
-def normalize_ahsa_job_for_display(full_job):
-    """Build display dict (id, title, location, datePosted, status) from full AHSA job."""
-    flat = flatten(full_job)
-    job_id = str(full_job.get("Number") or full_job.get("Id") or flat.get("Id") or "unknown")
-    title = flat.get("Position.Title") or flat.get("Title") or full_job.get("Title") or "Untitled"
-    loc_parts = [
-        flat.get("Location.City"),
-        flat.get("Location.State"),
-        flat.get("Location"),
-        flat.get("Address"),
-        flat.get("City"),
-        full_job.get("Location"),
-        full_job.get("Address"),
-        full_job.get("City"),
-    ]
-    location = ", ".join(str(x).strip() for x in loc_parts if x and str(x).strip()) or "N/A"
-    date_val = (
-        flat.get("PostedDate") or flat.get("CreatedAt") or flat.get("DatePosted")
-        or flat.get("Position.PostedDate")
-        or full_job.get("PostedDate") or full_job.get("CreatedAt") or full_job.get("DatePosted")
-    )
+def path_getter(path, sep="."):
+    """
+    Compiled equivalent of flatten(doc, sep=sep).get(path): walks the nested dicts directly instead
+    of building a flat copy. A dict at the end of the path reads as None (flatten only keeps leaves)
+    and a list as its JSON text.
+    """
+    keys = tuple(path.split(sep))
+
+    def get(doc):
+        value = doc
+        for key in keys:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        if isinstance(value, dict):
+            return None
+        if isinstance(value, list):
+            return json.dumps(value)
+        return value
+    return get
+
+def key_getter(key):
+    """Raw top-level value of a document (what job.get(key) returns)."""
+    return lambda doc: doc.get(key)
+
+def first_value(doc, getters):
+    """Evaluate getters lazily like an `or` chain: the first truthy value, else the last value."""
+    value = None
+    for get in getters:
+        value = get(doc)
+        if value:
+            return value
+    return value
+
+# Candidate fields of a full AHSA job, in priority order (flattened paths first, then raw keys)
+AHSA_ID_GETTERS = (key_getter("Number"), key_getter("Id"), path_getter("Id"))
+AHSA_TITLE_GETTERS = (path_getter("Position.Title"), path_getter("Title"), key_getter("Title"))
+AHSA_DESCRIPTION_GETTERS = (path_getter("Description"), path_getter("Position.Description"),
+                            key_getter("Description"), key_getter("Summary"))
+AHSA_LOCATION_GETTERS = (path_getter("Location.City"), path_getter("Location.State"), path_getter("Location"),
+                         path_getter("Address"), path_getter("City"),
+                         key_getter("Location"), key_getter("Address"), key_getter("City"))
+AHSA_DATE_GETTERS = (path_getter("PostedDate"), path_getter("CreatedAt"), path_getter("DatePosted"),
+                     path_getter("Position.PostedDate"),
+                     key_getter("PostedDate"), key_getter("CreatedAt"), key_getter("DatePosted"))
+AHSA_STATUS_GETTERS = (path_getter("Status"), key_getter("Status"))
+
+def normalize_ahsa_job(full_job):
+    """
+    The fields the AHSA page and the Supabase push read from a full job, in one pass:
+    id, title, description, location and date_posted (None when absent) and status.
+    """
+    loc_parts = [get(full_job) for get in AHSA_LOCATION_GETTERS]
+    location = ", ".join(str(x).strip() for x in loc_parts if x and str(x).strip()) if any(loc_parts) else None
+    date_val = first_value(full_job, AHSA_DATE_GETTERS)
+    date_posted = None
     if date_val is not None:
         if isinstance(date_val, (int, float)):
             date_posted = datetime.fromtimestamp(date_val / 1000).isoformat() if date_val > 1e12 else datetime.fromtimestamp(date_val).isoformat()
@@ -3259,20 +6147,124 @@ def normalize_ahsa_job_for_display(full_job):
                 date_posted = date_val
         else:
             date_posted = str(date_val)
-    else:
-        date_posted = "N/A"
-    status = flat.get("Status") or full_job.get("Status") or "Unknown"
-    return {"id": job_id, "title": title, "location": location, "datePosted": date_posted, "status": status}
+    return {
+        "id": str(first_value(full_job, AHSA_ID_GETTERS) or "unknown"),
+        "title": first_value(full_job, AHSA_TITLE_GETTERS) or "Untitled",
+        "description": first_value(full_job, AHSA_DESCRIPTION_GETTERS),
+        "location": location,
+        "date_posted": date_posted,
+        "status": first_value(full_job, AHSA_STATUS_GETTERS) or "Unknown",
+    }
+
+def normalize_ahsa_job_for_display(full_job, normalized=None):
+    """Build display dict (id, title, location, datePosted, status) from full AHSA job."""
+    normalized = normalized or normalize_ahsa_job(full_job)
+    return {
+        "id": normalized["id"],
+        "title": normalized["title"],
+        "location": normalized["location"] or "N/A",
+        "datePosted": "N/A" if normalized["date_posted"] is None else normalized["date_posted"],
+        "status": normalized["status"],
+    }
+
+# AHSA pulls run as a pipeline: /Job/{num} detail fetches feed normalization, which feeds chunked
+# Supabase upserts. Stages overlap and are joined by bounded queues, so only a few payloads are in
+# memory at a time and a slow stage holds back the ones before it.
+AHSA_FETCH_WORKERS = 4  # Concurrent /Job/{num} requests
+AHSA_QUEUE_SIZE = 50  # Items buffered between two pipeline stages
+AHSA_UPSERT_CHUNK = 200  # Rows per Supabase upsert
+
+class PipelineError:
+    """Carries a stage's exception through its output queue."""
+    def __init__(self, error):
+        self.error = error
+
+class PipelineStop(threading.Event):
+    """Stop signal shared by chained stages. It remembers the first stage failure, so every consumer
+    that is cut short re-raises that error instead of ending as if its source had run out."""
+    error = None
+
+    def fail(self, error):
+        if self.error is None:
+            self.error = error
+        self.set()
+
+def threaded_map(func, source, workers=1, stop=None, maxsize=AHSA_QUEUE_SIZE):
+    """
+    One pipeline stage: yield func(item) for each item of `source` (None results are dropped),
+    computed on `workers` threads and yielded in completion order through a bounded queue.
+
+    Stages sharing a `stop` (PipelineStop) wind down together: it is set when a consumer stops early
+    or a stage fails. A failure is re-raised to the consumer of every stage it cuts short, so the
+    end of a chain sees the error even when the failing stage is further up.
+    """
+    stop = stop or PipelineStop()
+    outbox = queue.Queue(maxsize=maxsize)
+    source = iter(source)
+    source_lock = threading.Lock()
+    finished = object()
+    priority = current_upstream_priority()  # Stage threads call upstream in the caller's class
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                outbox.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @upstream_priority(priority)
+    def work():
+        try:
+            while not stop.is_set():
+                with source_lock:
+                    item = next(source, finished)
+                if item is finished:
+                    break
+                result = func(item)
+                if result is not None and not put(result):
+                    break
+        except Exception as e:
+            put(PipelineError(e))
+            if isinstance(stop, PipelineStop):
+                stop.fail(e)  # Also reaches the consumers of the other stages, which stop without draining
+        finally:
+            put(finished)
+
+    for _ in range(workers):
+        threading.Thread(target=work, daemon=True, name=f'pipeline-{getattr(func, "__name__", "stage")}').start()
+
+    done_workers = 0
+    completed = False
+    try:
+        while done_workers < workers and not stop.is_set():
+            try:
+                item = outbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is finished:
+                done_workers += 1
+            elif isinstance(item, PipelineError):
+                raise item.error
+            else:
+                yield item
+        completed = done_workers == workers
+        if not completed and getattr(stop, 'error', None) is not None:
+            raise stop.error
+    finally:
+        if not completed:
+            stop.set()
 
-def fetch_ahsa_jobs():
-    """Fetch jobs from AHSA API: list from /Job then full detail from /Job/{num}."""
+def fetch_ahsa_job_numbers(task=None):
+    """Job numbers from the AHSA /Job list."""
     base = AHSA_API_BASE_URL.rstrip("/")
     headers = {"X-API-KEY": AHSA_API_KEY, "Accept": "application/json"}
 
-    # 1. Job list
+    task_progress(task, phase='listing')
     list_url = f"{base}/Job"
     print(f"Pulling job list from {list_url}...")
-    resp = requests.get(list_url, headers=headers, timeout=30)
+    resp = upstream_get(list_url, headers=headers, timeout=30)
     resp.raise_for_status()
     jobs_response = resp.json()
 
@@ -3288,110 +6280,213 @@ def fetch_ahsa_jobs():
     job_numbers = [j.get("Number") for j in jobs if j.get("Number") is not None]
     if not job_numbers:
         print("No job numbers found in list")
+    else:
+        print(f"Found {len(job_numbers)} jobs")
+    return job_numbers
+
+def fetch_ahsa_job_detail(num, task=None):
+    """Full job from /Job/{num}, or None if the request failed (recorded on the task)."""
+    base = AHSA_API_BASE_URL.rstrip("/")
+    headers = {"X-API-KEY": AHSA_API_KEY, "Accept": "application/json"}
+    try:
+        r = upstream_get(f"{base}/Job/{num}", headers=headers, timeout=30)
+        r.raise_for_status()
+        full_job = r.json()
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching Job/{num}: {e}")
+        task_progress(task, error=f"Job/{num}: {e}")
+        return None
+    task_progress(task, fetched=1)
+    return full_job
+
+def iter_ahsa_job_details(job_numbers, task=None, stop=None):
+    """Pipeline stage: full jobs for job_numbers as (position, job), fetched AHSA_FETCH_WORKERS at a time."""
+    def fetch(numbered):
+        position, num = numbered
+        full_job = fetch_ahsa_job_detail(num, task)
+        return None if full_job is None else (position, full_job)
+    return threaded_map(fetch, enumerate(job_numbers), workers=AHSA_FETCH_WORKERS, stop=stop)
+
+def fetch_ahsa_jobs(task=None):
+    """Fetch jobs from AHSA API: list from /Job then full detail from /Job/{num} (in list order)."""
+    job_numbers = fetch_ahsa_job_numbers(task)
+    if not job_numbers:
         return []
-    print(f"Found {len(job_numbers)} jobs")
+    task_progress(task, phase='fetching details')
+    fetched = sorted(iter_ahsa_job_details(job_numbers, task), key=lambda numbered: numbered[0])
+    print(f"Fetched {len(fetched)}/{len(job_numbers)} jobs")
+    return [full_job for _, full_job in fetched]
 
-    # 2. Full job detail per number
-    full_jobs = []
-    for i, num in enumerate(job_numbers, 1):
-        try:
-            r = requests.get(f"{base}/Job/{num}", headers=headers, timeout=30)
-            r.raise_for_status()
-            full_job = r.json()
-            full_jobs.append(full_job)
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching Job/{num}: {e}")
-            continue
-        if i % 25 == 0:
-            print(f"Fetched {i}/{len(job_numbers)} jobs")
+# The jobs the AHSA page displays are kept as a snapshot so the push can upsert exactly that dataset
+# instead of pulling every job again. Snapshots live in the analytics database (any gunicorn worker
+# can serve the push) as compressed JSON.
+AHSA_SNAPSHOT_TTL_SECONDS = 1800
 
-    return full_jobs
+def store_ahsa_snapshot(jobs, normalized):
+    """Save a fetched AHSA dataset with its normalize_ahsa_job() results; returns its snapshot id."""
+    snapshot_id = uuid.uuid4().hex[:16]
+    now = time.time()
+    with _rollup_lock, closing(rollup_db()) as conn, conn:
+        conn.execute('DELETE FROM ahsa_snapshots WHERE expires_at < ?', (now,))
+        conn.execute('INSERT INTO ahsa_snapshots (id, job_count, created_at, expires_at, payload) VALUES (?, ?, ?, ?, ?)',
+                     (snapshot_id, len(jobs), now, now + AHSA_SNAPSHOT_TTL_SECONDS,
+                      encode_snapshot({'jobs': jobs, 'normalized': normalized})))
+    return snapshot_id
+
+def load_ahsa_snapshot(snapshot_id):
+    """(jobs, normalized) of a snapshot, or (None, None) if it is unknown or expired."""
+    with _rollup_lock, closing(rollup_db()) as conn:
+        row = conn.execute('SELECT payload FROM ahsa_snapshots WHERE id = ? AND expires_at >= ?',
+                           (snapshot_id, time.time())).fetchone()
+    if not row:
+        return None, None
+    dataset = decode_snapshot(row[0])
+    return dataset['jobs'], dataset['normalized']
 
 @app.route('/api/ahsa/jobs')
 def api_ahsa_jobs():
-    """API endpoint to fetch AHSA jobs (returns normalized list for UI)."""
+    """API endpoint to fetch AHSA jobs (returns normalized list for UI, plus the snapshotId to push)."""
     try:
         jobs = fetch_ahsa_jobs()
-        data = [normalize_ahsa_job_for_display(j) for j in jobs] if jobs else []
-        return jsonify({"success": True, "data": data, "count": len(data)}), 200
+        normalized = [normalize_ahsa_job(j) for j in jobs] if jobs else []
+        data = [normalize_ahsa_job_for_display(j, n) for j, n in zip(jobs, normalized)] if jobs else []
+        snapshot_id = store_ahsa_snapshot(jobs, normalized) if jobs else None
+        return jsonify({"success": True, "data": data, "count": len(data), "snapshotId": snapshot_id}), 200
     except Exception as e:
         error_msg = str(e)
         print(f"❌ API error: {error_msg}")
         return jsonify({"success": False, "data": [], "count": 0, "error": error_msg}), 500
 
-def push_ahsa_jobs_to_supabase(jobs_data):
-    """Push AHSA jobs to Supabase ahsa_jobs table using flatten + full job for columns and raw_data."""
-    if not supabase:
-        raise Exception("Supabase client not initialized. Set SUPABASE_URL and SUPABASE_SERVICE_KEY environment variables.")
+# Raw AHSA payloads are content-addressed: each distinct job JSON is stored once, zlib-compressed, in
+# ahsa_raw_payloads and ahsa_jobs rows link it by raw_hash (raw_data is cleared). A job whose payload
+# hash is unchanged since the last push is not written at all. Needs:
+#   create table ahsa_raw_payloads (hash text primary key, payload text not null, raw_size integer,
+#                                   stored_size integer, created_at timestamptz default now());
+#   alter table ahsa_jobs add column raw_hash text;
+# Until then (or with AHSA_RAW_STORE=inline) pushes write the full raw_data as before.
+AHSA_RAW_STORE = os.environ.get('AHSA_RAW_STORE', 'dedup')
+AHSA_RAW_TABLE = 'ahsa_raw_payloads'
+SUPABASE_PAGE_SIZE = 1000  # PostgREST's default max rows per select
 
-    if not jobs_data or len(jobs_data) == 0:
-        print("⚠️ No jobs data to push")
-        return {"success": False, "error": "No jobs data provided", "count": 0}
+def canonical_json(doc):
+    return json.dumps(doc, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+
+def ahsa_raw_hash(job):
+    """sha256 of a job's canonical JSON (key order and whitespace do not matter)."""
+    return hashlib.sha256(canonical_json(job)).hexdigest()
+
+def encode_ahsa_raw_payload(job):
+    """ahsa_raw_payloads row for a job: base64 of the zlib-compressed canonical JSON."""
+    raw = canonical_json(job)
+    stored = base64.b64encode(zlib.compress(raw, 9)).decode('ascii')
+    return {"hash": hashlib.sha256(raw).hexdigest(), "payload": stored, "raw_size": len(raw), "stored_size": len(stored)}
 
+def decode_ahsa_raw_payload(payload):
+    """The job JSON behind an ahsa_raw_payloads.payload value."""
+    return json.loads(zlib.decompress(base64.b64decode(payload)).decode('utf-8'))
+
+def fetch_ahsa_raw_hashes():
+    """{job id: raw_hash} for every ahsa_jobs row, or None when the raw store is off or not set up.
+    Rows compaction marked closed map to None, so a job that reappears is always written again."""
+    if AHSA_RAW_STORE != 'dedup':
+        return None
+    supabase = get_supabase()
+    hashes = {}
     try:
-        synced_at = datetime.now().isoformat()
-        upsert_data = []
-
-        for job in jobs_data:
-            flat = flatten(job)
-            job_id = str(job.get("Number") or job.get("Id") or flat.get("Id") or "unknown")
-            title = flat.get("Position.Title") or flat.get("Title") or job.get("Title") or "Untitled"
-            description = flat.get("Description") or flat.get("Position.Description") or job.get("Description") or job.get("Summary")
-            loc_parts = [
-                flat.get("Location.City"),
-                flat.get("Location.State"),
-                flat.get("Location"),
-                flat.get("Address"),
-                flat.get("City"),
-                job.get("Location"),
-                job.get("Address"),
-                job.get("City"),
-            ]
-            location = ", ".join(str(x).strip() for x in loc_parts if x and str(x).strip()) if any(loc_parts) else None
+        start = 0
+        while True:
+            page = supabase.table("ahsa_jobs").select("id,raw_hash,status").range(start, start + SUPABASE_PAGE_SIZE - 1).execute().data or []
+            hashes.update((row["id"], None if row.get("status") == AHSA_CLOSED_STATUS else row.get("raw_hash")) for row in page)
+            if len(page) < SUPABASE_PAGE_SIZE:
+                return hashes
+            start += SUPABASE_PAGE_SIZE
+    except Exception as e:
+        print(f"⚠️ AHSA raw payload store unavailable, pushing raw_data inline: {e}")
+        return None
 
-            date_val = (
-                flat.get("PostedDate") or flat.get("CreatedAt") or flat.get("DatePosted")
-                or flat.get("Position.PostedDate")
-                or job.get("PostedDate") or job.get("CreatedAt") or job.get("DatePosted")
-            )
-            date_posted = None
-            if date_val is not None:
-                if isinstance(date_val, (int, float)):
-                    date_posted = datetime.fromtimestamp(date_val / 1000).isoformat() if date_val > 1e12 else datetime.fromtimestamp(date_val).isoformat()
-                elif isinstance(date_val, str):
-                    try:
-                        date_posted = datetime.fromisoformat(date_val.replace("Z", "+00:00")).isoformat()
-                    except Exception:
-                        date_posted = date_val
-                else:
-                    date_posted = str(date_val)
-
-            status = flat.get("Status") or job.get("Status") or "Unknown"
-
-            row = {
-                "id": job_id,
-                "title": title,
-                "description": description,
-                "location": location,
-                "date_posted": date_posted,
-                "status": status,
-                "source": "AHSA",
-                "created_at": synced_at,
-                "updated_at": synced_at,
-                "raw_data": job,
-            }
-            upsert_data.append(row)
+def ahsa_row(job, fields, synced_at):
+    """ahsa_jobs row: normalized fields as columns, the full job as raw_data, plus its raw_hash."""
+    return {
+        **fields,
+        "source": "AHSA",
+        "created_at": synced_at,
+        "updated_at": synced_at,
+        "raw_data": job,
+        "raw_hash": ahsa_raw_hash(job) if AHSA_RAW_STORE == 'dedup' else None,
+    }
+
+def upsert_ahsa_rows(rows, task=None, run=None):
+    """
+    Last pipeline stage: upsert rows into ahsa_jobs in AHSA_UPSERT_CHUNK batches as they arrive.
+    With the raw store, rows whose raw_hash matches the stored one are skipped, and new payloads
+    are written to ahsa_raw_payloads (once per hash) ahead of the rows that link them. Each batch
+    (skipped rows included) is checkpointed on the sync journal `run` when one is given.
+
+    Returns:
+        (upserted, unchanged) row counts
+    """
+    known = fetch_ahsa_raw_hashes()
+    stored_hashes = set(known.values()) if known is not None else set()
+    chunk, payloads, ids = [], {}, []
+    upserted = unchanged = 0
 
-        supabase.table("ahsa_jobs").upsert(upsert_data, on_conflict="id").execute()
-        print(f"✅ Synced {len(upsert_data)} AHSA jobs to Supabase (upserted/updated)")
+    def flush():
+        seq = journal_chunk(run, ids)
+        if payloads:
+            supabase_upsert(AHSA_RAW_TABLE, list(payloads.values()), "hash", ignore_duplicates=True)
+            stored_hashes.update(payloads)
+            payloads.clear()
+        if chunk:
+            supabase_upsert("ahsa_jobs", chunk, "id")
+            task_progress(task, upserted=len(chunk))
+        journal_commit(run, seq)
+
+    for row in rows:
+        ids.append(row["id"])
+        if known is None:
+            row.pop("raw_hash", None)
+            chunk.append(row)
+        elif known.get(row["id"]) == row["raw_hash"]:
+            unchanged += 1
+        else:
+            job = row["raw_data"]
+            row["raw_data"] = None
+            if row["raw_hash"] not in stored_hashes and row["raw_hash"] not in payloads:
+                payloads[row["raw_hash"]] = encode_ahsa_raw_payload(job)
+            chunk.append(row)
+        if len(ids) >= AHSA_UPSERT_CHUNK:
+            flush()
+            upserted += len(chunk)
+            chunk, ids = [], []
+    if ids:
+        flush()
+        upserted += len(chunk)
+    return upserted, unchanged
 
+def push_ahsa_rows(rows, task=None, stop=None, run=None, resumed=0):
+    """Upsert a stream of ahsa_jobs rows and report the outcome as the push endpoints do.
+    `run` is the push's sync journal run; `resumed` counts jobs it had already committed."""
+    try:
+        count, unchanged = upsert_ahsa_rows(rows, task, run)
+        journal_finish(run)
+        if count + unchanged + resumed == 0:
+            return {"success": False, "error": "No jobs found to push", "count": 0}
+        print(f"✅ Synced {count} AHSA jobs to Supabase (upserted/updated, {unchanged} unchanged, {resumed} resumed)")
+        message = f"Successfully pushed {count} job(s) to Supabase ({unchanged} unchanged)"
+        if resumed:
+            message += f", resuming after {resumed} pushed by an interrupted run"
         return {
             "success": True,
-            "count": len(upsert_data),
-            "message": f"Successfully pushed {len(upsert_data)} job(s) to Supabase",
+            "count": count,
+            "unchanged": unchanged,
+            "resumedAfter": resumed,
+            "message": message,
         }
 
     except Exception as e:
+        if stop is not None:
+            stop.set()
+        journal_finish(run, error=e)
         error_msg = str(e)
         print(f"❌ Error pushing AHSA jobs to Supabase: {error_msg}")
         if "relation" in error_msg.lower() or "does not exist" in error_msg.lower():
@@ -3400,28 +6495,85 @@ def push_ahsa_jobs_to_supabase(jobs_data):
             error_msg = "Supabase authentication failed. Check your service_role key."
         return {"success": False, "count": 0, "error": error_msg}
 
+def push_ahsa_jobs_to_supabase(jobs_data, task=None, normalized=None, snapshot_id=None):
+    """Push already-fetched AHSA jobs to Supabase ahsa_jobs table, in chunks.
+    Pass `normalized` (normalize_ahsa_job per job) when the caller already has it. Pushes of a
+    snapshot are journaled, so a retry of the same snapshot skips the jobs already pushed."""
+    if not get_supabase():
+        raise Exception("Supabase client not initialized. Set SUPABASE_URL and SUPABASE_SERVICE_KEY environment variables.")
+
+    if not jobs_data or len(jobs_data) == 0:
+        print("⚠️ No jobs data to push")
+        return {"success": False, "error": "No jobs data provided", "count": 0}
+
+    run = None
+    if snapshot_id:
+        run = journal_start(f"ahsa-snapshot:{snapshot_id}", {"syncedAt": datetime.now().isoformat()})
+        if run is None:
+            return {"success": False, "error": "This snapshot is already being pushed", "count": 0}
+    task_progress(task, phase='upserting')
+    synced_at = run["cursor"]["syncedAt"] if run else datetime.now().isoformat()
+    normalized = normalized or (normalize_ahsa_job(job) for job in jobs_data)
+    pending = [(job, fields) for job, fields in zip(jobs_data, normalized)
+               if not run or fields["id"] not in run["doneIds"]]
+    return push_ahsa_rows((ahsa_row(job, fields, synced_at) for job, fields in pending), task,
+                          run=run, resumed=len(jobs_data) - len(pending))
+
+def stream_ahsa_jobs_to_supabase(task=None):
+    """Pull every AHSA job and push it to Supabase as one pipeline: detail fetches, normalization and
+    chunked upserts run concurrently, so a push takes about as long as its slowest stage. Committed
+    chunks are journaled; after an interrupted run only the jobs it had not pushed are fetched."""
+    if not get_supabase():
+        raise Exception("Supabase client not initialized. Set SUPABASE_URL and SUPABASE_SERVICE_KEY environment variables.")
+
+    job_numbers = fetch_ahsa_job_numbers(task)
+    if not job_numbers:
+        return {"success": False, "error": "No jobs found to push", "count": 0}
+    run = journal_start("ahsa-stream", {"syncedAt": datetime.now().isoformat()})
+    if run is None:
+        return {"success": False, "error": "An AHSA push is already running", "count": 0}
+    remaining = [num for num in job_numbers if str(num) not in run["doneIds"]]
+    if run["resumed"]:
+        print(f"↩️ Resuming AHSA push {run['id']}: {len(job_numbers) - len(remaining)} job(s) already pushed")
+    task_progress(task, phase='streaming')
+    synced_at = run["cursor"]["syncedAt"]
+    stop = PipelineStop()
+
+    def to_row(numbered):
+        _, full_job = numbered
+        return ahsa_row(full_job, normalize_ahsa_job(full_job), synced_at)
+
+    rows = threaded_map(to_row, iter_ahsa_job_details(remaining, task, stop=stop), stop=stop)
+    return push_ahsa_rows(rows, task, stop=stop, run=run, resumed=len(job_numbers) - len(remaining))
+
+@upstream_priority('bulk')
+def run_ahsa_push(task, snapshot_id=None):
+    """Background task: upsert an AHSA snapshot into Supabase, pulling every job again only when
+    no snapshot was given or it has expired."""
+    jobs, normalized = load_ahsa_snapshot(snapshot_id) if snapshot_id else (None, None)
+    refetched = jobs is None
+    if refetched:
+        result = stream_ahsa_jobs_to_supabase(task)
+    else:
+        task_progress(task, phase='loading snapshot', fetched=len(jobs))
+        result = push_ahsa_jobs_to_supabase(jobs, task, normalized=normalized, snapshot_id=snapshot_id)
+    result.update(snapshotId=snapshot_id, refetched=refetched)
+    return result
+
 @app.route('/api/ahsa/push-to-supabase', methods=['POST'])
 def api_ahsa_push_to_supabase():
-    """API endpoint to fetch AHSA jobs and push them to Supabase"""
+    """Queue an AHSA push to Supabase of the snapshotId from /api/ahsa/jobs (or a fresh pull if it is
+    missing or expired); poll the returned statusUrl for progress"""
+    if not get_supabase():
+        return jsonify({
+            'success': False,
+            'error': 'Supabase client not initialized. Set SUPABASE_URL and SUPABASE_SERVICE_KEY environment variables.',
+            'count': 0
+        }), 400
     try:
-        # First fetch jobs
-        jobs = fetch_ahsa_jobs()
-        
-        if not jobs or len(jobs) == 0:
-            return jsonify({
-                'success': False,
-                'error': 'No jobs found to push',
-                'count': 0
-            }), 400
-        
-        # Push to Supabase
-        result = push_ahsa_jobs_to_supabase(jobs)
-        
-        if result['success']:
-            return jsonify(result), 200
-        else:
-            return jsonify(result), 500
-            
+        snapshot_id = (request.get_json(silent=True) or {}).get('snapshotId')
+        return task_accepted(*submit_task('ahsa-push', run_ahsa_push, snapshot_id,
+                                          dedupe_key=f"ahsa-push:{snapshot_id or 'fresh'}"))
     except Exception as e:
         error_msg = str(e)
         print(f"❌ API error: {error_msg}")
@@ -3431,8 +6583,247 @@ def api_ahsa_push_to_supabase():
             'count': 0
         }), 500
 
+# ==================== COMPACTION ====================
+
+# Jobs that vanish from the AHSA list or close in Bullhorn are marked closed in bulk, and closed rows
+# untouched for COMPACTION_RETENTION_DAYS move to an archive table, so ahsa_jobs and open_jobs stay
+# proportional to the live job count. The archive tables mirror the hot ones plus archived_at:
+#   create table ahsa_jobs_archive (like ahsa_jobs including all, archived_at timestamptz);
+#   create table open_jobs_archive (like open_jobs including all, archived_at timestamptz);
+COMPACTION_RETENTION_DAYS = int(os.environ.get('COMPACTION_RETENTION_DAYS', '30'))
+COMPACTION_CHUNK = 200  # Ids per update / delete request (they travel in the URL)
+AHSA_CLOSED_STATUS = 'Closed'
+
+# table -> (key column, columns set when a row is closed, archive table)
+COMPACTED_TABLES = {
+    'ahsa_jobs': ('id', {'status': AHSA_CLOSED_STATUS}, 'ahsa_jobs_archive'),
+    'open_jobs': ('bullhorn_id', {'is_open': False}, 'open_jobs_archive'),
+}
+
+def supabase_select_all(table, columns, filters=()):
+    """Every row of a Supabase select, following SUPABASE_PAGE_SIZE pages. filters: (method, column, value)."""
+    supabase = get_supabase()
+    rows, start = [], 0
+    while True:
+        query = supabase.table(table).select(columns)
+        for method, column, value in filters:
+            query = getattr(query, method)(column, value)
+        page = query.range(start, start + SUPABASE_PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < SUPABASE_PAGE_SIZE:
+            return rows
+        start += SUPABASE_PAGE_SIZE
+
+def chunked(items, size):
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def live_job_ids(table):
+    """
+    Ids currently live upstream (AHSA job list / open Bullhorn job orders), or None if unavailable.
+
+    Open job orders are listed with keyset paging on id, as in sync_bullhorn_jobs, so jobs opening or
+    closing mid-scan cannot shift a page. Anything short of a complete scan returns None: a missing id
+    would otherwise close a live job.
+    """
+    if table == 'ahsa_jobs':
+        return {str(num) for num in fetch_ahsa_job_numbers()}
+    tokens = load_tokens()
+    if not tokens or not tokens.get('bh_rest_token'):
+        return None
+    rest_url = tokens['rest_url']
+    if not rest_url.endswith('/'):
+        rest_url += '/'
+
+    ids = set()
+    last_id = 0
+    try:
+        while True:
+            response = upstream_get(f"{rest_url}query/JobOrder", params={
+                'BhRestToken': tokens['bh_rest_token'],
+                'where': f'isOpen=true AND isDeleted=false AND id>{last_id}',
+                'fields': 'id',
+                'orderBy': 'id',
+                'count': BULLHORN_PAGE_SIZE
+            }, timeout=60)
+            response.raise_for_status()
+            page = response.json().get('data', [])
+            if not page:
+                return ids
+            if page[-1]['id'] <= last_id:
+                print(f"⚠️ Open job scan did not advance past id {last_id}; not closing anything")
+                return None
+            ids.update(row['id'] for row in page)
+            last_id = page[-1]['id']
+            if len(page) < BULLHORN_PAGE_SIZE:
+                return ids
+    except Exception as e:
+        print(f"⚠️ Open job scan stopped after id {last_id}: {e}")
+        return None
+
+def close_vanished_jobs(table, live_ids, task=None):
+    """Mark rows whose id is no longer live as closed. Returns (hot rows scanned, rows closed)."""
+    key, closed_values, _ = COMPACTED_TABLES[table]
+    columns = ','.join([key, *closed_values])
+    rows = supabase_select_all(table, columns)
+    task_progress(task, fetched=len(rows))
+    vanished = [row[key] for row in rows
+                if row[key] not in live_ids and any(row.get(c) != v for c, v in closed_values.items())]
+    now = datetime.now().isoformat()
+    for ids in chunked(vanished, COMPACTION_CHUNK):
+        get_supabase().table(table).update({**closed_values, 'updated_at': now}).in_(key, ids).execute()
+        task_progress(task, upserted=len(ids))
+    return len(rows), len(vanished)
+
+def archive_closed_jobs(table, task=None):
+    """Move closed rows not updated within the retention window to the archive table. Returns rows moved."""
+    key, closed_values, archive = COMPACTED_TABLES[table]
+    cutoff = (datetime.now() - timedelta(days=COMPACTION_RETENTION_DAYS)).isoformat()
+    filters = [('eq', column, value) for column, value in closed_values.items()] + [('lt', 'updated_at', cutoff)]
+    rows = supabase_select_all(table, '*', filters)
+    archived_at = datetime.now().isoformat()
+    for batch in chunked(rows, COMPACTION_CHUNK):
+        get_supabase().table(archive).upsert([{**row, 'archived_at': archived_at} for row in batch], on_conflict=key).execute()
+        get_supabase().table(table).delete().in_(key, [row[key] for row in batch]).execute()
+        task_progress(task, upserted=len(batch))
+    return len(rows)
+
+@upstream_priority('bulk')
+def compact_job_tables(task=None):
+    """
+    Scheduled job / background task: for ahsa_jobs and open_jobs, close vanished jobs and archive
+    old closed rows. Closing is skipped when the live id list could not be fetched (or came back
+    empty), so an upstream outage never closes every job.
+
+    Returns:
+        {'success', 'tables': {table: {'live', 'scanned', 'closed', 'archived', 'remaining'} or {'error'}}}
+    """
+    if not get_supabase():
+        return {'success': False, 'error': 'Supabase client not initialized'}
+    report = {}
+    for table in COMPACTED_TABLES:
+        try:
+            task_progress(task, phase=f'{table}: closing vanished')
+            try:
+                live_ids = live_job_ids(table)
+            except Exception as e:
+                print(f"⚠️ Could not list live {table} ids: {e}")
+                live_ids = None
+            scanned = closed = 0
+            if live_ids:
+                scanned, closed = close_vanished_jobs(table, live_ids, task)
+            task_progress(task, phase=f'{table}: archiving')
+            archived = archive_closed_jobs(table, task)
+            report[table] = {
+                'live': len(live_ids) if live_ids else None,
+                'scanned': scanned,
+                'closed': closed,
+                'archived': archived,
+                'remaining': scanned - archived if live_ids else None,
+            }
+            print(f"🧹 Compacted {table}: {closed} closed, {archived} archived")
+        except Exception as e:
+            print(f"❌ Error compacting {table}: {e}")
+            task_progress(task, error=f"{table}: {e}")
+            report[table] = {'error': str(e)}
+    return {'success': not any('error' in entry for entry in report.values()), 'tables': report}
+
+@app.route('/api/supabase/compact', methods=['POST'])
+def api_supabase_compact():
+    """Queue a compaction of ahsa_jobs and open_jobs; poll the returned statusUrl for the rows moved"""
+    if not get_supabase():
+        return jsonify({
+            'success': False,
+            'error': 'Supabase not configured. Set SUPABASE_URL and SUPABASE_SERVICE_KEY (or SUPABASE_KEY) environment variables.'
+        }), 400
+    return task_accepted(*submit_task('compact', compact_job_tables))
+
+# ==================== STARTUP ====================
+
+_scheduler_lock = threading.Lock()
+
+def start_scheduler():
+    """
+    Register the scheduled jobs and start the background scheduler (idempotent).
+
+    Importing this module has no side effects; the jobs only run in a process that calls this,
+    directly or through create_app() / the first request in SCHEDULER_MODE 'web'.
+    """
+    with _scheduler_lock:
+        if scheduler.running:
+            return scheduler
+
+        # Two-tier token maintenance (OAuth + BhRestToken)
+        scheduler.add_job(
+            func=maintain_session,
+            trigger="interval",
+            minutes=REFRESH_INTERVAL_MINUTES,
+            id='token_maintenance',
+            name='Maintain OAuth and BhRestToken',
+            replace_existing=True,
+        )
+
+        # Bullhorn jobs sync to Supabase (every 60 minutes)
+        if get_supabase():
+            scheduler.add_job(
+                func=sync_bullhorn_jobs,
+                trigger="interval",
+                minutes=60,
+                id='sync_bullhorn_jobs',
+                name='Sync Bullhorn open jobs to Supabase',
+                replace_existing=True,
+            )
+            print("✅ Scheduled Bullhorn jobs sync: every 60 minutes")
+            scheduler.add_job(
+                func=compact_job_tables,
+                trigger="interval",
+                hours=24,
+                id='compact_job_tables',
+                name='Close vanished jobs and archive old closed rows',
+                replace_existing=True,
+            )
+        else:
+            print("⚠️ Supabase not configured. Job sync scheduler not started.")
+
+        if snapshot_enabled():
+            scheduler.add_job(
+                func=ensure_snapshot_restored,
+                trigger='date',
+                run_date=datetime.now(),
+                id='restore_snapshot',
+                name='Restore warm-restart snapshot',
+                replace_existing=True,
+            )
+            scheduler.add_job(
+                func=save_snapshot,
+                trigger='interval',
+                minutes=SNAPSHOT_INTERVAL_MINUTES,
+                id='save_snapshot',
+                name='Save warm-restart snapshot',
+                replace_existing=True,
+            )
+            atexit.register(save_snapshot)
+
+        scheduler.start()
+        atexit.register(lambda: scheduler.shutdown())
+        schedule_cache_warming(delay_seconds=10)
+        print(f"⏰ Scheduler started ({len(scheduler.get_jobs())} jobs)")
+        return scheduler
+
+@app.before_request
+def start_scheduler_on_first_request():
+    if SCHEDULER_MODE == 'web' and not scheduler.running:
+        start_scheduler()
+
+def create_app():
+    """App factory for servers that support one (gunicorn 'app:create_app()'): starts the scheduler in
+    SCHEDULER_MODE 'web' up front instead of on the first request."""
+    if SCHEDULER_MODE == 'web':
+        start_scheduler()
+    return app
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 10000))
     print(f"Starting Bullhorn OAuth server on port {port}")
     print(f"Auto-refresh enabled: every {REFRESH_INTERVAL_MINUTES} minutes")
-    app.run(host='0.0.0.0', port=port, debug=False)
+    create_app().run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,362 @@
+"""
+ASGI entry point for the dashboard.
+
+The upstream-bound /api/* routes below are served natively with a shared httpx.AsyncClient, so one
+process can hold hundreds of in-flight Bullhorn requests instead of tying up one sync worker each.
+Weekly, monthly, recruiters and summary read app's rollup store, month shards and link index
+(synchronous SQLite and locks) in worker threads, so they share those caches with the Flask handlers
+and return the same numbers.
+Every other route (pages, OAuth, Supabase, AHSA) is handed to the Flask app unchanged.
+
+Run with:
+    uvicorn asgi:application --host 0.0.0.0 --port $PORT
+or under gunicorn:
+    gunicorn asgi:application -k uvicorn.workers.UvicornWorker
+
+benchmarks/bench_asgi.py compares concurrent-user throughput against the sync gunicorn workers.
+"""
+import asyncio
+import json
+import time
+from datetime import datetime
+from urllib.parse import parse_qsl
+
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+
+import app as web
+
+UPSTREAM_MAX_CONNECTIONS = 200  # In-flight Bullhorn requests per process
+
+_http_client = None
+_flask_asgi = WsgiToAsgi(web.app)
+
+
+def get_http_client():
+    """Shared AsyncClient for this process (created on lifespan startup, or lazily on first use)."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=30,
+            limits=httpx.Limits(max_connections=UPSTREAM_MAX_CONNECTIONS, max_keepalive_connections=50),
+        )
+    return _http_client
+
+
+# ==================== ASYNC BULLHORN FETCHES ====================
+
+async def acquire_upstream_async(url, priority='interactive'):
+    """Async app.acquire_upstream: waits for the host's token bucket on the event loop, so throttled
+    requests cost no thread. Returns seconds waited."""
+    ticket = web.upstream_enqueue(url, priority)
+    try:
+        while True:
+            wait = web.upstream_try_take(ticket)
+            if not wait:
+                break
+            await asyncio.sleep(wait)
+    finally:
+        waited = web.upstream_dequeue(ticket)
+    return waited
+
+
+async def fetch_bullhorn_rows_async(entity, fields, start_ms, end_ms, max_rows=10000, timeout=30):
+    """Async twin of app.fetch_bullhorn_rows: all rows of an entity added in range, following 500-row pages.
+    Returns a list of records or None on error."""
+    tokens = await asyncio.to_thread(web.load_tokens)  # May pull a snapshot over the network
+    if not tokens or not tokens.get('bh_rest_token'):
+        return None
+
+    rest_url = tokens['rest_url']
+    if not rest_url.endswith('/'):
+        rest_url += '/'
+    url = f"{rest_url}query/{entity}"
+
+    try:
+        rows = []
+        while len(rows) < max_rows:
+            page_size = min(web.BULLHORN_PAGE_SIZE, max_rows - len(rows))
+            params = {
+                'BhRestToken': tokens['bh_rest_token'],
+                'where': f"dateAdded>={start_ms} AND dateAdded<={end_ms}",
+                'fields': fields,
+                'orderBy': '-dateAdded',
+                'start': len(rows),
+                'count': page_size
+            }
+            web.breaker_check(url)  # Same per-host breaker and limiter as the sync routes
+            await acquire_upstream_async(url)
+            started = time.monotonic()
+            try:
+                response = await get_http_client().get(url, params=params, timeout=timeout)
+            except Exception as e:
+                web.breaker_record(url, False, time.monotonic() - started, error=e)
+                raise
+            if response.status_code == 429:
+                web.upstream_throttled(url, response)  # Limiter only: a 429 is not a breaker outcome
+            else:
+                web.breaker_record(url, response.status_code < 500, time.monotonic() - started,
+                                   error=f"HTTP {response.status_code}")
+            response.raise_for_status()
+            page = response.json().get('data', [])
+            rows.extend(page)
+            if len(page) < page_size:
+                break
+        return rows
+    except Exception as e:
+        print(f"Error fetching {entity} rows (async): {e}")
+        return None
+
+
+async def fetch_entities_concurrently_async(queries, deadline=web.FETCH_DEADLINE_SECONDS):
+    """
+    Async twin of app.fetch_entities_concurrently.
+
+    Args:
+        queries: Dict of name -> coroutine returning rows (None is a fatal failure)
+        deadline: Seconds allowed for all queries together
+
+    Returns:
+        (results, timings, error) as for the sync version; pending queries are cancelled on failure.
+    """
+    results = {name: None for name in queries}
+    timings = {}
+
+    async def timed(name, coro):
+        started = time.monotonic()
+        try:
+            return name, await coro
+        finally:
+            timings[name] = round(time.monotonic() - started, 3)
+
+    tasks = [asyncio.ensure_future(timed(name, coro)) for name, coro in queries.items()]
+    error = None
+    try:
+        for next_done in asyncio.as_completed(tasks, timeout=deadline):
+            name, rows = await next_done
+            if rows is None:
+                error = f"{name} fetch failed"
+                break
+            results[name] = rows
+    except asyncio.TimeoutError:
+        error = f"Deadline of {deadline}s exceeded"
+
+    if error:
+        for task in tasks:
+            task.cancel()
+        print(f"⚠️ Concurrent fetch aborted: {error}")
+    return results, timings, error
+
+
+async def submissions_and_placements(start_ms, end_ms):
+    """The recruiter-level submission/placement pair used by weekly, monthly and recruiters, read from
+    app's month shard cache exactly as the Flask handlers read it. The shards (and the rollup store)
+    are synchronous, so they run in a worker thread."""
+    return await asyncio.to_thread(web.fetch_entities_concurrently, {
+        'submissions': (web.fetch_job_submissions, (start_ms, end_ms, True)),
+        'placements': (web.fetch_placements, (start_ms, end_ms, True)),
+    })
+
+
+# ==================== ASYNC API ROUTES ====================
+
+def int_arg(args, name, default):
+    try:
+        return int(args.get(name))
+    except (TypeError, ValueError):
+        return default
+
+
+async def api_analytics_weekly(args):
+    year = int_arg(args, 'year', datetime.now().year)
+    month = int_arg(args, 'month', datetime.now().month)
+    start_date, end_date = web.get_month_range(year, month)
+    # Closed months come from the rollup store's week counters
+    result, timings, fetch_error = await asyncio.to_thread(web.rollup_weekly, start_date, end_date)
+    if fetch_error:
+        return 500, {'error': 'Failed to fetch data from Bullhorn'}, timings
+    if result is not None:
+        return 200, result, timings
+    fetched, timings, fetch_error = await submissions_and_placements(
+        int(start_date.timestamp() * 1000), int(end_date.timestamp() * 1000))
+    if fetch_error:
+        return 500, {'error': 'Failed to fetch data from Bullhorn'}, timings
+    return 200, web.aggregate_weekly(fetched['submissions'], fetched['placements']), timings
+
+
+async def api_analytics_monthly(args):
+    year = int_arg(args, 'year', datetime.now().year)
+    month = int_arg(args, 'month', datetime.now().month)
+    start_date, end_date = web.get_month_range(year, month)
+    # Closed months come from the rollup store
+    result, timings, fetch_error = await asyncio.to_thread(web.rollup_monthly, start_date, end_date)
+    if fetch_error:
+        return 500, {'error': 'Failed to fetch data from Bullhorn'}, timings
+    if result is not None:
+        return 200, result, timings
+    fetched, timings, fetch_error = await submissions_and_placements(
+        int(start_date.timestamp() * 1000), int(end_date.timestamp() * 1000))
+    if fetch_error:
+        return 500, {'error': 'Failed to fetch data from Bullhorn'}, timings
+    return 200, web.aggregate_monthly(fetched['submissions'], fetched['placements'], start_date, end_date), timings
+
+
+async def api_analytics_recruiters(args):
+    start_ms, end_ms = web.parse_date_range(args)
+    # Whole closed months in the range come from the rollup store
+    result, timings, fetch_error = await asyncio.to_thread(web.rollup_recruiters, start_ms, end_ms)
+    if fetch_error:
+        return 500, {'error': 'Failed to fetch data from Bullhorn'}, timings
+    if result is not None:
+        return 200, {'recruiters': result}, timings
+    fetched, timings, fetch_error = await submissions_and_placements(start_ms, end_ms)
+    if fetch_error:
+        return 500, {'error': 'Failed to fetch data from Bullhorn'}, timings
+    return 200, {'recruiters': web.aggregate_recruiters(fetched['submissions'], fetched['placements'])}, timings
+
+
+async def api_analytics_summary(args):
+    start_ms, end_ms = web.parse_date_range(args)
+    owner_id = (args.get('owner') or '').strip() or None
+    # The same queries as the Flask handler: rows from the month shard cache and, for an owner, the
+    # (candidate, job) pairs over the linkage window from the submission link index
+    queries = {
+        'submissions': (web.fetch_rows_sharded, ('JobSubmission', web.SUMMARY_SUBMISSION_FIELDS, start_ms, end_ms)),
+        'placements': (web.fetch_rows_sharded, ('Placement', web.SUMMARY_PLACEMENT_FIELDS, start_ms, end_ms)),
+    }
+    if owner_id:
+        extended = web.shift_months(datetime.fromtimestamp(start_ms / 1000), -web.EXTENDED_SUBMISSIONS_MONTHS)
+        links_start_ms = int(extended.timestamp() * 1000)
+        queries['links'] = (web.ensure_submission_links, (links_start_ms, end_ms))
+    fetched, timings, fetch_error = await asyncio.to_thread(web.fetch_entities_concurrently, queries)
+    if fetch_error:
+        return 500, {'error': 'Failed to fetch data from Bullhorn'}, timings
+    owner_pairs = None
+    if owner_id:
+        owner_pairs = await asyncio.to_thread(web.submission_pairs_for_owner, owner_id, links_start_ms, end_ms)
+    result = web.compute_basic_summary(fetched['submissions'], fetched['placements'], start_ms, end_ms,
+                                       owner_id=owner_id, owner_pairs=owner_pairs)
+    result['success'] = True
+    result['owner'] = owner_id
+    return 200, result, timings
+
+
+async def api_analytics_notes_by_user(args):
+    start_ms, end_ms = web.parse_date_range(args)
+    notes = await fetch_bullhorn_rows_async(
+        'Note', 'id,dateAdded,commentingPerson(id,firstName,lastName),action', start_ms, end_ms, max_rows=2000)
+    if notes is None:
+        return 500, {'error': 'Failed to fetch notes from Bullhorn'}, {}
+    return 200, {'notesByUser': web.aggregate_notes_by_user(notes)}, {}
+
+
+def detailed_route(kind):
+    """Async detailed endpoint sharing app's cached indexes (the same cache key as the Flask handler)."""
+    async def handler(args):
+        start_ms, end_ms = web.parse_date_range(args)
+        key = ('detailed', kind, start_ms, end_ms)
+        index = None if (args.get('refresh') or '').lower() == 'true' else await asyncio.to_thread(web.cache_get, key)
+        timings = {}
+        if index is None:
+            entity, fields, formatter = web.DETAILED_DATASETS[kind]
+            started = time.monotonic()
+            raw = await fetch_bullhorn_rows_async(entity, fields, start_ms, end_ms, timeout=60)
+            timings[kind] = round(time.monotonic() - started, 3)
+            if raw is None:
+                return 500, {'success': False, 'error': 'Failed to fetch data from Bullhorn'}, timings
+            index = web.cache_set(key, web.build_detailed_index([formatter(r) for r in raw]))
+        filters = {param: (args.get(param) or '').strip() for param in list(web.DETAILED_INDEXED_FIELDS) + ['open']}
+        result = web.query_detailed_index(
+            index, filters,
+            sort=args.get('sort') or '-dateAdded',
+            page=int_arg(args, 'page', None),
+            limit=int_arg(args, 'limit', None),
+        )
+        return 200, {'success': True, 'count': len(result['data']), **result}, timings
+    return handler
+
+
+ASYNC_ROUTES = {
+    '/api/analytics/weekly': api_analytics_weekly,
+    '/api/analytics/monthly': api_analytics_monthly,
+    '/api/analytics/recruiters': api_analytics_recruiters,
+    '/api/analytics/summary': api_analytics_summary,
+    '/api/analytics/notes-by-user': api_analytics_notes_by_user,
+    '/api/submissions/detailed': detailed_route('submissions'),
+    '/api/placements/detailed': detailed_route('placements'),
+    '/api/jobs/detailed': detailed_route('jobs'),
+}
+
+
+# ==================== ASGI APPLICATION ====================
+
+async def send_json(send, status, payload, timings=None, stale_host=None):
+    """Send a JSON response; returns the encoded body."""
+    body = json.dumps(payload, default=str).encode('utf-8')
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    if stale_host:
+        headers += [(b'warning', b'110 - "Response is Stale"'), (b'x-upstream-stale', stale_host.encode())]
+    if timings:
+        server_timing = ', '.join(f"{name};dur={seconds * 1000:.0f}" for name, seconds in sorted(timings.items()))
+        headers.append((b'server-timing', server_timing.encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+    return body
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            get_http_client()
+            if web.SCHEDULER_MODE == 'web':
+                web.start_scheduler()  # The async routes never reach Flask's first-request hook
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            global _http_client
+            if _http_client is not None:
+                await _http_client.aclose()
+                _http_client = None
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI callable: async handlers for ASYNC_ROUTES, Flask for everything else."""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+
+    handler = ASYNC_ROUTES.get(scope.get('path')) if scope['type'] == 'http' and scope['method'] == 'GET' else None
+    if handler is None:
+        await _flask_asgi(scope, receive, send)
+        return
+
+    tokens = await asyncio.to_thread(web.load_tokens)
+    if not tokens or not tokens.get('bh_rest_token'):
+        await send_json(send, 401, {'error': 'Not authenticated'})
+        return
+
+    # Stale fallback keyed like Flask's request.full_path, so both entry points share it
+    query_string = scope.get('query_string', b'').decode('latin-1')
+    key = f"{scope['path']}?{query_string}"
+    host = await asyncio.to_thread(web.stale_fallback_host, scope['path'])
+    if host and web.breaker_state(host) == 'open':
+        stale = web.stale_payload(key, host)
+        if stale is not None:
+            await send_json(send, 200, stale, stale_host=host)
+            return
+
+    args = dict(parse_qsl(query_string))
+    try:
+        status, payload, timings = await handler(args)
+    except Exception as e:
+        status, payload, timings = 500, {'error': str(e)}, None
+    if status >= 500 and host and web.breaker_state(host) != 'closed':
+        stale = web.stale_payload(key, host)
+        if stale is not None:
+            await send_json(send, 200, stale, stale_host=host)
+            return
+    body = await send_json(send, status, payload, timings)
+    if status == 200 and host:
+        web.remember_response(key, body)
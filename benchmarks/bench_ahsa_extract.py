@@ -0,0 +1,114 @@
+"""
+AHSA normalization: flatten() per job (once for the page, once more for the push) vs the compiled
+path getters in app.normalize_ahsa_job (one pass shared by both).
+
+Jobs are synthetic but shaped like full /Job/{num} payloads: the handful of fields we read plus many
+nested sections and long lists, which is what makes flattening expensive. Outputs are checked for
+equality against the flatten-based reference before timing.
+
+Usage:
+    python benchmarks/bench_ahsa_extract.py [--jobs 2000] [--sections 40] [--list-size 50] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as web  # noqa: E402
+
+
+# ---------- reference: the flatten-based field reads the getters replace ----------
+
+def reference_fields(job):
+    flat = web.flatten(job)
+    job_id = str(job.get("Number") or job.get("Id") or flat.get("Id") or "unknown")
+    title = flat.get("Position.Title") or flat.get("Title") or job.get("Title") or "Untitled"
+    description = flat.get("Description") or flat.get("Position.Description") or job.get("Description") or job.get("Summary")
+    loc_parts = [
+        flat.get("Location.City"), flat.get("Location.State"), flat.get("Location"), flat.get("Address"),
+        flat.get("City"), job.get("Location"), job.get("Address"), job.get("City"),
+    ]
+    location = ", ".join(str(x).strip() for x in loc_parts if x and str(x).strip()) if any(loc_parts) else None
+    date_val = (
+        flat.get("PostedDate") or flat.get("CreatedAt") or flat.get("DatePosted")
+        or flat.get("Position.PostedDate")
+        or job.get("PostedDate") or job.get("CreatedAt") or job.get("DatePosted")
+    )
+    date_posted = None
+    if date_val is not None:
+        if isinstance(date_val, (int, float)):
+            date_posted = datetime.fromtimestamp(date_val / 1000).isoformat() if date_val > 1e12 else datetime.fromtimestamp(date_val).isoformat()
+        elif isinstance(date_val, str):
+            try:
+                date_posted = datetime.fromisoformat(date_val.replace("Z", "+00:00")).isoformat()
+            except Exception:
+                date_posted = date_val
+        else:
+            date_posted = str(date_val)
+    status = flat.get("Status") or job.get("Status") or "Unknown"
+    return {"id": job_id, "title": title, "description": description, "location": location,
+            "date_posted": date_posted, "status": status}
+
+
+# ---------- synthetic payloads ----------
+
+def fake_job(number, sections, list_size, rng):
+    job = {
+        "Number": number if rng.random() > 0.05 else None,
+        "Id": f"J-{number}",
+        "Status": rng.choice(["Open", "Filled", "", None]),
+        "Position": {"Title": rng.choice([f"RN {number}", "", None]), "Description": "x" * rng.randint(0, 400),
+                     "PostedDate": rng.choice([1735689600000 + number, "2025-01-02T03:04:05Z", "n/a", None])},
+        "Location": rng.choice([{"City": "Austin", "State": "TX"}, {"City": " ", "State": None}, "Remote", None]),
+        "CreatedAt": rng.choice([None, 1735689600, "2025-02-03"]),
+        "Shifts": [{"Day": d, "Start": "07:00", "End": "19:00"} for d in range(list_size)],
+    }
+    for s in range(sections):
+        job[f"Section{s}"] = {
+            "Name": f"section {s}",
+            "Values": list(range(list_size)),
+            "Nested": {"A": s, "B": {"C": str(s), "D": [s] * 5}},
+        }
+    return job
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--sections", type=int, default=40, help="Nested sections per job")
+    parser.add_argument("--list-size", type=int, default=50, help="Items per list field")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    jobs = [fake_job(n, args.sections, args.list_size, rng) for n in range(args.jobs)]
+
+    mismatches = sum(reference_fields(job) != web.normalize_ahsa_job(job) for job in jobs)
+    if mismatches:
+        sys.exit(f"{mismatches} job(s) normalize differently from the flatten reference")
+
+    # Before: the page and the push each flattened every job; after: one shared pass
+    before = timed(lambda: [(reference_fields(job), reference_fields(job)) for job in jobs], args.repeat)
+    after = timed(lambda: [web.normalize_ahsa_job_for_display(job, web.normalize_ahsa_job(job)) for job in jobs], args.repeat)
+
+    print(f"{args.jobs} jobs, {args.sections} nested sections, lists of {args.list_size} (outputs identical)")
+    print(f"{'flatten x2':<16} {before * 1000:>9.1f} ms  {before / args.jobs * 1e6:>7.1f} us/job")
+    print(f"{'compiled x1':<16} {after * 1000:>9.1f} ms  {after / args.jobs * 1e6:>7.1f} us/job")
+    print(f"speedup {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
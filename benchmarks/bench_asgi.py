@@ -0,0 +1,157 @@
+"""
+Concurrent-user throughput: sync gunicorn workers (app:app) vs the ASGI path (asgi:application).
+
+Both servers talk to a local fake Bullhorn that answers query/<Entity> after a fixed latency, so the
+numbers show how many in-flight upstream requests each serving mode can hold, not Bullhorn itself.
+
+Usage:
+    python benchmarks/bench_asgi.py [--workers 2] [--latency 0.5] [--users 10,50,200] [--duration 10]
+
+Requires gunicorn, uvicorn and asgiref (see requirements.txt).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_PATH = '/api/analytics/recruiters?start=2025-01-01&end=2025-01-31'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# ---------- fake Bullhorn upstream (runs in its own process via --serve-upstream) ----------
+
+def fake_rows(n):
+    rows = []
+    for i in range(n):
+        uid = random.randint(1, 12)
+        user = {'id': uid, 'firstName': 'User', 'lastName': str(uid)}
+        rows.append({'id': i, 'dateAdded': 1735689600000 + i * 60000, 'status': random.choice(['Submitted', 'Presented']),
+                     'sendingUser': user, 'owner': user})
+    return rows
+
+
+def make_upstream_app(latency):
+    payload = json.dumps({'start': 0, 'count': 300, 'data': fake_rows(300)}).encode()
+
+    async def upstream(scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        await asyncio.sleep(latency)
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': payload})
+    return upstream
+
+
+def serve_upstream(port, latency):
+    import uvicorn
+    uvicorn.run(make_upstream_app(latency), host='127.0.0.1', port=port, log_level='warning', backlog=4096)
+
+
+# ---------- load generator ----------
+
+async def run_load(base_url, users, duration):
+    latencies, errors = [], 0
+    stop_at = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        async def user():
+            nonlocal errors
+            while time.monotonic() < stop_at:
+                started = time.monotonic()
+                try:
+                    r = await client.get(BENCH_PATH)
+                    if r.status_code != 200:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.monotonic() - started)
+        started = time.monotonic()
+        await asyncio.gather(*(user() for _ in range(users)))
+        elapsed = time.monotonic() - started
+    return latencies, errors, elapsed
+
+
+def wait_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(base_url + '/api/tokens', timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+def start_server(kind, port, workers, workdir):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    if kind == 'sync':
+        cmd = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-k', 'sync', '-t', '120',
+               '-b', f'127.0.0.1:{port}', 'app:app']
+    else:
+        cmd = [sys.executable, '-m', 'uvicorn', 'asgi:application', '--workers', str(workers),
+               '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning']
+    return subprocess.Popen(cmd, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--latency', type=float, default=0.5, help='Fake Bullhorn latency per request (s)')
+    parser.add_argument('--users', default='10,50,200', help='Comma-separated concurrent user counts')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per measurement')
+    parser.add_argument('--serve-upstream', nargs=2, metavar=('PORT', 'LATENCY'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_upstream:
+        serve_upstream(int(args.serve_upstream[0]), float(args.serve_upstream[1]))
+        return
+
+    upstream_port = free_port()
+    upstream = subprocess.Popen([sys.executable, __file__, '--serve-upstream', str(upstream_port), str(args.latency)])
+    workdir = tempfile.mkdtemp(prefix='bench_asgi_')
+    with open(os.path.join(workdir, 'token_store.json'), 'w') as f:
+        json.dump({'bh_rest_token': 'bench', 'access_token': 'bench',
+                   'rest_url': f'http://127.0.0.1:{upstream_port}/rest/'}, f)
+
+    print(f"Fake Bullhorn latency {args.latency}s, {args.workers} worker process(es), {args.duration}s per run")
+    print(f"{'mode':<6} {'users':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    try:
+        for kind in ('sync', 'asgi'):
+            port = free_port()
+            server = start_server(kind, port, args.workers, workdir)
+            try:
+                wait_ready(f'http://127.0.0.1:{port}')
+                for users in (int(u) for u in args.users.split(',')):
+                    latencies, errors, elapsed = asyncio.run(run_load(f'http://127.0.0.1:{port}', users, args.duration))
+                    rps = len(latencies) / elapsed if elapsed else 0
+                    p50 = statistics.median(latencies) * 1000 if latencies else float('nan')
+                    p95 = statistics.quantiles(latencies, n=20)[18] * 1000 if len(latencies) >= 20 else float('nan')
+                    print(f"{kind:<6} {users:>6} {rps:>8.1f} {p50:>8.0f} {p95:>8.0f} {errors:>7}")
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        upstream.terminate()
+        upstream.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Worker boot cost: time and peak memory to import app.py and to serve the first request.
+
+Each sample runs in a fresh interpreter, so the numbers are what every gunicorn worker (or any
+script importing the module) pays. Pass --ref to compare against app.py at another git revision.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--ref HEAD~1]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r'''
+import json, resource, threading, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+threads = threading.active_count()
+app.app.test_client().get('/api/tokens')
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (served - imported) * 1000,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'threads_after_import': threads,
+}))
+'''
+
+
+def sample(app_dir):
+    env = dict(os.environ, PYTHONPATH=app_dir, PYTHONDONTWRITEBYTECODE='1')
+    workdir = tempfile.mkdtemp(prefix='bench_startup_')
+    out = subprocess.run([sys.executable, '-c', PROBE], cwd=workdir, env=env,
+                         capture_output=True, text=True, timeout=120)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else 'probe failed')
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def checkout(ref):
+    """app.py at a git revision, in a temporary directory."""
+    target = tempfile.mkdtemp(prefix='bench_startup_ref_')
+    source = subprocess.run(['git', 'show', f'{ref}:app.py'], cwd=REPO_ROOT, capture_output=True, check=True).stdout
+    with open(os.path.join(target, 'app.py'), 'wb') as f:
+        f.write(source)
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--ref', help='Also measure app.py at this git revision')
+    args = parser.parse_args()
+
+    targets = [('working tree', REPO_ROOT)]
+    if args.ref:
+        targets.insert(0, (args.ref, checkout(args.ref)))
+
+    print(f"{'app.py':<14} {'import ms':>10} {'threads':>8} {'1st req ms':>11} {'peak RSS MB':>12}")
+    for label, app_dir in targets:
+        samples = [sample(app_dir) for _ in range(args.runs)]
+        median = {key: statistics.median(s[key] for s in samples) for key in ('import_ms', 'threads_after_import', 'first_request_ms', 'peak_rss_mb')}
+        print(f"{label:<14} {median['import_ms']:>10.0f} {median['threads_after_import']:>8.0f} {median['first_request_ms']:>11.0f} {median['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Shared fixtures. Run from the repository root with:
+    python -m pytest -q
+"""
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as web_app  # noqa: E402
+
+
+@pytest.fixture
+def web(tmp_path, monkeypatch):
+    """The app module with a scratch analytics database, no snapshot store and fresh cache, limiter,
+    breaker and task heartbeat state, working from a temporary directory (token_store.json and the
+    like land there)."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(web_app, 'ROLLUP_DB_PATH', str(tmp_path / 'rollups.db'))
+    monkeypatch.setattr(web_app, '_rollup_schema_ready', False)
+    monkeypatch.setattr(web_app, 'SNAPSHOT_STORE', 'off')
+    monkeypatch.setattr(web_app, '_upstream_buckets', {})
+    monkeypatch.setattr(web_app, '_breakers', {})
+    monkeypatch.setattr(web_app, '_analytics_cache', web_app.OrderedDict())
+    monkeypatch.setattr(web_app, '_shard_fields', {})
+    monkeypatch.setattr(web_app, '_live_tasks', set())
+    monkeypatch.setattr(web_app, '_task_heartbeat_state', {'running': False})
+    return web_app
+
+
+class FakeBullhorn:
+    """In-memory stand-in for the Bullhorn row and count queries (fetch_bullhorn_rows/fetch_bullhorn_total).
+    rows maps entity -> records; every query is recorded in calls; entities in failing return None."""
+
+    def __init__(self):
+        self.rows = {'JobSubmission': [], 'Placement': [], 'Note': [], 'JobOrder': []}
+        self.calls = []
+        self.failing = set()
+
+    def matching(self, entity, start_ms, end_ms, where=None):
+        modified_after = int(where.split('>')[1]) if where and where.startswith('dateLastModified>') else None
+        return [row for row in self.rows[entity]
+                if start_ms <= row['dateAdded'] <= end_ms
+                and (modified_after is None or row.get('dateLastModified', 0) > modified_after)]
+
+    def fetch_rows(self, entity, fields, start_ms, end_ms, max_rows=10000, timeout=30, where=None):
+        self.calls.append((entity, start_ms, end_ms, where))
+        if entity in self.failing:
+            return None
+        rows = sorted(self.matching(entity, start_ms, end_ms, where), key=lambda row: -row['dateAdded'])
+        return [dict(row) for row in rows[:max_rows]]
+
+    def total(self, entity, where, timeout=30):
+        self.calls.append((entity, None, None, where))
+        if entity in self.failing:
+            return None
+        start_ms, end_ms = (int(value) for value in re.findall(r'dateAdded[<>]=(\d+)', where))
+        return len(self.matching(entity, start_ms, end_ms))
+
+
+@pytest.fixture
+def bullhorn(web, monkeypatch):
+    fake = FakeBullhorn()
+    monkeypatch.setattr(web, 'fetch_bullhorn_rows', fake.fetch_rows)
+    monkeypatch.setattr(web, 'fetch_bullhorn_total', fake.total)
+    return fake
+
+
+@pytest.fixture
+def client(web, bullhorn, monkeypatch):
+    """Flask test client signed in against the fake Bullhorn, with no scheduler."""
+    monkeypatch.setattr(web, 'SCHEDULER_MODE', 'off')
+    monkeypatch.setattr(web, 'load_tokens', lambda: {'bh_rest_token': 'token', 'rest_url': 'https://bh.test/rest/'})
+    return web.app.test_client()
+
+
+class FakeSupabase:
+    """In-memory stand-in for the supabase-py client: table(name) queries over tables[name] (lists of
+    row dicts) with select/eq/lt/in_/limit/range, upsert, update and delete. Upserts that would update
+    the same key twice fail as PostgREST does; every executed query is recorded in calls."""
+
+    def __init__(self):
+        self.tables = {}
+        self.calls = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+class FakeQuery:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.action = None
+        self.payload = None
+        self.filters = []
+        self.window = None
+
+    def select(self, columns, count=None):
+        self.action, self.payload = 'select', columns
+        return self
+
+    def upsert(self, rows, on_conflict='id', ignore_duplicates=False):
+        self.action, self.payload = 'upsert', (rows if isinstance(rows, list) else [rows], on_conflict, ignore_duplicates)
+        return self
+
+    def update(self, values):
+        self.action, self.payload = 'update', values
+        return self
+
+    def delete(self):
+        self.action = 'delete'
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def limit(self, count):
+        self.window = (0, count - 1)
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end)
+        return self
+
+    def execute(self):
+        self.client.calls.append((self.name, self.action))
+        rows = self.client.tables.setdefault(self.name, [])
+        matching = [row for row in rows if all(match(row) for match in self.filters)]
+        data = []
+        if self.action == 'select':
+            if self.window:
+                matching = matching[self.window[0]:self.window[1] + 1]
+            columns = None if self.payload == '*' else self.payload.split(',')
+            data = [dict(row) if columns is None else {c: row.get(c) for c in columns} for row in matching]
+        elif self.action == 'upsert':
+            batch, key, ignore_duplicates = self.payload
+            keys = [row[key] for row in batch]
+            if not ignore_duplicates and len(set(keys)) != len(keys):
+                raise Exception('ON CONFLICT DO UPDATE command cannot affect row a second time')
+            existing = {row[key]: row for row in rows}
+            for row in batch:
+                if row[key] not in existing:
+                    existing[row[key]] = dict(row)
+                    rows.append(existing[row[key]])
+                elif not ignore_duplicates:
+                    existing[row[key]].update(row)
+            data = batch
+        elif self.action == 'update':
+            for row in matching:
+                row.update(self.payload)
+            data = matching
+        elif self.action == 'delete':
+            rows[:] = [row for row in rows if not any(row is match for match in matching)]
+            data = matching
+        return type('Response', (), {'data': data, 'count': len(data)})()
+
+
+@pytest.fixture
+def supabase(web, monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(web, 'get_supabase', lambda: fake)
+    monkeypatch.setattr(web, 'SUPABASE_DB_URL', '')
+    return fake
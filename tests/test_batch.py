@@ -0,0 +1,104 @@
+"""/api/batch: one deduplicated fetch plan for several dashboard queries."""
+import random
+from datetime import datetime
+
+import pytest
+
+STATUSES = ['Submitted', 'Client Presented', 'Placed']
+PLACEMENT_STATUSES = ['On assignment', 'Credentialed', 'Provider cancelled', 'Pending']
+
+
+def ms(month, day, hour=12):
+    return int(datetime(2025, month, day, hour).timestamp() * 1000)
+
+
+@pytest.fixture
+def dataset(bullhorn):
+    rng = random.Random(3)
+    owners = [{'id': i, 'firstName': 'Owner', 'lastName': str(i)} for i in (1, 2, 3)]
+    for i in range(1, 201):
+        bullhorn.rows['JobSubmission'].append({
+            'id': i, 'dateAdded': ms(rng.randint(1, 4), rng.randint(1, 28), rng.randint(0, 23)),
+            'dateLastModified': 1, 'status': rng.choice(STATUSES), 'sendingUser': rng.choice(owners),
+            'candidate': {'id': rng.randint(1, 40)}, 'jobOrder': {'id': rng.randint(1, 20)},
+        })
+    for i in range(1, 81):
+        bullhorn.rows['Placement'].append({
+            'id': i, 'dateAdded': ms(rng.randint(1, 4), rng.randint(1, 28)), 'dateLastModified': 1,
+            'status': rng.choice(PLACEMENT_STATUSES), 'owner': rng.choice(owners),
+            'candidate': {'id': rng.randint(1, 40)}, 'jobOrder': {'id': rng.randint(1, 20)},
+        })
+    bullhorn.rows['Note'] = [{'id': 1, 'dateAdded': ms(3, 5), 'commentingPerson': owners[0], 'action': 'Call'}]
+    return bullhorn
+
+
+def batch(client, *queries):
+    response = client.post('/api/batch', json={'queries': list(queries)})
+    return response.status_code, response.get_json()
+
+
+def standalone(client, path, **args):
+    body = client.get(path, query_string=args).get_json()
+    body.pop('success', None)
+    return body
+
+
+def test_results_match_the_standalone_endpoints(client, dataset):
+    status, body = batch(
+        client,
+        {'id': 'glance', 'type': 'summary', 'start': '2025-03-01', 'end': '2025-03-31'},
+        {'id': 'mine', 'type': 'summary', 'start': '2025-03-01', 'end': '2025-03-31', 'owner': '2'},
+        {'id': 'trend', 'type': 'timeseries', 'start': '2025-03-10', 'end': '2025-03-20', 'metrics': 'submissions,booked'},
+        {'id': 'team', 'type': 'recruiters', 'start': '2025-02-01', 'end': '2025-03-31'},
+        {'id': 'weeks', 'type': 'weekly', 'year': 2025, 'month': 3},
+    )
+    assert status == 200 and body['success']
+    results = {query_id: result['data'] for query_id, result in body['results'].items()}
+    assert results['glance'] == standalone(client, '/api/analytics/summary', start='2025-03-01', end='2025-03-31')
+    assert results['mine'] == standalone(client, '/api/analytics/summary', start='2025-03-01', end='2025-03-31', owner='2')
+    assert results['trend'] == standalone(client, '/api/analytics/timeseries', start='2025-03-10', end='2025-03-20',
+                                          metrics='submissions,booked')
+    assert results['team'] == standalone(client, '/api/analytics/recruiters', start='2025-02-01', end='2025-03-31')
+    assert results['weeks'] == client.get('/api/analytics/weekly?year=2025&month=3').get_json()
+
+
+def test_overlapping_needs_share_one_fetch(client, dataset):
+    _, body = batch(
+        client,
+        {'id': 'glance', 'type': 'summary', 'start': '2025-03-01', 'end': '2025-03-31', 'owner': '1'},
+        {'id': 'trend', 'type': 'timeseries', 'start': '2025-03-10', 'end': '2025-03-20', 'metrics': 'presented,placements'},
+    )
+    plan = {fetch['entity']: fetch for fetch in body['fetchPlan']}
+    assert len(body['fetchPlan']) == 2 and body['upstreamNeeds'] == 4
+    assert plan['JobSubmission']['serves'] == ['glance', 'trend']
+    # The owner summary reads the link index rather than widening the submissions fetch
+    assert plan['JobSubmission']['start'] == ms(3, 1, 0)
+    assert 'candidate(id)' in plan['JobSubmission']['fields'] and 'sendingUser(' in plan['JobSubmission']['fields']
+    assert plan['Placement']['maxRows'] == 10000  # Serves a narrower range too, so it must not be truncated
+
+
+def test_each_query_carries_its_own_status(client, dataset):
+    dataset.failing.add('Placement')
+    _, body = batch(
+        client,
+        {'id': 'glance', 'type': 'summary', 'start': '2025-03-01', 'end': '2025-03-31'},
+        {'id': 'notes', 'type': 'notes-by-user', 'start': '2025-03-01', 'end': '2025-03-31'},
+        {'id': 'bad', 'type': 'nope'},
+    )
+    results = body['results']
+    assert results['bad'] == {'status': 400, 'error': 'Unknown query type: nope'}
+    assert results['glance']['status'] == 500
+    assert results['notes']['status'] in (200, 500)  # Cancelled with the failed plan unless it finished first
+    assert not body['success']
+
+
+def test_malformed_batches_are_rejected(client, dataset):
+    assert batch(client)[0] == 400
+    assert batch(client, {'id': 'a', 'type': 'summary'}, {'id': 'a', 'type': 'kpis'})[0] == 400
+    status, body = batch(client, *[{'id': str(i), 'type': 'summary'} for i in range(21)])
+    assert status == 400 and 'At most' in body['error']
+
+
+def test_merge_field_selectors_unions_nested_selections(web):
+    merged = web.merge_field_selectors('id,owner(id)', 'dateAdded,owner(firstName),jobOrder(id)')
+    assert merged == 'id,owner(id,firstName),dateAdded,jobOrder(id)'
@@ -0,0 +1,98 @@
+"""Upstream protection: per-host circuit breakers."""
+import time
+
+import pytest
+
+URL = 'https://bh.test/rest/query/JobSubmission'
+HOST = 'bh.test'
+
+
+@pytest.fixture
+def breakers(web, monkeypatch):
+    monkeypatch.setattr(web, 'BREAKER_FAILURE_THRESHOLD', 3)
+    monkeypatch.setattr(web, 'BREAKER_OPEN_SECONDS', 0.05)
+    return web
+
+
+def fail(web, times=1, elapsed=0.01):
+    for _ in range(times):
+        web.breaker_record(URL, False, elapsed, error='HTTP 503')
+
+
+def test_breaker_opens_after_consecutive_failures(breakers):
+    web = breakers
+    fail(web, 2)
+    assert web.breaker_state(HOST) == 'closed'
+    web.breaker_check(URL)
+    fail(web)
+    assert web.breaker_state(HOST) == 'open'
+    with pytest.raises(web.UpstreamUnavailable):
+        web.breaker_check(URL)
+    stats = web.breaker_stats()[HOST]
+    assert (stats['opens'], stats['rejected'], stats['failures']) == (1, 1, 3)
+
+
+def test_success_resets_the_failure_count(breakers):
+    web = breakers
+    fail(web, 2)
+    web.breaker_record(URL, True, 0.01)
+    fail(web, 2)
+    assert web.breaker_state(HOST) == 'closed'
+
+
+def test_slow_answers_within_their_timeout_are_healthy(breakers):
+    web = breakers
+    fail(web, 2)
+    web.breaker_record(URL, True, 55.0)  # A long paged read
+    fail(web, 2)
+    assert web.breaker_state(HOST) == 'closed'
+
+
+@pytest.mark.parametrize('status, failures', [(200, 0), (429, 2), (503, 3)])
+def test_429_feeds_the_limiter_not_the_breaker(breakers, monkeypatch, status, failures):
+    web = breakers
+
+    class Response:
+        status_code = status
+        headers = {'Retry-After': '0'}
+
+    monkeypatch.setattr(web.requests, 'get', lambda url, **kwargs: Response())
+    fail(web, 2)
+    web.upstream_get(URL, timeout=30)
+    assert web.breaker_stats()[HOST]['failures'] == failures
+    assert web.upstream_limit_stats()[HOST]['throttled'] == (status == 429)
+
+
+def test_half_open_lets_one_probe_through(breakers):
+    web = breakers
+    fail(web, 3)
+    time.sleep(web.BREAKER_OPEN_SECONDS + 0.01)
+    assert web.breaker_state(HOST) == 'half-open'
+    web.breaker_check(URL)  # The probe
+    with pytest.raises(web.UpstreamUnavailable):
+        web.breaker_check(URL)
+
+
+def test_failed_probe_reopens_and_successful_probe_closes(breakers):
+    web = breakers
+    fail(web, 3)
+    time.sleep(web.BREAKER_OPEN_SECONDS + 0.01)
+    web.breaker_check(URL)
+    fail(web)
+    assert web.breaker_state(HOST) == 'open'
+    with pytest.raises(web.UpstreamUnavailable):
+        web.breaker_check(URL)
+
+    time.sleep(web.BREAKER_OPEN_SECONDS + 0.01)
+    web.breaker_check(URL)
+    web.breaker_record(URL, True, 0.01)
+    assert web.breaker_state(HOST) == 'closed'
+    web.breaker_check(URL)
+    assert web.breaker_stats()[HOST]['opens'] == 1  # Reopening after a probe is not a new outage
+
+
+def test_breakers_are_per_host(breakers):
+    web = breakers
+    fail(web, 3)
+    web.breaker_check('https://ahsa.test/Job')
+    assert web.breaker_state('ahsa.test') == 'closed'
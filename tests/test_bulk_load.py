@@ -0,0 +1,65 @@
+"""supabase_upsert: the Postgres bulk loader, its PostgREST fallback and duplicate keys."""
+import psycopg
+import pytest
+
+
+class Connection:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def bulk(web, supabase, monkeypatch):
+    """Bulk loading switched on, with bulk_upsert recording batches or raising state['error']."""
+    state = {'batches': [], 'error': None}
+
+    def bulk_upsert(table, rows, on_conflict, ignore_duplicates=False):
+        if state['error'] is not None:
+            raise state['error']
+        state['batches'].append(rows)
+        return len(rows)
+
+    monkeypatch.setattr(web, 'SUPABASE_DB_URL', 'postgresql://db.test/postgres')
+    monkeypatch.setattr(web, '_bulk_disabled_until', 0)
+    monkeypatch.setattr(web, '_bulk_conn', Connection())
+    monkeypatch.setattr(web, 'bulk_upsert', bulk_upsert)
+    return state
+
+
+def test_batches_go_through_the_bulk_loader(web, supabase, bulk):
+    assert web.supabase_upsert('open_jobs', [{'bullhorn_id': 1}, {'bullhorn_id': 2}], 'bullhorn_id') == 2
+    assert bulk['batches'] == [[{'bullhorn_id': 1}, {'bullhorn_id': 2}]]
+    assert supabase.calls == []
+
+
+@pytest.mark.parametrize('error, disabled', [
+    (psycopg.OperationalError('server closed the connection'), True),
+    (psycopg.errors.InFailedSqlTransaction('current transaction is aborted'), False),
+])
+def test_database_errors_reset_the_connection_and_fall_back(web, supabase, bulk, error, disabled):
+    conn = web._bulk_conn
+    bulk['error'] = error
+    assert web.supabase_upsert('open_jobs', [{'bullhorn_id': 1}], 'bullhorn_id') == 1
+    assert supabase.tables['open_jobs'] == [{'bullhorn_id': 1}]
+    assert conn.closed and web._bulk_conn is None
+    assert web.bulk_load_enabled() is not disabled
+
+
+def test_other_errors_are_raised(web, supabase, bulk):
+    bulk['error'] = KeyError('bullhorn_id')
+    with pytest.raises(KeyError):
+        web.supabase_upsert('open_jobs', [{'bullhorn_id': 1}], 'bullhorn_id')
+    assert 'open_jobs' not in supabase.tables
+
+
+@pytest.mark.parametrize('use_bulk', [True, False])
+def test_repeated_keys_are_collapsed_the_same_way_on_both_paths(web, supabase, bulk, monkeypatch, use_bulk):
+    if not use_bulk:
+        monkeypatch.setattr(web, 'SUPABASE_DB_URL', '')
+    rows = [{'id': 1, 'v': 'a'}, {'id': 2, 'v': 'b'}, {'id': 1, 'v': 'c'}]
+    assert web.supabase_upsert('t', rows, 'id') == 2
+    assert web.supabase_upsert('u', rows, 'id', ignore_duplicates=True) == 2
+    written = bulk['batches'] if use_bulk else [supabase.tables['t'], supabase.tables['u']]
+    assert written == [[{'id': 1, 'v': 'c'}, {'id': 2, 'v': 'b'}], [{'id': 1, 'v': 'a'}, {'id': 2, 'v': 'b'}]]
@@ -0,0 +1,82 @@
+"""Submission cohorts: the (candidate, job) link index and compute_cohorts."""
+from datetime import datetime
+
+import pytest
+
+
+def ms(month, day, hour=12):
+    return int(datetime(2025, month, day, hour).timestamp() * 1000)
+
+
+def submission(row_id, month, day, candidate, job, owner=1):
+    return {'id': row_id, 'dateAdded': ms(month, day), 'dateLastModified': 1, 'status': 'Submitted',
+            'sendingUser': {'id': owner, 'firstName': 'Owner', 'lastName': str(owner)},
+            'candidate': {'id': candidate}, 'jobOrder': {'id': job}}
+
+
+def placement(row_id, month, day, candidate, job, status='On assignment'):
+    return {'id': row_id, 'dateAdded': ms(month, day), 'status': status,
+            'candidate': {'id': candidate}, 'jobOrder': {'id': job}}
+
+
+@pytest.fixture
+def linked(web, bullhorn):
+    bullhorn.rows['JobSubmission'] = [
+        submission(1, 1, 10, candidate=1, job=10),
+        submission(2, 1, 20, candidate=1, job=10, owner=2),  # Same pair again: the cohort keeps the earliest
+        submission(3, 1, 25, candidate=2, job=20, owner=2),
+        submission(4, 2, 5, candidate=3, job=30),
+        submission(5, 2, 6, candidate=4, job=40),
+    ]
+    bullhorn.rows['Placement'] = [
+        placement(1, 1, 20, candidate=1, job=10),
+        placement(2, 3, 9, candidate=1, job=10, status='Client cancelled'),  # Later placement of the same pair
+        placement(3, 4, 16, candidate=3, job=30, status='Pending'),
+        placement(4, 2, 1, candidate=9, job=90),  # No cohort submission
+    ]
+    assert web.ensure_submission_links(ms(1, 1, 0), ms(2, 28, 23))
+    return bullhorn
+
+
+def test_cohorts_date_pairs_by_their_first_submission(web, linked):
+    index = web.calendar_index('month', ms(1, 1, 0), ms(2, 28, 23))
+    result = web.compute_cohorts(ms(1, 1, 0), ms(2, 28, 23), index, linked.rows['Placement'])
+    january, february = result['cohorts']
+    assert (january['id'], january['submitted'], january['placed'], january['booked']) == ('2025-01', 2, 1, 1)
+    assert january['timeToPlacementDays'] == {'median': 10.0, 'mean': 10.0, 'p90': 10.0}
+    assert (february['submitted'], february['placed'], february['booked'], february['conversionRate']) == (2, 1, 0, 50.0)
+    assert result['funnel'] == [{'stage': 'submitted', 'count': 4}, {'stage': 'placed', 'count': 2},
+                                {'stage': 'booked', 'count': 1}]
+
+
+def test_owner_filter_follows_the_cohort_submission(web, linked):
+    index = web.calendar_index('month', ms(1, 1, 0), ms(2, 28, 23))
+    mine = web.compute_cohorts(ms(1, 1, 0), ms(2, 28, 23), index, linked.rows['Placement'], owner_id='2')
+    # Owner 2 resubmitted pair (1, 10), but owner 1 submitted it first
+    assert mine['totals']['submitted'] == 1 and mine['totals']['placed'] == 0
+
+
+def test_submission_pairs_for_owner(web, linked):
+    assert web.submission_pairs_for_owner('2', ms(1, 1, 0), ms(2, 28, 23)) == {(1, 10), (2, 20)}
+    assert web.submission_pairs_for_owner('1', ms(2, 1, 0), ms(2, 28, 23)) == {(3, 30), (4, 40)}
+
+
+def test_link_index_is_reused_until_it_is_due(web, linked):
+    calls = len(linked.calls)
+    assert web.ensure_submission_links(ms(1, 1, 0), ms(2, 28, 23))
+    assert len(linked.calls) == calls
+
+
+def test_cohort_placements_are_read_in_uncapped_windows(web, linked, monkeypatch):
+    monkeypatch.setattr(web, 'SHARD_MAX_MONTHS', 2)
+    rows = web.fetch_cohort_placements(ms(1, 1, 0), ms(5, 31, 23))
+    assert sorted(row['id'] for row in rows) == [1, 2, 3, 4]
+    # Five months in windows of two, each still sharded per month rather than one capped fetch
+    assert len([call for call in linked.calls if call[0] == 'Placement']) == 5
+
+
+def test_endpoint(client, linked):
+    response = client.get('/api/analytics/cohorts?start=2025-01-01&end=2025-02-28&granularity=month')
+    assert response.status_code == 200
+    assert [cohort['submitted'] for cohort in response.get_json()['cohorts']] == [2, 2]
+    assert client.get('/api/analytics/cohorts?granularity=hour').status_code == 400
@@ -0,0 +1,83 @@
+"""Compaction: closing vanished jobs and archiving old closed rows."""
+from datetime import datetime, timedelta
+
+import pytest
+
+
+class Response:
+    def __init__(self, data=None, error=None):
+        self.data, self.error = data, error
+
+    def raise_for_status(self):
+        if self.error:
+            raise self.error
+
+    def json(self):
+        return {'data': self.data}
+
+
+@pytest.fixture
+def open_jobs(web, monkeypatch):
+    """Open job orders served by a fake /query/JobOrder that honours the id>X keyset and page size."""
+    monkeypatch.setattr(web, 'load_tokens', lambda: {'bh_rest_token': 'token', 'rest_url': 'https://bh.test/rest'})
+    monkeypatch.setattr(web, 'BULLHORN_PAGE_SIZE', 3)
+    state = {'ids': list(range(1, 9)), 'wheres': [], 'fail_after': None}
+
+    def upstream_get(url, params=None, timeout=None):
+        state['wheres'].append(params['where'])
+        if state['fail_after'] is not None and len(state['wheres']) > state['fail_after']:
+            return Response(error=RuntimeError('HTTP 503'))
+        after = int(params['where'].rsplit('id>', 1)[1])
+        return Response([{'id': i} for i in state['ids'] if i > after][:params['count']])
+
+    monkeypatch.setattr(web, 'upstream_get', upstream_get)
+    return state
+
+
+def test_open_jobs_are_listed_with_keyset_paging(web, open_jobs):
+    assert web.live_job_ids('open_jobs') == set(range(1, 9))
+    assert [where.rsplit('id>', 1)[1] for where in open_jobs['wheres']] == ['0', '3', '6']
+
+
+def test_a_scan_that_stops_midway_returns_none(web, open_jobs):
+    open_jobs['fail_after'] = 1
+    assert web.live_job_ids('open_jobs') is None
+
+
+def test_vanished_jobs_are_closed_once(web, supabase):
+    supabase.tables['open_jobs'] = [{'bullhorn_id': i, 'is_open': True} for i in (1, 2, 3)]
+    supabase.tables['open_jobs'].append({'bullhorn_id': 4, 'is_open': False})
+    assert web.close_vanished_jobs('open_jobs', {1, 3}) == (4, 1)
+    assert [row['is_open'] for row in supabase.tables['open_jobs']] == [True, False, True, False]
+    assert web.close_vanished_jobs('open_jobs', {1, 3}) == (4, 0)
+
+
+def test_old_closed_rows_move_to_the_archive(web, supabase):
+    old = (datetime.now() - timedelta(days=web.COMPACTION_RETENTION_DAYS + 1)).isoformat()
+    recent = datetime.now().isoformat()
+    supabase.tables['ahsa_jobs'] = [
+        {'id': '1', 'status': web.AHSA_CLOSED_STATUS, 'updated_at': old},
+        {'id': '2', 'status': web.AHSA_CLOSED_STATUS, 'updated_at': recent},
+        {'id': '3', 'status': 'Open', 'updated_at': old},
+    ]
+    assert web.archive_closed_jobs('ahsa_jobs') == 1
+    assert [row['id'] for row in supabase.tables['ahsa_jobs']] == ['2', '3']
+    assert [row['id'] for row in supabase.tables['ahsa_jobs_archive']] == ['1']
+    assert supabase.tables['ahsa_jobs_archive'][0]['archived_at']
+
+
+def test_nothing_is_closed_when_the_live_list_is_unavailable(web, supabase, monkeypatch):
+    supabase.tables['ahsa_jobs'] = [{'id': '1', 'status': 'Open', 'updated_at': datetime.now().isoformat()}]
+    supabase.tables['open_jobs'] = [{'bullhorn_id': 1, 'is_open': True, 'updated_at': datetime.now().isoformat()}]
+
+    def unavailable(table):
+        if table == 'ahsa_jobs':
+            raise RuntimeError('AHSA down')
+        return None
+
+    monkeypatch.setattr(web, 'live_job_ids', unavailable)
+    result = web.compact_job_tables()
+    assert result['success']
+    assert result['tables']['ahsa_jobs'] == {'live': None, 'scanned': 0, 'closed': 0, 'archived': 0, 'remaining': None}
+    assert supabase.tables['ahsa_jobs'][0]['status'] == 'Open'
+    assert supabase.tables['open_jobs'][0]['is_open'] is True
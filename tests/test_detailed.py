@@ -0,0 +1,76 @@
+"""Detailed tables: indexed filtering, sorting, paging and facet counts."""
+import pytest
+
+ROWS = [
+    {'id': 1, 'dateAdded': 100, 'ownerName': 'Ann Lee', 'status': 'Submitted', 'clientName': 'Acme'},
+    {'id': 2, 'dateAdded': 400, 'ownerName': 'Bob Ray', 'status': 'Placed', 'clientName': 'Acme'},
+    {'id': 3, 'dateAdded': 300, 'ownerName': 'Ann Lee', 'status': 'Placed', 'clientName': 'Beta'},
+    {'id': 4, 'dateAdded': 200, 'ownerName': 'Ann Lee', 'status': 'Submitted', 'clientName': 'Acme'},
+    {'id': 5, 'dateAdded': 500, 'ownerName': 'Cy Dee', 'status': 'Submitted', 'clientName': None},
+]
+NO_FILTERS = {'owner': '', 'status': '', 'client': '', 'open': ''}
+
+
+@pytest.fixture
+def index(web):
+    return web.build_detailed_index(ROWS)
+
+
+def ids(result):
+    return [row['id'] for row in result['data']]
+
+
+def facet(result, param):
+    return {entry['value']: entry['count'] for entry in result['facets'][param]}
+
+
+def test_unfiltered_rows_are_newest_first(web, index):
+    result = web.query_detailed_index(index, NO_FILTERS)
+    assert ids(result) == [5, 2, 3, 4, 1]
+    assert (result['total'], result['available']) == (5, 5)
+
+
+def test_filters_combine(web, index):
+    result = web.query_detailed_index(index, {**NO_FILTERS, 'owner': 'Ann Lee', 'client': 'Acme'})
+    assert ids(result) == [4, 1]
+    assert web.query_detailed_index(index, {**NO_FILTERS, 'owner': 'Nobody'})['data'] == []
+
+
+def test_sort_and_page(web, index):
+    result = web.query_detailed_index(index, NO_FILTERS, sort='dateAdded', page=2, limit=2)
+    assert ids(result) == [3, 2]
+    assert (result['total'], result['page'], result['limit']) == (5, 2, 2)
+    by_owner = web.query_detailed_index(index, {**NO_FILTERS, 'status': 'Placed'}, sort='-ownerName')
+    assert ids(by_owner) == [2, 3]
+
+
+def test_facets_apply_every_other_filter(web, index):
+    result = web.query_detailed_index(index, {**NO_FILTERS, 'owner': 'Ann Lee', 'status': 'Placed'})
+    assert ids(result) == [3]
+    # Owner facet: rows with status Placed (any owner); status facet: Ann's rows (any status)
+    assert facet(result, 'owner') == {'Ann Lee': 1, 'Bob Ray': 1}
+    assert facet(result, 'status') == {'Placed': 1, 'Submitted': 2}
+    # Client facet: Ann's placed rows only, and empty client values are never listed
+    assert facet(result, 'client') == {'Beta': 1}
+
+
+def test_unfiltered_facets_count_everything(web, index):
+    result = web.query_detailed_index(index, NO_FILTERS)
+    assert facet(result, 'owner') == {'Ann Lee': 3, 'Bob Ray': 1, 'Cy Dee': 1}
+    assert facet(result, 'client') == {'Acme': 3, 'Beta': 1}
+
+
+def test_analytics_cache_evicts_least_recently_used(web, monkeypatch):
+    monkeypatch.setattr(web, 'ANALYTICS_CACHE_MAX_ENTRIES', 2)
+    web.cache_set('a', 1)
+    web.cache_set('b', 2)
+    assert web.cache_get('a') == 1  # 'b' is now the least recently used
+    web.cache_set('c', 3)
+    assert (web.cache_get('a'), web.cache_get('b'), web.cache_get('c')) == (1, None, 3)
+
+
+def test_analytics_cache_sweeps_expired_entries(web, monkeypatch):
+    monkeypatch.setattr(web, '_analytics_cache_state', {'sweptAt': 0.0})
+    web.cache_set('old', 1, ttl=-1)
+    web.cache_set('live', 2)
+    assert list(web._analytics_cache) == ['live']
@@ -0,0 +1,72 @@
+"""Concurrent entity fetches: fetch_entities_concurrently."""
+import threading
+import time
+
+
+def test_queries_run_in_parallel(web):
+    started = time.monotonic()
+    results, timings, error = web.fetch_entities_concurrently({
+        'submissions': (lambda: time.sleep(0.2) or ['s'], ()),
+        'placements': (lambda rows: time.sleep(0.2) or rows, (['p'],)),
+    })
+    assert error is None
+    assert results == {'submissions': ['s'], 'placements': ['p']}
+    assert set(timings) == {'submissions', 'placements'}
+    assert time.monotonic() - started < 0.35
+
+
+def test_a_failure_cancels_the_siblings(web):
+    cancelled = threading.Event()
+
+    def slow():
+        for _ in range(100):
+            if web.fetch_cancelled():
+                cancelled.set()
+                return None
+            time.sleep(0.01)
+        return ['late']
+
+    results, _, error = web.fetch_entities_concurrently({
+        'slow': (slow, ()),
+        'broken': (lambda: None, ()),
+    })
+    assert error == 'broken fetch failed'
+    assert results == {'slow': None, 'broken': None}
+    assert cancelled.wait(1)
+
+
+def test_exceptions_count_as_failures(web):
+    def boom():
+        raise RuntimeError('HTTP 500')
+
+    results, _, error = web.fetch_entities_concurrently({'ok': (list, ()), 'boom': (boom, ())})
+    assert error == 'boom fetch failed'
+    assert results['boom'] is None
+
+
+def test_deadline_names_the_pending_queries(web):
+    results, _, error = web.fetch_entities_concurrently({
+        'fast': (lambda: ['f'], ()),
+        'stuck': (lambda: time.sleep(0.5) or ['s'], ()),
+    }, deadline=0.1)
+    assert error == 'Deadline of 0.1s exceeded waiting for stuck'
+    assert results['fast'] == ['f'] and results['stuck'] is None
+
+
+def test_nesting_past_the_pools_runs_inline_with_the_same_contract(web):
+    def level(depth):
+        if depth == 0:
+            return web.fetch_entities_concurrently({
+                'ok': (lambda: [threading.current_thread().name], ()),
+                'broken': (lambda: None, ()),
+                'skipped': (lambda: ['never'], ()),
+            })
+        results, _, error = web.fetch_entities_concurrently({f'level-{depth}': (level, (depth - 1,))})
+        return results[f'level-{depth}']
+
+    # Two pool levels, then the third call runs in its caller's thread, in order, stopping at the failure
+    results, timings, error = level(2)
+    assert error == 'broken fetch failed'
+    assert results['ok'][0].startswith('bullhorn-fetch-inner')
+    assert results['skipped'] is None
+    assert set(timings) == {'ok', 'broken'}
@@ -0,0 +1,64 @@
+"""Upstream rate limits: the per-host priority token bucket."""
+import pytest
+
+URL = 'https://bh.test/rest/query/JobSubmission'
+HOST = 'bh.test'
+
+
+@pytest.fixture
+def limiter(web, monkeypatch):
+    # Burst of 4 and a refill too slow to matter within a test
+    monkeypatch.setattr(web, 'UPSTREAM_RATE_LIMITS', {HOST: (0.001, 4)})
+    return web
+
+
+def take(web, priority):
+    ticket = web.upstream_enqueue(URL, priority)
+    try:
+        return web.upstream_try_take(ticket)
+    finally:
+        web.upstream_dequeue(ticket)
+
+
+def test_interactive_may_drain_the_bucket(limiter):
+    web = limiter
+    assert [take(web, 'interactive') for _ in range(4)] == [0, 0, 0, 0]
+    assert take(web, 'interactive') > 0
+
+
+def test_background_classes_leave_headroom(limiter):
+    web = limiter
+    # A class takes a token only while one more than its headroom (bulk: half the burst of 4,
+    # maintenance: a quarter) is left: bulk gets 2 of the 4, maintenance 1 more, interactive the last
+    assert [take(web, 'bulk') for _ in range(2)] == [0, 0]
+    assert take(web, 'bulk') > 0
+    assert take(web, 'maintenance') == 0
+    assert take(web, 'maintenance') > 0
+    assert take(web, 'interactive') == 0
+    assert take(web, 'interactive') > 0
+    stats = web.upstream_limit_stats()[HOST]['classes']
+    assert (stats['bulk']['requests'], stats['maintenance']['requests'], stats['interactive']['requests']) == (3, 2, 2)
+
+
+def test_waiting_higher_class_goes_first(limiter):
+    web = limiter
+    interactive = web.upstream_enqueue(URL, 'interactive')
+    try:
+        assert take(web, 'bulk') > 0
+        assert take(web, 'maintenance') > 0
+        assert web.upstream_try_take(interactive) == 0
+    finally:
+        web.upstream_dequeue(interactive)
+    assert take(web, 'bulk') == 0
+
+
+def test_429_pauses_background_classes(limiter):
+    web = limiter
+
+    class Throttled:
+        headers = {'Retry-After': '30'}
+
+    web.upstream_throttled(URL, Throttled())
+    assert take(web, 'bulk') >= 29
+    bucket = web.upstream_limit_stats()[HOST]
+    assert (bucket['tokens'], bucket['throttled']) == (0.0, 1)
@@ -0,0 +1,66 @@
+"""AHSA pipeline stages: threaded_map and how failures travel down a chain."""
+import time
+
+import pytest
+
+
+def test_every_result_is_yielded_and_none_is_dropped(web):
+    results = web.threaded_map(lambda n: None if n % 5 == 0 else n * 2, range(100), workers=4)
+    assert sorted(results) == [n * 2 for n in range(100) if n % 5]
+
+
+def test_a_stage_failure_reaches_its_consumer(web):
+    def fail_on_7(n):
+        if n == 7:
+            raise ValueError('job 7')
+        return n
+
+    with pytest.raises(ValueError, match='job 7'):
+        list(web.threaded_map(fail_on_7, range(20), workers=3))
+
+
+@pytest.mark.parametrize('attempt', range(5))
+def test_a_chained_stage_failure_reaches_the_end_of_the_chain(web, attempt):
+    def fetch(n):
+        if n == 30:
+            raise ValueError('fetch of job 30 failed')
+        return n
+
+    def normalize(n):
+        time.sleep(0.001)  # Busy in func, not in next(source), when the upstream stage fails
+        return n
+
+    stop = web.PipelineStop()
+    rows = web.threaded_map(normalize, web.threaded_map(fetch, range(100), workers=4, stop=stop), stop=stop)
+    with pytest.raises(ValueError, match='job 30'):
+        list(rows)
+
+
+def test_a_truncated_stream_is_not_reported_as_a_push(web, monkeypatch):
+    def fetch(n):
+        if n == 30:
+            raise ValueError('fetch of job 30 failed')
+        return n
+
+    monkeypatch.setattr(web, 'upsert_ahsa_rows', lambda rows, task=None, run=None: (len(list(rows)), 0))
+    stop = web.PipelineStop()
+    rows = web.threaded_map(lambda n: n, web.threaded_map(fetch, range(100), workers=4, stop=stop), stop=stop)
+    result = web.push_ahsa_rows(rows, stop=stop)
+    assert result == {'success': False, 'count': 0, 'error': 'fetch of job 30 failed'}
+
+
+def test_a_consumer_stopping_early_stops_the_stages_before_it(web):
+    seen = []
+
+    def fetch(n):
+        seen.append(n)
+        return n
+
+    stop = web.PipelineStop()
+    rows = web.threaded_map(lambda n: n, web.threaded_map(fetch, range(10000), stop=stop, maxsize=2),
+                            stop=stop, maxsize=2)
+    assert next(rows) == 0
+    rows.close()
+    assert stop.is_set() and stop.error is None
+    time.sleep(0.3)
+    assert len(seen) < 100
@@ -0,0 +1,62 @@
+"""AHSA raw payloads: content-addressed, compressed, and skipped when unchanged."""
+import pytest
+
+
+def job(number, title='RN', notes='Nights'):
+    return {'Number': number, 'Title': title, 'Notes': notes * 20, 'Facility': {'Name': 'General'}}
+
+
+def rows_for(web, jobs):
+    return [web.ahsa_row(j, {'id': str(j['Number']), 'title': j['Title']}, '2025-03-01T00:00:00') for j in jobs]
+
+
+def test_hash_ignores_key_order_and_payloads_round_trip(web):
+    a = {'Number': 1, 'Facility': {'Name': 'General', 'City': 'Reno'}}
+    b = {'Facility': {'City': 'Reno', 'Name': 'General'}, 'Number': 1}
+    assert web.ahsa_raw_hash(a) == web.ahsa_raw_hash(b)
+    stored = web.encode_ahsa_raw_payload(job(1))
+    assert stored['hash'] == web.ahsa_raw_hash(job(1))
+    assert stored['stored_size'] < stored['raw_size']
+    assert web.decode_ahsa_raw_payload(stored['payload']) == job(1)
+
+
+def test_payloads_are_stored_once_and_rows_link_them(web, supabase):
+    jobs = [job(1), job(2), job(3)]
+    assert web.upsert_ahsa_rows(rows_for(web, jobs)) == (3, 0)
+    stored = supabase.tables['ahsa_jobs']
+    assert [row['raw_data'] for row in stored] == [None] * 3
+    assert [row['raw_hash'] for row in stored] == [web.ahsa_raw_hash(j) for j in jobs]
+    assert {row['hash'] for row in supabase.tables['ahsa_raw_payloads']} == {row['raw_hash'] for row in stored}
+
+
+def test_unchanged_jobs_are_not_written_again(web, supabase):
+    web.upsert_ahsa_rows(rows_for(web, [job(1), job(2)]))
+    calls = len(supabase.calls)
+    assert web.upsert_ahsa_rows(rows_for(web, [job(1), job(2)])) == (0, 2)
+    assert [action for _, action in supabase.calls[calls:]] == ['select']
+
+
+def test_only_changed_jobs_and_new_payloads_are_written(web, supabase):
+    web.upsert_ahsa_rows(rows_for(web, [job(1), job(2)]))
+    assert web.upsert_ahsa_rows(rows_for(web, [job(1), job(2, notes='Days')])) == (1, 1)
+    assert len(supabase.tables['ahsa_raw_payloads']) == 3
+    assert supabase.tables['ahsa_jobs'][1]['raw_hash'] == web.ahsa_raw_hash(job(2, notes='Days'))
+
+
+def test_a_closed_job_that_reappears_is_written_again(web, supabase):
+    web.upsert_ahsa_rows(rows_for(web, [job(1)]))
+    supabase.tables['ahsa_jobs'][0]['status'] = web.AHSA_CLOSED_STATUS
+    assert web.upsert_ahsa_rows(rows_for(web, [job(1)])) == (1, 0)
+    assert len(supabase.tables['ahsa_raw_payloads']) == 1  # Its payload is not stored twice
+
+
+@pytest.mark.parametrize('store', ['inline', 'missing'])
+def test_without_the_raw_store_raw_data_is_written_inline(web, supabase, monkeypatch, store):
+    if store == 'inline':
+        monkeypatch.setattr(web, 'AHSA_RAW_STORE', 'inline')
+    else:
+        monkeypatch.setattr(web, 'fetch_ahsa_raw_hashes', lambda: None)  # Table or column not created yet
+    assert web.upsert_ahsa_rows(rows_for(web, [job(1)])) == (1, 0)
+    row = supabase.tables['ahsa_jobs'][0]
+    assert row['raw_data'] == job(1) and 'raw_hash' not in row
+    assert 'ahsa_raw_payloads' not in supabase.tables
@@ -0,0 +1,119 @@
+"""Rollup store: incremental apply/retract of per-row contributions."""
+from contextlib import closing
+from datetime import datetime
+
+import pytest
+
+ENTITY = 'JobSubmission'
+
+
+def submission(row_id, day, status='Submitted', recruiter=(1, 'Ann', 'Lee'), month=3, modified=1):
+    recruiter_id, first, last = recruiter
+    return {
+        'id': row_id,
+        'dateAdded': int(datetime(2025, month, day, 12).timestamp() * 1000),
+        'dateLastModified': modified,
+        'status': status,
+        'sendingUser': {'id': recruiter_id, 'firstName': first, 'lastName': last},
+    }
+
+
+def stored(web, month=3):
+    return web.load_month_rollup(ENTITY, 2025, month)
+
+
+def stored_rows(web):
+    with closing(web.rollup_db()) as conn:
+        return dict(conn.execute('SELECT row_id, status FROM rollup_rows WHERE entity=?', (ENTITY,)).fetchall())
+
+
+@pytest.fixture
+def march(web):
+    rows = [
+        submission(1, 3),
+        submission(2, 3, status='Presented'),
+        submission(3, 12, recruiter=(2, 'Bob', 'Ray')),
+        submission(4, 20),
+    ]
+    web.store_month_rollup(ENTITY, 2025, 3, rows)
+    return rows
+
+
+def test_store_month_matches_counts_from_rows(web, march):
+    meta, counts = stored(web)
+    assert counts == web.rollup_counts_from_rows(march)
+    assert meta['row_count'] == 4
+
+
+def test_reapplying_rows_is_idempotent(web, march):
+    before = stored(web)[1]
+    assert web.apply_rollup_changes(ENTITY, march) == {(2025, 3)}
+    web.apply_rollup_changes(ENTITY, march)
+    meta, counts = stored(web)
+    assert counts == before
+    assert meta['row_count'] == 4
+    assert len(stored_rows(web)) == 4
+
+
+def test_changed_row_retracts_its_old_contribution(web, march):
+    changed = dict(march[0], status='Placed', dateLastModified=50)
+    web.apply_rollup_changes(ENTITY, [changed])
+    web.apply_rollup_changes(ENTITY, [changed])
+    meta, counts = stored(web)
+    assert counts == web.rollup_counts_from_rows([changed] + march[1:])
+    assert stored_rows(web)[1] == 'Placed'
+    assert meta['watermark'] == 50
+
+
+def test_deleted_ids_are_retracted_once(web, march):
+    web.apply_rollup_changes(ENTITY, deleted_ids=[2, 3])
+    assert web.apply_rollup_changes(ENTITY, deleted_ids=[2, 3]) == set()
+    meta, counts = stored(web)
+    assert counts == web.rollup_counts_from_rows([march[0], march[3]])
+    assert meta['row_count'] == 2
+    # Counters that reach zero are dropped rather than kept at 0
+    assert all(count > 0 for count in counts.values())
+
+
+def test_row_moving_to_an_unstored_month_is_only_retracted(web, march):
+    moved = submission(4, 2, month=4)
+    assert web.apply_rollup_changes(ENTITY, [moved]) == {(2025, 3)}
+    meta, counts = stored(web)
+    assert counts == web.rollup_counts_from_rows(march[:3])
+    assert 4 not in stored_rows(web)
+    assert stored(web, month=4) == (None, {})
+
+
+def test_apply_then_retract_restores_previous_counts(web, march):
+    before = stored(web)[1]
+    added = submission(5, 25, status='Client Review')
+    web.apply_rollup_changes(ENTITY, [added])
+    assert stored(web)[1] == web.rollup_counts_from_rows(march + [added])
+    web.apply_rollup_changes(ENTITY, deleted_ids=[5])
+    assert stored(web)[1] == before
+
+
+def test_link_index_delta_feeds_the_stored_month(web, bullhorn, march):
+    bullhorn.rows['JobSubmission'] = [dict(row, candidate={'id': 1}, jobOrder={'id': 1}) for row in march]
+    first_ms, last_ms = (int(day.timestamp() * 1000) for day in web.get_month_range(2025, 3))
+    assert web.index_submission_month(2025, 3, first_ms, last_ms)
+    assert stored(web)[1] == web.rollup_counts_from_rows(march)
+
+    # Row 1 changes, row 3 disappears; the next link refresh carries both to the counters
+    bullhorn.rows['JobSubmission'][0].update(status='Placed', dateLastModified=50)
+    del bullhorn.rows['JobSubmission'][2]
+    with closing(web.rollup_db()) as conn, conn:
+        conn.execute('UPDATE submission_link_months SET synced_at = 0')
+    assert web.index_submission_month(2025, 3, first_ms, last_ms)
+    assert stored_rows(web) == {1: 'Placed', 2: 'Presented', 4: 'Submitted'}
+    assert stored(web)[0]['watermark'] == 50
+
+
+def test_shards_feed_the_stored_month_only_with_rollup_fields(web, bullhorn, march):
+    bullhorn.rows['JobSubmission'] = [dict(row) for row in march[:3]]
+    bullhorn.rows['JobSubmission'][0].update(status='Placed', dateLastModified=50)
+    first_ms, last_ms = (int(day.timestamp() * 1000) for day in web.get_month_range(2025, 3))
+    web.fetch_shard(ENTITY, 'id,dateAdded,status', 2025, 3, first_ms, last_ms)
+    assert stored_rows(web) == {1: 'Submitted', 2: 'Presented', 3: 'Submitted', 4: 'Submitted'}
+    web.fetch_shard(ENTITY, web.ROLLUP_FIELDS[ENTITY], 2025, 3, first_ms, last_ms)
+    assert stored_rows(web) == {1: 'Placed', 2: 'Presented', 3: 'Submitted'}
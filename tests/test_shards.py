@@ -0,0 +1,72 @@
+"""Month-sharded range cache: fetch_rows_sharded and the shard field registry."""
+from datetime import datetime
+
+import pytest
+
+
+def ms(month, day, hour=12):
+    return int(datetime(2025, month, day, hour).timestamp() * 1000)
+
+
+@pytest.fixture
+def rows(bullhorn):
+    bullhorn.rows['JobSubmission'] = [
+        {'id': i, 'dateAdded': ms(month, day), 'status': 'Submitted'}
+        for i, (month, day) in enumerate(((month, day) for month in (1, 2, 3) for day in range(1, 29)), start=1)
+    ]
+    return bullhorn
+
+
+def fetched_months(bullhorn):
+    return sorted(datetime.fromtimestamp(start_ms / 1000).month for _, start_ms, _, _ in bullhorn.calls)
+
+
+def test_overlapping_ranges_only_fetch_missing_months(web, rows):
+    february = web.fetch_rows_sharded('JobSubmission', 'id,dateAdded', ms(2, 1, 0), ms(2, 28, 23))
+    assert len(february) == 28
+    quarter = web.fetch_rows_sharded('JobSubmission', 'id,dateAdded', ms(1, 10, 0), ms(3, 5, 23))
+    assert fetched_months(rows) == [1, 2, 3]
+    assert [row['id'] for row in quarter] == sorted((row['id'] for row in quarter), reverse=True)
+    assert len(quarter) == 28 - 9 + 28 + 5
+
+
+def test_a_superset_shard_serves_narrower_fields(web, rows):
+    web.fetch_rows_sharded('JobSubmission', 'id,dateAdded,status', ms(2, 1, 0), ms(2, 28, 23))
+    web.fetch_rows_sharded('JobSubmission', 'id,dateAdded', ms(2, 3, 0), ms(2, 9, 23))
+    assert fetched_months(rows) == [2]
+
+
+def test_max_rows_keeps_the_newest(web, rows):
+    newest = web.fetch_rows_sharded('JobSubmission', 'id', ms(1, 1, 0), ms(3, 28, 23), max_rows=3)
+    assert [row['id'] for row in newest] == [84, 83, 82]
+    every = web.fetch_rows_sharded('JobSubmission', 'id', ms(1, 1, 0), ms(3, 28, 23), max_rows=None)
+    assert len(every) == 84
+
+
+def test_submission_reads_are_not_capped_to_one_page(web, bullhorn, monkeypatch):
+    monkeypatch.setattr(web, 'BULLHORN_PAGE_SIZE', 10)
+    bullhorn.rows['JobSubmission'] = [{'id': i, 'dateAdded': ms(2, 1 + i % 28)} for i in range(40)]
+    assert len(web.fetch_job_submissions(ms(2, 1, 0), ms(2, 28, 23))) == 40
+
+
+def test_ranges_past_the_shard_limit_are_fetched_directly(web, rows, monkeypatch):
+    monkeypatch.setattr(web, 'SHARD_MAX_MONTHS', 2)
+    assert len(web.fetch_rows_sharded('JobSubmission', 'id', ms(1, 1, 0), ms(3, 28, 23))) == 84
+    assert len(rows.calls) == 1
+    assert web._shard_fields == {}
+
+
+def test_evicted_and_expired_shards_leave_the_field_registry(web, rows, monkeypatch):
+    web.fetch_rows_sharded('JobSubmission', 'id', ms(1, 1, 0), ms(2, 28, 23))
+    web.fetch_rows_sharded('JobSubmission', 'id,status', ms(2, 1, 0), ms(2, 28, 23))
+    assert web._shard_fields == {('JobSubmission', 2025, 1): {'id'}, ('JobSubmission', 2025, 2): {'id', 'id,status'}}
+
+    monkeypatch.setattr(web, 'ANALYTICS_CACHE_MAX_ENTRIES', 1)  # The next insert evicts the oldest entries
+    web.cache_set('other', 1)
+    assert web._shard_fields == {}
+
+    web.fetch_shard('JobSubmission', 'id', 2025, 3, ms(3, 1, 0), ms(3, 28, 23))
+    key = ('shard', 'JobSubmission', 2025, 3, 'id')
+    web._analytics_cache[key] = (0, web._analytics_cache[key][1])  # Expire it
+    assert web.get_cached_shard('JobSubmission', 'id', 2025, 3) is None
+    assert web._shard_fields == {}
@@ -0,0 +1,77 @@
+"""Server-side "At a glance" figures: compute_basic_summary."""
+from datetime import datetime
+
+
+def ms(day, month=3, hour=12):
+    return int(datetime(2025, month, day, hour).timestamp() * 1000)
+
+
+def submission(row_id, day, owner=1, candidate=None, job=None, month=3):
+    return {
+        'id': row_id, 'dateAdded': ms(day, month), 'status': 'Submitted',
+        'sendingUser': {'id': owner, 'firstName': 'Owner', 'lastName': str(owner)},
+        'candidate': {'id': candidate or row_id}, 'jobOrder': {'id': job or 100 + row_id},
+    }
+
+
+def placement(row_id, day, status, candidate, job, month=3):
+    return {'id': row_id, 'dateAdded': ms(day, month), 'status': status,
+            'candidate': {'id': candidate}, 'jobOrder': {'id': job}}
+
+
+START, END = ms(1, hour=0), int(datetime(2025, 3, 31, 23, 59, 59).timestamp() * 1000)
+
+
+def test_stats_and_status_buckets(web):
+    subs = [submission(i, 3 + i) for i in range(1, 5)]
+    places = [
+        placement(1, 10, 'On Assignment', 1, 101),
+        placement(2, 11, 'credentialed', 2, 102),
+        placement(3, 12, 'Client  cancelled', 3, 103),  # Spacing and case are normalized
+        placement(4, 13, 'Pending', 4, 104),
+    ]
+    stats = web.compute_basic_summary(subs, places, START, END)['stats']
+    assert stats['totalSubmissions'] == 4
+    assert stats['totalPlacements'] == 4
+    assert (stats['totalBooked'], stats['totalCancelled'], stats['totalEverBooked']) == (2, 1, 3)
+    assert stats['conversionRate'] == 50.0
+    assert round(stats['cancelledShare'], 1) == 33.3
+
+
+def test_rows_outside_the_range_are_ignored(web):
+    subs = [submission(1, 5), submission(2, 20, month=2), submission(3, 2, month=4)]
+    result = web.compute_basic_summary(subs, [], START, END)
+    assert result['stats']['totalSubmissions'] == 1
+    assert result['stats']['conversionRate'] == 0
+    assert result['stats']['cancelledShare'] is None
+
+
+def test_weekly_chart_is_monday_based_and_in_date_order(web):
+    # 2025-03-03 and 2025-03-09 share a week (Mon-Sun); 2025-03-10 starts the next
+    subs = [submission(1, 10), submission(2, 3), submission(3, 9)]
+    places = [placement(1, 4, 'On assignment', 9, 9)]
+    chart = web.compute_basic_summary(subs, places, START, END)['chartData']
+    assert [(week['weekStart'], week['submissions'], week['placements'], week['booked']) for week in chart] == [
+        ('2025-03-03', 2, 1, 1),
+        ('2025-03-10', 1, 0, 0),
+    ]
+    assert chart[0]['name'] == 'Week 10'
+
+
+def test_owner_filter_links_placements_through_submission_pairs(web):
+    subs = [
+        submission(1, 5, owner=1, candidate=7, job=70),
+        submission(2, 6, owner=2, candidate=8, job=80),
+        # Submitted before the range: still links the owner to an in-range placement
+        submission(3, 10, owner=1, candidate=9, job=90, month=1),
+    ]
+    places = [placement(1, 12, 'On assignment', 7, 70), placement(2, 12, 'On assignment', 8, 80),
+              placement(3, 14, 'Credentialed', 9, 90)]
+    result = web.compute_basic_summary(subs, places, START, END, owner_id='1')
+    assert result['stats']['totalSubmissions'] == 1
+    assert result['stats']['totalBooked'] == 2
+    # The owner list is every submitter in range, whichever owner is selected
+    assert [owner['id'] for owner in result['owners']] == ['1', '2']
+
+    linked = web.compute_basic_summary(subs[:2], places, START, END, owner_id='1', owner_pairs={(7, 70), (9, 90)})
+    assert linked['stats'] == result['stats']
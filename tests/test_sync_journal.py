@@ -0,0 +1,78 @@
+"""Sync journal: checkpointed runs and resuming after a failure or a dead worker."""
+import time
+from contextlib import closing
+
+
+def run_chunk(web, run, ids, commit=True):
+    seq = web.journal_chunk(run, ids)
+    if commit:
+        web.journal_commit(run, seq)
+    return seq
+
+
+def age_run(web, run_id, started_ago=0, updated_ago=0):
+    now = time.time()
+    with closing(web.rollup_db()) as conn, conn:
+        conn.execute('UPDATE sync_runs SET started_at = ?, updated_at = ? WHERE id = ?',
+                     (now - started_ago, now - updated_ago, run_id))
+
+
+def test_failed_run_resumes_after_last_committed_chunk(web):
+    run = web.journal_start('jobs', {'syncedAt': '2025-03-01T00:00:00', 'page': 0})
+    assert not run['resumed']
+    run_chunk(web, run, [1, 2, 3])
+    run_chunk(web, run, [4, 5])
+    run_chunk(web, run, [6, 7], commit=False)  # Died before Supabase accepted this chunk
+    web.journal_finish(run, error='connection reset')
+
+    resumed = web.journal_start('jobs', {'syncedAt': '2025-03-02T00:00:00', 'page': 0, 'extra': True})
+    assert resumed['id'] == run['id']
+    assert resumed['resumed']
+    assert resumed['rows'] == 5
+    assert resumed['lastId'] == '5'
+    assert resumed['doneIds'] == {1, 2, 3, 4, 5}
+    # The stored cursor wins; keys it lacks fall back to the new run's defaults
+    assert resumed['cursor'] == {'syncedAt': '2025-03-01T00:00:00', 'page': 0, 'extra': True}
+
+    run_chunk(web, resumed, [6, 7])
+    web.journal_finish(resumed)
+    [latest] = web.recent_sync_runs()
+    assert (latest['status'], latest['rows'], latest['chunks'], latest['resumes']) == ('completed', 7, 3, 1)
+
+
+def test_active_run_blocks_a_second_one(web):
+    run = web.journal_start('jobs')
+    assert web.journal_start('jobs') is None
+    # Other kinds are independent
+    assert web.journal_start('ahsa') is not None
+    web.journal_finish(run)
+    fresh = web.journal_start('jobs')
+    assert fresh['id'] != run['id'] and not fresh['resumed']
+
+
+def test_stale_running_run_is_taken_over(web):
+    run = web.journal_start('jobs')
+    run_chunk(web, run, [10, 11])
+    age_run(web, run['id'], started_ago=60, updated_ago=web.SYNC_STALE_SECONDS + 1)
+    resumed = web.journal_start('jobs')
+    assert resumed['id'] == run['id']
+    assert resumed['lastId'] == '11'
+
+
+def test_old_unfinished_run_is_abandoned(web):
+    run = web.journal_start('jobs')
+    run_chunk(web, run, [1])
+    web.journal_finish(run, error='boom')
+    age_run(web, run['id'], started_ago=web.SYNC_RESUME_HOURS * 3600 + 1, updated_ago=web.SYNC_RESUME_HOURS * 3600)
+    fresh = web.journal_start('jobs')
+    assert fresh['id'] != run['id']
+    assert (fresh['resumed'], fresh['rows'], fresh['doneIds']) == (False, 0, set())
+    statuses = {entry['id']: entry['status'] for entry in web.recent_sync_runs()}
+    assert statuses[run['id']] == 'abandoned'
+
+
+def test_no_run_is_a_no_op(web):
+    assert web.journal_chunk(None, [1, 2]) is None
+    web.journal_commit(None, None)
+    web.journal_finish(None, error='ignored')
+    assert web.recent_sync_runs() == []
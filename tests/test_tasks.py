@@ -0,0 +1,73 @@
+"""Background tasks: dedupe and abandoning only the tasks of dead processes."""
+import threading
+import time
+from contextlib import closing
+
+import pytest
+
+
+@pytest.fixture
+def blocked(web):
+    """Submit tasks that wait on a shared event; released (and drained) at teardown."""
+    release = threading.Event()
+    task_ids = []
+
+    def submit(kind):
+        task_id, created = web.submit_task(kind, lambda task: release.wait(5) and {'success': True})
+        task_ids.append(task_id)
+        return task_id, created
+
+    yield submit
+    release.set()
+    deadline = time.monotonic() + 5
+    while any(web.get_task(task_id)['status'] in ('queued', 'running') for task_id in task_ids):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def set_columns(web, task_id, **columns):
+    assignments = ', '.join(f"{name} = ?" for name in columns)
+    with closing(web.rollup_db()) as conn, conn:
+        conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?", (*columns.values(), task_id))
+
+
+def status(web, task_id):
+    return web.get_task(task_id)['status']
+
+
+def test_same_work_joins_the_queued_or_running_task(web, blocked):
+    first, created = blocked('sync')
+    assert created
+    assert blocked('sync') == (first, False)
+
+
+def test_own_tasks_without_progress_are_not_abandoned(web, blocked):
+    # Two run and block the pool; the third waits in the queue
+    task_ids = [blocked(f'kind-{i}')[0] for i in range(web.TASK_WORKERS + 1)]
+    for task_id in task_ids:
+        set_columns(web, task_id, updated_at=0, heartbeat_at=0)
+    blocked('other')
+    assert [status(web, task_id) for task_id in task_ids] == ['running'] * web.TASK_WORKERS + ['queued']
+    assert blocked(f'kind-{web.TASK_WORKERS}') == (task_ids[-1], False)
+
+
+def test_tasks_of_a_process_that_stopped_heartbeating_are_abandoned(web, blocked):
+    dead, _ = blocked('dead')
+    alive, _ = blocked('alive')
+    set_columns(web, dead, owner='elsewhere:1:x', heartbeat_at=0)
+    set_columns(web, alive, owner='elsewhere:2:y', updated_at=0, heartbeat_at=time.time())
+    blocked('other')
+    task = web.get_task(dead)
+    assert (task['status'], task['phase']) == ('failed', 'abandoned')
+    assert status(web, alive) in ('queued', 'running')
+
+
+def test_heartbeat_touches_held_tasks(web, blocked, monkeypatch):
+    monkeypatch.setattr(web, 'TASK_HEARTBEAT_SECONDS', 0.01)
+    task_id, _ = blocked('sync')
+    set_columns(web, task_id, heartbeat_at=0)
+    deadline = time.monotonic() + 2
+    with closing(web.rollup_db()) as conn:
+        while not conn.execute('SELECT heartbeat_at FROM tasks WHERE id = ?', (task_id,)).fetchone()[0]:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
@@ -0,0 +1,79 @@
+"""Calendar bucket index and /api/analytics/timeseries."""
+from datetime import datetime
+
+import pytest
+
+
+def ms(month, day, hour=12, year=2025):
+    return int(datetime(year, month, day, hour).timestamp() * 1000)
+
+
+def test_weeks_start_on_monday_and_cover_the_range(web):
+    # 2025-03-05 is a Wednesday; the first bucket is the week of Monday 2025-03-03
+    index = web.calendar_index('week', ms(3, 5), ms(3, 17))
+    assert index['labels'] == ['2025-03-03', '2025-03-10', '2025-03-17']
+    assert index['lastDays'] == ['2025-03-09', '2025-03-16', '2025-03-23']
+    assert index['starts'][0] == ms(3, 3, hour=0)
+
+
+def test_month_and_quarter_labels(web):
+    months = web.calendar_index('month', ms(11, 20, year=2024), ms(2, 3))
+    assert months['labels'] == ['2024-11', '2024-12', '2025-01', '2025-02']
+    assert months['lastDays'][-1] == '2025-02-28'
+    quarters = web.calendar_index('quarter', ms(2, 1), ms(8, 1))
+    assert quarters['labels'] == ['2025-Q1', '2025-Q2', '2025-Q3']
+    assert quarters['firstDays'] == ['2025-01-01', '2025-04-01', '2025-07-01']
+
+
+def test_index_is_cached_per_aligned_range(web):
+    assert web.calendar_index('month', ms(3, 2), ms(4, 9)) is web.calendar_index('month', ms(3, 30), ms(4, 1))
+
+
+def test_bad_granularity_and_oversized_ranges_are_rejected(web, monkeypatch):
+    with pytest.raises(ValueError, match='granularity'):
+        web.calendar_index('hour', ms(3, 1), ms(3, 2))
+    monkeypatch.setattr(web, 'CALENDAR_MAX_BUCKETS', 10)
+    with pytest.raises(ValueError, match='more than 10 day buckets'):
+        web.calendar_index('day', ms(3, 1), ms(3, 31))
+
+
+def test_parse_metrics(web):
+    assert web.parse_timeseries_metrics(None) == ['submissions', 'placements']
+    assert web.parse_timeseries_metrics(' booked, notes ,booked') == ['booked', 'notes']
+    with pytest.raises(ValueError, match='Unknown metric'):
+        web.parse_timeseries_metrics('submissions,revenue')
+
+
+def test_counts_land_in_their_buckets_and_empty_buckets_stay(web):
+    index = web.calendar_index('week', ms(3, 3), ms(3, 23))
+    rows = {
+        'JobSubmission': [
+            {'id': 1, 'dateAdded': ms(3, 4), 'status': 'Client Presented', 'sendingUser': {'id': 1}},
+            {'id': 2, 'dateAdded': ms(3, 9, hour=23), 'status': 'Submitted', 'sendingUser': {'id': 2}},
+            {'id': 3, 'dateAdded': ms(3, 20), 'status': 'Submitted', 'sendingUser': {'id': 1}},
+        ],
+        'Placement': [
+            {'id': 1, 'dateAdded': ms(3, 21), 'status': 'On assignment', 'owner': {'id': 1}},
+            {'id': 2, 'dateAdded': ms(3, 21), 'status': 'Client cancelled', 'owner': {'id': 2}},
+        ],
+    }
+    metrics = ['submissions', 'presented', 'booked', 'cancelled']
+    result = web.compute_timeseries(rows, index, metrics)
+    assert [(b['id'], b['submissions'], b['presented'], b['booked'], b['cancelled']) for b in result['buckets']] == [
+        ('2025-03-03', 2, 1, 0, 0),
+        ('2025-03-10', 0, 0, 0, 0),
+        ('2025-03-17', 1, 0, 1, 1),
+    ]
+    assert result['totals'] == {'submissions': 3, 'presented': 1, 'booked': 1, 'cancelled': 1}
+    mine = web.compute_timeseries(rows, index, metrics, owner_id='1')
+    assert mine['totals'] == {'submissions': 2, 'presented': 1, 'booked': 1, 'cancelled': 0}
+
+
+def test_endpoint_fetches_only_the_entities_its_metrics_need(client, bullhorn):
+    bullhorn.rows['Note'] = [{'id': i, 'dateAdded': ms(3, day), 'commentingPerson': {'id': 1}, 'action': 'Call'}
+                             for i, day in enumerate((2, 2, 15), start=1)]
+    response = client.get('/api/analytics/timeseries?start=2025-03-01&end=2025-03-31&granularity=month&metrics=notes')
+    assert response.status_code == 200
+    assert response.get_json()['buckets'] == [{'id': '2025-03', 'start': '2025-03-01', 'end': '2025-03-31', 'notes': 3}]
+    assert {entity for entity, *_ in bullhorn.calls} == {'Note'}
+    assert client.get('/api/analytics/timeseries?metrics=revenue').status_code == 400
@@ -0,0 +1,47 @@
+"""Cache warming: when token refreshes warm, and what a range warm fetches."""
+import time
+
+import pytest
+
+
+@pytest.fixture
+def warmed(web, monkeypatch):
+    monkeypatch.setattr(web, '_warm_state', {'restUrl': 'https://bh.test/rest/', 'startedAt': time.time()})
+    return web
+
+
+def test_refreshes_of_the_same_session_wait_for_the_interval(warmed, monkeypatch):
+    tokens = {'rest_url': 'https://bh.test/rest/'}
+    assert not warmed.cache_warming_due(tokens)
+    monkeypatch.setitem(warmed._warm_state, 'startedAt', time.time() - warmed.CACHE_WARM_INTERVAL_MINUTES * 60)
+    assert warmed.cache_warming_due(tokens)
+
+
+def test_a_new_session_or_rest_url_warms_at_once(warmed):
+    assert warmed.cache_warming_due({'rest_url': 'https://bh.test/rest/'}, had_session=False)
+    assert warmed.cache_warming_due({'rest_url': 'https://other.test/rest/'})
+
+
+def test_maintain_session_only_schedules_when_due(warmed, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(warmed, 'load_tokens', lambda: {'access_token': 'a', 'bh_rest_token': 'b',
+                                                        'rest_url': 'https://bh.test/rest/'})
+    monkeypatch.setattr(warmed, 'access_token_expires_within', lambda minutes: False)
+    monkeypatch.setattr(warmed, 'exchange_for_bh_rest_token', lambda at, rest_url: ('b2', None))
+    monkeypatch.setattr(warmed, 'get_bh_rest_token_expiration', lambda rest_url, bh: None)
+    monkeypatch.setattr(warmed, 'save_tokens', lambda tokens: None)
+    monkeypatch.setattr(warmed, 'schedule_cache_warming', lambda: scheduled.append(True))
+    warmed.maintain_session()
+    assert scheduled == []
+    monkeypatch.setattr(warmed, 'exchange_for_bh_rest_token', lambda at, rest_url: ('b2', 'https://other.test/rest/'))
+    warmed.maintain_session()
+    assert scheduled == [True]
+
+
+def test_warm_range_leaves_the_summary_to_the_detailed_shards(web, bullhorn, monkeypatch):
+    monkeypatch.setattr(web, 'compute_kpis', lambda start_ms, end_ms: ({}, None))
+    monkeypatch.setattr(web, 'rollup_recruiters', lambda start_ms, end_ms: (None, None, None))
+    timings, error = web.warm_range(1, 2)
+    assert error is None
+    assert set(timings) == set(web.DETAILED_DATASETS) | {'kpis', 'rollups'}
+    assert [call[0] for call in bullhorn.calls].count('Placement') == 1
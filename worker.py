@@ -0,0 +1,59 @@
+"""
+Background worker: owns every scheduled job (token maintenance, the Bullhorn -> Supabase jobs sync,
+compaction, cache warming and warm-restart snapshots) so the web processes only serve requests.
+
+Run the web tier with SCHEDULER_MODE=worker and this process next to it:
+    python worker.py              # run the scheduled jobs until SIGTERM / Ctrl-C
+    python worker.py --once warm  # run one job now and exit (session, sync, warm, compact or snapshot)
+
+The two tiers exchange tokens and warm caches through the snapshot store (see SNAPSHOT_STORE in
+app.py): on Render point both services at the same Supabase project; on one host the default disk
+store and token_store.json are shared directly.
+"""
+import argparse
+import os
+import signal
+import threading
+
+os.environ.setdefault('SCHEDULER_MODE', 'worker')
+
+import app as web
+
+ONE_OFF_JOBS = {
+    'session': web.maintain_session,
+    'sync': web.sync_bullhorn_jobs,
+    'warm': web.warm_analytics_cache,
+    'compact': web.compact_job_tables,
+    'snapshot': web.save_snapshot,
+}
+
+
+def run_forever():
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    web.start_scheduler()
+    for job in web.scheduler.get_jobs():
+        print(f"   {job.id}: next run {job.next_run_time:%Y-%m-%d %H:%M:%S}")
+    stop.wait()
+    print("👋 Worker stopping")  # atexit shuts the scheduler down and writes a final snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--once', choices=sorted(ONE_OFF_JOBS), help='Run a single job and exit')
+    args = parser.parse_args()
+
+    if web.SCHEDULER_MODE != 'worker':
+        print(f"⚠️ SCHEDULER_MODE={web.SCHEDULER_MODE}: web processes may run the same jobs")
+    if args.once:
+        result = ONE_OFF_JOBS[args.once]()
+        if result is not None:
+            print(result)
+        return
+    run_forever()
+
+
+if __name__ == '__main__':
+    main()